@@ -0,0 +1,130 @@
+"""
+HTTP API over the headless tutor service.
+
+    python -m api.server                      # API_HOST / API_PORT / API_WORKERS
+    uvicorn api.server:app --workers 8 --port 8000
+
+Each worker process builds its own stores and indexes; learner state lives
+in SQLite only, so workers (and hosts sharing the data directory) can sit
+behind any load balancer without sticky sessions. At start-up each worker
+preloads the recently most active documents in the background.
+"""
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict
+
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+
+from core.config.settings import get_settings
+from core.memory.tutor_memory import StaleStateError
+from core.service.container import build_services
+from core.service.tutor_service import InvalidAnswerError, InvalidStepError, NotFoundError, TutorService
+from core.service.warmup import start_warmup
+
+
+@lru_cache(maxsize=None)
+def get_tutor_service() -> TutorService:
+    # Several workers serve the same learners: never cache their state in memory
+    return TutorService(build_services(tutor_state_cache_size=0))
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    service = get_tutor_service()
+    start_warmup(service.services, service.index_cache)
+    yield
+
+
+app = FastAPI(title="AI Learning Tutor", lifespan=_lifespan)
+
+
+class AskRequest(BaseModel):
+    question: str = Field(min_length=1)
+    top_k: int = Field(default=5, ge=1, le=20)
+
+
+class AnswerRequest(BaseModel):
+    step_index: int = Field(ge=0)
+    question: str = Field(min_length=1)
+    answer: str = Field(min_length=1)
+
+
+# Only the service's own errors map to client errors; anything else is a bug and stays a 500
+@app.exception_handler(NotFoundError)
+def _not_found(request: Request, exc: NotFoundError) -> JSONResponse:
+    return JSONResponse(status_code=404, content={"detail": str(exc)})
+
+
+@app.exception_handler(StaleStateError)
+def _conflict(request: Request, exc: StaleStateError) -> JSONResponse:
+    # The learner's state changed underneath this request; the client re-fetches the next step
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
+
+
+@app.exception_handler(InvalidStepError)
+@app.exception_handler(InvalidAnswerError)
+def _bad_request(request: Request, exc: ValueError) -> JSONResponse:
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+# Handlers are plain `def`: FastAPI runs them in its threadpool, which keeps
+# SQLite and the blocking LLM clients off the event loop.
+@app.get("/health")
+def health() -> Dict[str, str]:
+    return {"status": "ok"}
+
+
+@app.post("/docs/{doc_id}/ask")
+def ask(
+    doc_id: str,
+    body: AskRequest,
+    service: TutorService = Depends(get_tutor_service),
+) -> Dict[str, Any]:
+    return asdict(service.ask(doc_id, body.question, top_k=body.top_k))
+
+
+@app.get("/learners/{user_id}/docs/{doc_id}/next")
+def next_step(
+    user_id: str,
+    doc_id: str,
+    service: TutorService = Depends(get_tutor_service),
+) -> Dict[str, Any]:
+    return asdict(service.next_step(user_id, doc_id))
+
+
+@app.post("/learners/{user_id}/docs/{doc_id}/answers")
+def submit_answer(
+    user_id: str,
+    doc_id: str,
+    body: AnswerRequest,
+    service: TutorService = Depends(get_tutor_service),
+) -> Dict[str, Any]:
+    return asdict(
+        service.submit_answer(
+            user_id, doc_id,
+            step_index=body.step_index,
+            question=body.question,
+            answer=body.answer,
+        )
+    )
+
+
+def main() -> None:
+    import uvicorn
+
+    settings = get_settings()
+    uvicorn.run(
+        "api.server:app",
+        host=settings.api_host,
+        port=settings.api_port,
+        workers=settings.api_workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
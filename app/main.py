@@ -1,7 +1,15 @@
+from pathlib import Path
+
 import streamlit as st
+from core.agents.knowledge_tracing import KnowledgeTracer
 from core.config.settings import settings
 from core.config.logging import configure_logging
-from core.utils.paths import ensure_data_dirs
+from core.memory.knowledge_state import SQLiteKnowledgeStore
+from core.memory.quiz_attempts import SQLiteQuizAttemptStore
+from core.telemetry.export import SQLiteMetricsStore
+from core.telemetry.llm_usage import ROLLUP_COLUMNS, SQLiteLLMUsageStore
+from core.utils.paths import REGISTRY_DB_PATH, ensure_data_dirs
+from core.llm.provider import list_llm_schedulers
 
 configure_logging()
 ensure_data_dirs()
@@ -19,4 +27,76 @@ with st.expander("✅ Environment Status", expanded=True):
     st.write("OpenAI API key loaded:", "✅" if settings.openai_api_key else "❌")
     st.write("Configured model:", settings.openai_model)
 
+schedulers = list_llm_schedulers()
+if schedulers:
+    with st.expander("🚦 LLM request scheduler", expanded=False):
+        for scheduler in schedulers:
+            m = scheduler.metrics()
+            st.write(f"**{scheduler.model}** ({type(scheduler.provider).__name__}) | in flight: {m.in_flight}")
+            st.json(
+                {
+                    "queue_depth": m.queue_depth,
+                    "tenants_waiting": m.tenants_waiting,
+                    "granted": m.granted,
+                    "avg_wait_s": {k: round(v, 3) for k, v in m.avg_wait_s.items()},
+                }
+            )
+
+with st.expander("📈 Knowledge tracing", expanded=False):
+    st.caption("Refit per-step mastery parameters and re-score every learner from the full quiz history.")
+    if st.button("Recompute from quiz history"):
+        history = SQLiteQuizAttemptStore(Path(REGISTRY_DB_PATH)).score_history()
+        report = KnowledgeTracer(SQLiteKnowledgeStore(Path(REGISTRY_DB_PATH))).recompute(history)
+        st.write(
+            f"Re-scored {report.learners} learners over {report.skills} steps "
+            f"({report.attempts} attempts) in {report.seconds:.2f}s"
+        )
+
+with st.expander("⏱️ Where time goes", expanded=False):
+    st.caption("Latency per pipeline stage across all app and API processes, from the last export.")
+    stages = SQLiteMetricsStore(Path(REGISTRY_DB_PATH)).summary()
+    if stages:
+        st.dataframe(
+            [
+                {
+                    "stage": s.stage,
+                    "labels": ", ".join(f"{k}={v}" for k, v in s.labels.items()),
+                    "calls": s.count,
+                    "total_s": round(s.total_s, 3),
+                    "mean_ms": round(s.mean_s * 1000, 2),
+                    "p95_ms": round(s.p95_s * 1000, 2),
+                }
+                for s in stages[:25]
+            ],
+            use_container_width=True,
+        )
+    else:
+        st.write("No timings exported yet.")
+
+with st.expander("💵 LLM usage", expanded=False):
+    group_by = st.multiselect(
+        "Group by", list(ROLLUP_COLUMNS), default=["day", "call_site"],
+    )
+    rollup = SQLiteLLMUsageStore(Path(REGISTRY_DB_PATH)).rollup(group_by=group_by)
+    if rollup:
+        st.dataframe(
+            [
+                {
+                    **r.key,
+                    "calls": r.calls,
+                    "cached": r.cached,
+                    "errors": r.errors,
+                    "cancelled": r.cancelled,
+                    "prompt_tokens": r.prompt_tokens,
+                    "completion_tokens": r.completion_tokens,
+                    "cost_usd": round(r.cost_usd, 4),
+                    "avg_latency_s": round(r.avg_latency_s, 3),
+                }
+                for r in rollup
+            ],
+            use_container_width=True,
+        )
+    else:
+        st.write("No LLM calls recorded yet.")
+
 st.info("Go to the Upload PDFs page from the left sidebar.")
@@ -5,6 +5,9 @@ import streamlit as st
 from core.storage.pdf_store import save_pdf_bytes
 from core.storage.registry import DocumentRecord, SQLiteDocumentRegistry
 from core.utils.paths import UPLOADS_DIR, REGISTRY_DB_PATH, ensure_data_dirs
+from core.telemetry.profiling import profile_script_run
+
+profile_script_run("page.upload")
 
 ensure_data_dirs()
 
@@ -2,25 +2,22 @@ from pathlib import Path
 
 import streamlit as st
 
+from app.services import get_services, invalidate_doc
 from core.pdf.extractor import PDFTextExtractor
-from core.storage.chunk_store import JSONLChunkStore
-from core.storage.processing_registry import ProcessingRecord, SQLiteProcessingRegistry
-from core.storage.registry import SQLiteDocumentRegistry
+from core.storage.processing_registry import ProcessingRecord
 from core.text.chunker import SimpleTextChunker
-from core.utils.paths import (
-    PROCESSED_DIR,
-    REGISTRY_DB_PATH,
-    ensure_data_dirs,
-)
+from core.telemetry.profiling import profile_script_run
 
-ensure_data_dirs()
+profile_script_run("page.process")
 
 st.title("⚙️ Process PDFs")
 st.caption("Extract text + create chunks. No embeddings/vector DB yet.")
 
-doc_registry = SQLiteDocumentRegistry(db_path=Path(REGISTRY_DB_PATH))
-proc_registry = SQLiteProcessingRegistry(db_path=Path(REGISTRY_DB_PATH))
-chunk_store = JSONLChunkStore(processed_root=Path(PROCESSED_DIR))
+services = get_services()
+doc_registry = services.doc_registry
+proc_registry = services.proc_registry
+chunk_store = services.chunk_store
+answer_cache = services.answer_cache
 
 docs = doc_registry.list_all()
 if not docs:
@@ -66,6 +63,9 @@ if run_btn:
         with st.spinner("Saving chunks to disk..."):
             chunk_store.save(selected_doc.doc_id, chunks)
 
+        # Cached answers cite the old chunks
+        answer_cache.delete_doc(selected_doc.doc_id)
+
         proc_registry.upsert(
             ProcessingRecord(
                 doc_id=selected_doc.doc_id,
@@ -76,6 +76,7 @@ if run_btn:
                 error=None,
             )
         )
+        invalidate_doc(selected_doc.doc_id)
 
         st.success(f"Processed ✅ pages={len(pages)} | chunks={len(chunks)}")
         st.write(f"Saved to: `{chunk_store.chunks_path(selected_doc.doc_id)}`")
@@ -1,27 +1,24 @@
-from pathlib import Path
-from core.llm.answer_generator import PDFAnswerGenerator
+from core.llm.answer_generator import GroundedAnswer
+from core.llm.context import bind_llm_tags
+from core.telemetry.llm_usage import record_llm_cache_hit
 from core.config.settings import settings
 
 import streamlit as st
 
-from core.retrieval.bm25_retriever import BM25ChunkRetriever
-from core.storage.chunk_store import JSONLChunkStore
-from core.storage.processing_registry import SQLiteProcessingRegistry
-from core.storage.registry import SQLiteDocumentRegistry
-from core.utils.paths import (
-    PROCESSED_DIR,
-    REGISTRY_DB_PATH,
-    ensure_data_dirs,
-)
+from app.services import get_retriever, get_services, load_chunks, trace_session_id
+from app.ui.components.sidebar import render_learner_identity
+from core.telemetry.profiling import profile_script_run
+from core.telemetry.session_trace import start_trace_step
 
-ensure_data_dirs()
+profile_script_run("page.ask")
 
 st.title("🔎 Ask from PDFs")
 st.caption("BM25 keyword-based retrieval (no embeddings, Python 3.14 safe).")
 
-doc_registry = SQLiteDocumentRegistry(db_path=Path(REGISTRY_DB_PATH))
-proc_registry = SQLiteProcessingRegistry(db_path=Path(REGISTRY_DB_PATH))
-chunk_store = JSONLChunkStore(processed_root=Path(PROCESSED_DIR))
+services = get_services()
+doc_registry = services.doc_registry
+proc_registry = services.proc_registry
+answer_cache = services.answer_cache
 
 docs = doc_registry.list_all()
 if not docs:
@@ -31,18 +28,24 @@ if not docs:
 doc_map = {f"{d.filename} ({d.doc_id[:8]}...)": d for d in docs}
 selected_label = st.selectbox("Select document", list(doc_map.keys()))
 selected_doc = doc_map[selected_label]
+bind_llm_tags(
+    priority="interactive",
+    tenant=selected_doc.doc_id,
+    user_id=render_learner_identity(),
+    doc_id=selected_doc.doc_id,
+)
 
 status = proc_registry.get(selected_doc.doc_id)
 if not status or status.status != "processed":
     st.warning("This document has not been processed yet. Go to 'Process PDFs' first.")
     st.stop()
 
-chunks = chunk_store.load(selected_doc.doc_id)
+chunks = load_chunks(selected_doc.doc_id)
 if not chunks:
     st.warning("No chunks found for this document.")
     st.stop()
 
-retriever = BM25ChunkRetriever(chunks)
+retriever = get_retriever(selected_doc.doc_id)
 
 question = st.text_input(
     "Ask a question based on this PDF",
@@ -68,6 +71,7 @@ if question:
             {
                 "chunk_id": r.chunk_id,
                 "text": r.text,
+                "score": r.score,
                 "metadata": r.metadata,
             }
         )
@@ -75,22 +79,56 @@ if question:
     st.divider()
 
     if st.button("🧠 Generate Answer from PDF", type="primary"):
-        generator = PDFAnswerGenerator(
+        ask_trace = start_trace_step(
+            trace_session_id(), "ask", "ask",
+            doc_id=selected_doc.doc_id, question=question, top_k=top_k,
+        )
+        chunk_ids = [c["chunk_id"] for c in retrieved_chunks]
+        cached = answer_cache.lookup(
+            doc_id=selected_doc.doc_id,
             model=settings.openai_model,
-            api_key=settings.openai_api_key,
+            question=question,
+            chunk_ids=chunk_ids,
         )
 
-        with st.spinner("Generating grounded answer..."):
-            grounded = generator.answer(
+        st.subheader("✅ Answer (Grounded)")
+        if cached is not None:
+            record_llm_cache_hit(settings.openai_model, call_site="answer")
+            st.write(cached.answer.answer)
+            st.caption(
+                f"Served from cache: answered earlier as \"{cached.question}\" "
+                f"({cached.chunk_overlap:.0%} of sources shared)"
+            )
+            citations = cached.answer.citations
+        else:
+            streaming = services.answer_generator.stream_answer(
                 question=question,
                 chunks=retrieved_chunks,
             )
 
-        st.subheader("✅ Answer (Grounded)")
-        st.write(grounded.answer)
+            text = st.write_stream(streaming.tokens)
+
+            report = streaming.context_report
+            st.caption(
+                f"Context: {report.used_tokens}/{report.budget_tokens} tokens, "
+                f"{report.chunks_kept}/{report.chunks_in} sources "
+                f"(saved {report.tokens_saved} tokens)"
+            )
+
+            citations = streaming.citations
+            if isinstance(text, str) and text.strip():
+                answer_cache.put(
+                    doc_id=selected_doc.doc_id,
+                    model=settings.openai_model,
+                    question=question,
+                    chunk_ids=chunk_ids,
+                    answer=GroundedAnswer(answer=text, citations=citations),
+                )
+
+        ask_trace.finish(cached=cached is not None)
 
         st.subheader("📚 Citations")
-        for c in grounded.citations:
+        for c in citations:
             st.json(c)
 
     with st.spinner("Searching relevant sections..."):
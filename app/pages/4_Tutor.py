@@ -1,51 +1,43 @@
-from pathlib import Path
+from dataclasses import replace
 from datetime import datetime, timezone
 
 import streamlit as st
 
-from core.agents.tutor_agent import TutorAgent
-from core.llm.tutor_generator import TutorContentGenerator
-from core.llm.quiz_evaluator import ConceptualQuizEvaluator
-from core.memory.tutor_memory import SQLiteTutorMemory, TutorState
-from core.memory.quiz_attempts import SQLiteQuizAttemptStore, QuizAttempt
-from core.storage.chunk_store import JSONLChunkStore
-from core.storage.registry import SQLiteDocumentRegistry
-from core.storage.lesson_plan_store import SQLiteLessonPlanStore
-from core.planning.lesson_context import LessonContextSelector
-from core.utils.paths import (
-    PROCESSED_DIR,
-    REGISTRY_DB_PATH,
-    ensure_data_dirs,
-)
+from app.services import get_retriever, get_services, load_chunks, load_lesson_plan, trace_session_id
+from app.ui.components.sidebar import render_learner_identity
 from core.config.settings import settings
+from core.llm.context import bind_llm_tags
+from core.llm.quiz_pregrader import pregrade_stats
+from core.memory.tutor_memory import StaleStateError, TutorState
+from core.memory.quiz_attempts import QuizAttempt
+from core.telemetry.llm_usage import record_llm_cache_hit
+from core.telemetry.profiling import profile_script_run
+from core.telemetry.session_trace import learner_state, start_trace_step
+
+profile_script_run("page.tutor")
 
 # ---------------------------------------------------------------------
 # Setup
 # ---------------------------------------------------------------------
-ensure_data_dirs()
-
 st.title("🎓 AI Learning Tutor")
 
-USER_ID = "default_user"
+USER_ID = render_learner_identity()
+bind_llm_tags(priority="interactive", tenant=USER_ID, user_id=USER_ID)
 
-doc_registry = SQLiteDocumentRegistry(Path(REGISTRY_DB_PATH))
-memory = SQLiteTutorMemory(Path(REGISTRY_DB_PATH))
-attempt_store = SQLiteQuizAttemptStore(Path(REGISTRY_DB_PATH))
-chunks_store = JSONLChunkStore(Path(PROCESSED_DIR))
-plan_store = SQLiteLessonPlanStore(Path(REGISTRY_DB_PATH))
-
-agent = TutorAgent()
-context_selector = LessonContextSelector()
-
-generator = TutorContentGenerator(
-    model=settings.openai_model,
-    api_key=settings.openai_api_key,
-)
+services = get_services()
+doc_registry = services.doc_registry
+memory = services.memory
+attempt_store = services.attempt_store
+content_store = services.content_store
+question_bank = services.question_bank
 
-evaluator = ConceptualQuizEvaluator(
-    model=settings.openai_model,
-    api_key=settings.openai_api_key,
-)
+agent = services.agent
+tracer = services.tracer
+review_scheduler = services.review_scheduler
+event_log = services.event_log
+context_selector = services.context_selector
+generator = services.tutor_generator
+evaluator = services.evaluator
 
 # ---------------------------------------------------------------------
 # Document selection
@@ -58,11 +50,12 @@ if not docs:
 doc_map = {d.filename: d for d in docs}
 selected = st.selectbox("Choose learning material", list(doc_map.keys()))
 doc = doc_map[selected]
+bind_llm_tags(doc_id=doc.doc_id)
 
 # ---------------------------------------------------------------------
 # Load chunks
 # ---------------------------------------------------------------------
-chunks = chunks_store.load(doc.doc_id)
+chunks = load_chunks(doc.doc_id)
 if not chunks:
     st.warning("This document has not been processed yet.")
     st.stop()
@@ -70,7 +63,7 @@ if not chunks:
 # ---------------------------------------------------------------------
 # Load lesson plan
 # ---------------------------------------------------------------------
-lesson_steps = plan_store.load(doc.doc_id)
+lesson_steps = load_lesson_plan(doc.doc_id)
 if not lesson_steps:
     st.warning("No lesson plan found. Generate one from Step 8.")
     st.stop()
@@ -90,7 +83,15 @@ if state is None:
         mastery_score=0.3,
         updated_at_utc=datetime.now(timezone.utc).isoformat(),
     )
-    memory.upsert(state)
+    try:
+        state = memory.upsert(state)
+        event_log.append(
+            USER_ID, doc.doc_id, "started", state.step_index,
+            {"difficulty": state.difficulty, "mastery_score": state.mastery_score},
+        )
+    except StaleStateError:
+        # Another session created it first
+        state = memory.get(USER_ID, doc.doc_id)
 
 # ---------------------------------------------------------------------
 # Resolve current lesson step
@@ -104,10 +105,13 @@ if current_step is None:
     st.success("🎉 You have completed all lessons in this document!")
     st.stop()
 
+retriever = get_retriever(doc.doc_id)
+
 lesson_context = context_selector.select(
     chunks=chunks,
     topic=current_step.topic,
     subtopic=current_step.subtopic,
+    retriever=retriever,
 )
 
 if not lesson_context.strip():
@@ -127,33 +131,111 @@ st.caption(
     f"Mastery: **{state.mastery_score:.2f}**"
 )
 
+if pregrade_stats.total:
+    st.sidebar.metric(
+        "Answers escalated to LLM grading",
+        f"{pregrade_stats.escalation_rate:.0%}",
+        help=f"{pregrade_stats.escalated} of {pregrade_stats.total} answers this process",
+    )
+
+reviews_due = review_scheduler.count_due(USER_ID)
+if reviews_due:
+    st.sidebar.metric("Reviews due (all documents)", reviews_due)
+
+# The current step is still being learned, so it is never a review
+due_card = review_scheduler.next_due(
+    USER_ID, doc_id=doc.doc_id, exclude_step=current_step.step_index
+)
+review_step = next(
+    (s for s in lesson_steps if due_card is not None and s.step_index == due_card.step_index),
+    None,
+)
+
 # ---------------------------------------------------------------------
 # Decide tutor action (agent-driven)
 # ---------------------------------------------------------------------
-action = agent.decide_next_action(state)
+action = agent.decide_next_action(state, review_due=review_step is not None)
+
+# Log each explanation once per session, not on every rerun
+explained_key = f"explained::{doc.doc_id}::{current_step.step_index}::{action}"
+if action in ("explain", "review") and explained_key not in st.session_state:
+    event_log.append(
+        USER_ID, doc.doc_id, "explained", current_step.step_index,
+        {"action": action, "difficulty": state.difficulty},
+    )
+    st.session_state[explained_key] = True
+
+# Trace each shown step once per session too; finished at the end of the page
+shown_key = f"traced::{doc.doc_id}::{current_step.step_index}::{action}::{state.version}"
+shown_trace = None
+if shown_key not in st.session_state:
+    st.session_state[shown_key] = True
+    shown_trace = start_trace_step(
+        trace_session_id(), "tutor", "next_step",
+        user_id=USER_ID, doc_id=doc.doc_id, state=learner_state(state),
+    )
 
 # ---------------------------------------------------------------------
 # EXPLAIN
 # ---------------------------------------------------------------------
 if action == "explain":
-    explanation = generator.explain(
-        context=lesson_context,
-        difficulty=state.difficulty,
+    explanation = content_store.get(
+        doc.doc_id, current_step.step_index, state.difficulty, "explain"
     )
-    st.write(explanation)
+    if explanation:
+        record_llm_cache_hit(settings.openai_model, call_site="explain")
+        st.write(explanation)
+    else:
+        st.write_stream(
+            generator.stream_explain(
+                context=lesson_context,
+                difficulty=state.difficulty,
+            )
+        )
 
 # ---------------------------------------------------------------------
 # QUIZ + CONCEPTUAL EVALUATION
 # ---------------------------------------------------------------------
 elif action == "quiz":
-    question = generator.quiz(
-        context=lesson_context,
-        difficulty=state.difficulty,
-    )
+    # Pin the question for this step so the one graded is the one shown
+    quiz_key = f"quiz::{doc.doc_id}::{current_step.step_index}::{state.difficulty}"
+    question = st.session_state.get(quiz_key)
+    if question is None:
+        banked = question_bank.next_question(
+            USER_ID, doc.doc_id, current_step.step_index, state.difficulty
+        )
+        if banked is not None:
+            record_llm_cache_hit(settings.openai_model, call_site="quiz")
+            question = banked.question
+        else:
+            question = generator.quiz(
+                context=lesson_context,
+                difficulty=state.difficulty,
+            )
+        st.session_state[quiz_key] = question
+        event_log.append(
+            USER_ID, doc.doc_id, "quizzed", current_step.step_index,
+            {"question": question, "difficulty": state.difficulty},
+        )
 
     st.markdown("### 🧠 Quiz")
     st.write(question)
 
+    question_stats = next(
+        (
+            qs for qs in question_bank.question_stats(
+                doc.doc_id, current_step.step_index, state.difficulty
+            )
+            if qs.question == question and qs.attempts
+        ),
+        None,
+    )
+    if question_stats is not None:
+        st.caption(
+            f"Answered {question_stats.attempts} times, "
+            f"average score {question_stats.avg_score:.2f}"
+        )
+
     user_answer = st.text_area("Your answer")
 
     if st.button("Submit answer", type="primary"):
@@ -161,11 +243,19 @@ elif action == "quiz":
             st.warning("Please write an answer before submitting.")
             st.stop()
 
+        answer_trace = start_trace_step(
+            trace_session_id(), "tutor", "submit_answer",
+            user_id=USER_ID, doc_id=doc.doc_id, state=learner_state(state),
+            step_index=current_step.step_index, question=question, answer=user_answer,
+        )
         with st.spinner("Evaluating your understanding..."):
             evaluation = evaluator.evaluate(
                 context=lesson_context,
                 question=question,
                 user_answer=user_answer,
+                previous_attempts=attempt_store.list_for_step(
+                    USER_ID, doc.doc_id, current_step.step_index
+                ),
             )
 
         # Feedback
@@ -173,6 +263,25 @@ elif action == "quiz":
         st.write(evaluation.feedback)
         st.write(f"**Score:** `{evaluation.score:.2f}`")
 
+        # Update tutor memory using conceptual score; the versioned write goes
+        # first so a stale session records nothing (attempt, review, knowledge)
+        knowledge = tracer.next_state(
+            USER_ID, doc.doc_id, current_step.step_index, evaluation.score
+        )
+        new_state = agent.update_after_scored_quiz(
+            state=state,
+            score=evaluation.score,
+            p_known=knowledge.p_known,
+            next_p_known=tracer.prior(USER_ID, doc.doc_id, current_step.step_index + 1),
+        )
+        st.session_state.pop(quiz_key, None)
+        try:
+            memory.upsert(new_state)
+        except StaleStateError:
+            answer_trace.finish(score=evaluation.score, error="stale_state")
+            st.warning("Your progress was updated in another session. Reloading the latest state.")
+            st.stop()
+
         # Persist quiz attempt
         attempt_store.insert(
             QuizAttempt(
@@ -186,24 +295,147 @@ elif action == "quiz":
                 created_at_utc=datetime.now(timezone.utc).isoformat(),
             )
         )
-
-        # Update tutor memory using conceptual score
-        new_state = agent.update_after_scored_quiz(
-            state=state,
-            score=evaluation.score,
+        review_scheduler.record(
+            USER_ID, doc.doc_id, current_step.step_index, evaluation.score
+        )
+        tracer.save(knowledge)
+        event_log.record_scored(state, new_state, evaluation.score, question)
+        answer_trace.finish(
+            score=evaluation.score, recall=False, next_step_index=new_state.step_index,
         )
-        memory.upsert(new_state)
 
         st.success("Progress saved. Moving to the next lesson step.")
         st.rerun()
 
+# ---------------------------------------------------------------------
+# SPACED-REPETITION RECALL (earlier step that is due)
+# ---------------------------------------------------------------------
+elif action == "recall":
+    st.markdown(
+        f"### 🔁 Review due: Lesson {review_step.step_index} "
+        f"({review_step.topic} → {review_step.subtopic})"
+    )
+
+    review_context = context_selector.select(
+        chunks=chunks,
+        topic=review_step.topic,
+        subtopic=review_step.subtopic,
+        retriever=retriever,
+    )
+
+    recall_key = f"recall::{doc.doc_id}::{review_step.step_index}"
+    question = st.session_state.get(recall_key)
+    if question is None:
+        banked = question_bank.next_question(
+            USER_ID, doc.doc_id, review_step.step_index, state.difficulty
+        )
+        if banked is not None:
+            record_llm_cache_hit(settings.openai_model, call_site="quiz")
+            question = banked.question
+        else:
+            question = generator.quiz(
+                context=review_context,
+                difficulty=state.difficulty,
+            )
+        st.session_state[recall_key] = question
+        event_log.append(
+            USER_ID, doc.doc_id, "quizzed", review_step.step_index,
+            {"question": question, "difficulty": state.difficulty, "recall": True},
+        )
+
+    st.write(question)
+
+    recall_answer = st.text_area("Your answer", key=f"{recall_key}::answer")
+
+    if st.button("Submit review", type="primary"):
+        if not recall_answer.strip():
+            st.warning("Please write an answer before submitting.")
+            st.stop()
+
+        answer_trace = start_trace_step(
+            trace_session_id(), "tutor", "submit_answer",
+            user_id=USER_ID, doc_id=doc.doc_id, state=learner_state(state),
+            step_index=review_step.step_index, question=question, answer=recall_answer,
+        )
+        with st.spinner("Evaluating your understanding..."):
+            evaluation = evaluator.evaluate(
+                context=review_context,
+                question=question,
+                user_answer=recall_answer,
+                previous_attempts=attempt_store.list_for_step(
+                    USER_ID, doc.doc_id, review_step.step_index
+                ),
+            )
+
+        st.subheader("📝 Feedback")
+        st.write(evaluation.feedback)
+        st.write(f"**Score:** `{evaluation.score:.2f}`")
+
+        # A recall doesn't change the lesson state, but saving it unchanged bumps
+        # the version, so the same review submitted from two tabs is recorded once
+        st.session_state.pop(recall_key, None)
+        try:
+            memory.upsert(replace(state, updated_at_utc=datetime.now(timezone.utc).isoformat()))
+        except StaleStateError:
+            answer_trace.finish(score=evaluation.score, error="stale_state")
+            st.warning("Your progress was updated in another session. Reloading the latest state.")
+            st.stop()
+
+        attempt_store.insert(
+            QuizAttempt(
+                user_id=USER_ID,
+                doc_id=doc.doc_id,
+                step_index=review_step.step_index,
+                question=question,
+                answer=recall_answer,
+                score=evaluation.score,
+                feedback=evaluation.feedback,
+                created_at_utc=datetime.now(timezone.utc).isoformat(),
+            )
+        )
+        tracer.update(USER_ID, doc.doc_id, review_step.step_index, evaluation.score)
+        card = review_scheduler.record(
+            USER_ID, doc.doc_id, review_step.step_index, evaluation.score
+        )
+        event_log.append(
+            USER_ID, doc.doc_id, "scored", review_step.step_index,
+            {
+                "score": evaluation.score,
+                "question": question,
+                "difficulty": state.difficulty,
+                "mastery_score": state.mastery_score,
+                "recall": True,
+            },
+        )
+        answer_trace.finish(
+            score=evaluation.score, recall=True, next_step_index=state.step_index,
+        )
+
+        st.success(f"Review saved. Next review of this lesson in {card.interval_days:.0f} day(s).")
+        st.rerun()
+
 # ---------------------------------------------------------------------
 # REVIEW
 # ---------------------------------------------------------------------
 elif action == "review":
     st.info("Let’s review this concept in simpler terms.")
-    explanation = generator.explain(
-        context=lesson_context,
-        difficulty="easy",
+    explanation = content_store.get(
+        doc.doc_id, current_step.step_index, "easy", "explain"
     )
-    st.write(explanation)
+    if explanation:
+        record_llm_cache_hit(settings.openai_model, call_site="explain")
+        st.write(explanation)
+    else:
+        st.write_stream(
+            generator.stream_explain(
+                context=lesson_context,
+                difficulty="easy",
+            )
+        )
+
+# ---------------------------------------------------------------------
+# Session trace
+# ---------------------------------------------------------------------
+if shown_trace is not None:
+    shown_step = review_step if action == "recall" else current_step
+    shown_trace.finish(action=action, step_index=shown_step.step_index)
@@ -1,25 +1,32 @@
-from pathlib import Path
 import streamlit as st
 
-from core.llm.syllabus_extractor import SyllabusExtractor
+from app.services import get_services, invalidate_lesson_plan, load_chunks
+from core.llm.context import bind_llm_tags
+from core.llm.syllabus_map_reduce import MapReduceSyllabusExtractor
 from core.planning.lesson_planner import LessonPlanner
-from core.storage.lesson_plan_store import SQLiteLessonPlanStore, LessonPlanRow
-from core.storage.chunk_store import JSONLChunkStore
-from core.storage.registry import SQLiteDocumentRegistry
-from core.utils.paths import (
-    PROCESSED_DIR,
-    REGISTRY_DB_PATH,
-    ensure_data_dirs,
+from core.planning.pregeneration import (
+    LessonPregenerator,
+    get_pregeneration_job,
+    start_pregeneration,
+    supersede_pregeneration,
 )
+from core.storage.lesson_plan_store import LessonPlanRow
+from core.text.token_budget import ContextBudgeter
 from core.config.settings import settings
+from core.telemetry.profiling import profile_script_run
 
-ensure_data_dirs()
+profile_script_run("page.lesson_plan")
 
 st.title("📘 Syllabus & Lesson Plan")
 
-doc_registry = SQLiteDocumentRegistry(Path(REGISTRY_DB_PATH))
-chunk_store = JSONLChunkStore(Path(PROCESSED_DIR))
-plan_store = SQLiteLessonPlanStore(Path(REGISTRY_DB_PATH))
+services = get_services()
+doc_registry = services.doc_registry
+plan_store = services.plan_store
+content_store = services.content_store
+question_bank = services.question_bank
+review_store = services.review_store
+knowledge_store = services.tracer.store
+section_cache = services.section_cache
 
 docs = doc_registry.list_all()
 if not docs:
@@ -29,38 +36,83 @@ if not docs:
 doc_map = {d.filename: d for d in docs}
 selected = st.selectbox("Select document", list(doc_map.keys()))
 doc = doc_map[selected]
+bind_llm_tags(priority="interactive", tenant=doc.doc_id, doc_id=doc.doc_id)
 
-chunks = chunk_store.load(doc.doc_id)
-context = "\n".join(c["text"] for c in chunks[:5])
+chunks = load_chunks(doc.doc_id)
+
+mode = st.radio(
+    "Syllabus coverage",
+    ["Full document (map-reduce)", "Quick (opening pages only)"],
+    horizontal=True,
+)
 
 if st.button("🧠 Generate syllabus & lesson plan", type="primary"):
-    extractor = SyllabusExtractor(
-        model=settings.openai_model,
-        api_key=settings.openai_api_key,
-    )
+    extractor = services.syllabus_extractor
     planner = LessonPlanner()
 
-    with st.spinner("Extracting syllabus..."):
-        syllabus = extractor.extract(context)
+    if mode.startswith("Full"):
+        map_reduce = MapReduceSyllabusExtractor(
+            extractor=extractor,
+            cache=section_cache,
+            max_workers=settings.syllabus_max_workers,
+        )
+        progress = st.progress(0.0, text="Extracting syllabus from all sections...")
+
+        def _on_progress(done: int, total: int) -> None:
+            progress.progress(done / total, text=f"Extracted {done}/{total} sections")
+
+        syllabus = map_reduce.extract(chunks, on_progress=_on_progress)
+    else:
+        # Leading chunks in document order, up to the model's context budget
+        budgeted, budget_report = ContextBudgeter.for_model(settings.openai_model).fit_chunks(chunks)
+        context = "\n".join(c["text"] for c in budgeted)
+        st.caption(
+            f"Syllabus context: {budget_report.chunks_kept}/{budget_report.chunks_in} chunks, "
+            f"{budget_report.used_tokens} tokens"
+        )
+
+        with st.spinner("Extracting syllabus..."):
+            syllabus = extractor.extract(context)
 
     with st.spinner("Building lesson plan..."):
         steps = planner.build(syllabus)
 
-    plan_store.save(
+    plan_rows = [
+        LessonPlanRow(
+            doc_id=doc.doc_id,
+            step_index=s.step_index,
+            topic=s.topic,
+            subtopic=s.subtopic,
+            action=s.action,
+        )
+        for s in steps
+    ]
+    # A job still generating for the old plan must not write under the new step indexes
+    supersede_pregeneration(doc.doc_id)
+    plan_store.save(doc_id=doc.doc_id, steps=plan_rows)
+    invalidate_lesson_plan(doc.doc_id)
+
+    # Old pre-generated content and per-step learner data belong to the previous plan
+    content_store.delete_doc(doc.doc_id)
+    question_bank.delete_doc(doc.doc_id)
+    review_store.delete_doc(doc.doc_id)
+    knowledge_store.delete_doc(doc.doc_id)
+    start_pregeneration(
+        LessonPregenerator(
+            generator=services.tutor_generator,
+            store=content_store,
+            question_bank=question_bank,
+            quiz_pool_size=settings.pregen_quiz_pool_size,
+            max_concurrency=settings.pregen_max_concurrency,
+            requests_per_second=settings.pregen_requests_per_s,
+            plan_store=plan_store,
+        ),
         doc_id=doc.doc_id,
-        steps=[
-            LessonPlanRow(
-                doc_id=doc.doc_id,
-                step_index=s.step_index,
-                topic=s.topic,
-                subtopic=s.subtopic,
-                action=s.action,
-            )
-            for s in steps
-        ],
+        chunks=chunks,
+        steps=plan_rows,
     )
 
-    st.success("Lesson plan created and saved.")
+    st.success("Lesson plan created and saved. Lesson content is being prepared in the background.")
 
     st.subheader("📚 Syllabus")
     st.json(syllabus)
@@ -68,3 +120,15 @@ if st.button("🧠 Generate syllabus & lesson plan", type="primary"):
     st.subheader("🗺️ Lesson Plan")
     for s in steps:
         st.write(f"{s.step_index}. [{s.action.upper()}] {s.topic} → {s.subtopic}")
+
+job = get_pregeneration_job(doc.doc_id)
+if job is not None:
+    st.divider()
+    st.subheader("⚡ Lesson content pre-generation")
+    if job.total:
+        st.progress(job.done / job.total)
+    st.caption(
+        f"Status: **{job.status}** | done: {job.done}/{job.total} | failed: {job.failed}"
+    )
+    if job.error:
+        st.error(job.error)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+import streamlit as st
+
+from core.retrieval.bm25_retriever import BM25ChunkRetriever
+from core.retrieval.index_cache import get_index_cache
+from core.service.container import Services, build_services
+from core.service.warmup import start_warmup
+from core.storage.lesson_plan_store import LessonPlanRow
+from core.telemetry.session_trace import new_session_id
+
+
+@st.cache_resource(show_spinner=False)
+def get_services() -> Services:
+    """
+    Built once per process and shared by every session. Also starts
+    preloading the recently most active documents in the background.
+    """
+    services = build_services()
+    start_warmup(services)
+    return services
+
+
+def _chunks_version(doc_id: str) -> str:
+    # Re-processing rewrites processed_at_utc, so old cache entries stop matching
+    record = get_services().proc_registry.get(doc_id)
+    return record.processed_at_utc if record else ""
+
+
+def load_chunks(doc_id: str) -> List[dict]:
+    """
+    Parsed chunks for a document, shared across sessions (and with the tutor
+    API in the same process) through the byte-bounded index cache.
+    Treat as read-only.
+    """
+    return get_index_cache().chunks(
+        doc_id, _chunks_version(doc_id), lambda: get_services().chunk_store.load(doc_id)
+    )
+
+
+def get_retriever(doc_id: str) -> Optional[BM25ChunkRetriever]:
+    """
+    BM25 index over a document's chunks, built once per processing run.
+    None when the document has no chunks.
+    """
+    return get_index_cache().retriever(
+        doc_id, _chunks_version(doc_id), lambda: get_services().chunk_store.load(doc_id)
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def load_lesson_plan(doc_id: str) -> List[LessonPlanRow]:
+    return get_services().plan_store.load(doc_id)
+
+
+def invalidate_doc(doc_id: str) -> None:
+    """
+    Call after (re)processing a document: drops its chunks, index and plan.
+    """
+    get_index_cache().invalidate(doc_id)
+    # Streamlit clears a cached function as a whole; other documents just reload
+    load_lesson_plan.clear()
+
+
+def invalidate_lesson_plan(doc_id: str) -> None:
+    """
+    Call after saving a new lesson plan.
+    """
+    load_lesson_plan.clear()
+
+
+def trace_session_id() -> str:
+    """
+    Names this browser session's trace file (recorded when SESSION_TRACE is on).
+    """
+    if "trace_session" not in st.session_state:
+        st.session_state["trace_session"] = new_session_id("ui")
+    return st.session_state["trace_session"]
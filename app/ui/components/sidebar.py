@@ -1,3 +1,5 @@
+import uuid
+
 import streamlit as st
 
 def render_sidebar() -> None:
@@ -6,3 +8,23 @@ def render_sidebar() -> None:
         st.write("UI shell only (no logic yet).")
         st.divider()
         st.write("Steps will appear here (Upload → Learn → Quiz → Progress).")
+
+
+def render_learner_identity() -> str:
+    """
+    Per-session learner id, shown in the sidebar.
+    Kept in the URL (?learner=...) so a reload resumes the same learner.
+    """
+    if "learner_id" not in st.session_state:
+        st.session_state["learner_id"] = (
+            st.query_params.get("learner") or f"learner-{uuid.uuid4().hex[:8]}"
+        )
+
+    with st.sidebar:
+        name = st.text_input("Learner", value=st.session_state["learner_id"]).strip()
+
+    if name and name != st.session_state["learner_id"]:
+        st.session_state["learner_id"] = name
+
+    st.query_params["learner"] = st.session_state["learner_id"]
+    return st.session_state["learner_id"]
@@ -0,0 +1,122 @@
+"""
+Import-time profile of each Streamlit page entry point.
+
+Every page's top-level imports are replayed in a fresh interpreter under
+`python -X importtime`, so the numbers are a cold worker start. The
+page body itself is not run.
+
+    python benchmarks/import_time.py                 # all pages
+    python benchmarks/import_time.py --top 15 --repeat 5
+    python benchmarks/import_time.py --json data/import_time.json
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+ENTRY_POINTS = [PROJECT_ROOT / "app" / "main.py", *sorted((PROJECT_ROOT / "app" / "pages").glob("*.py"))]
+
+
+@dataclass
+class ModuleTime:
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+@dataclass
+class PageProfile:
+    page: str
+    wall_s: float            # median over repeats, interpreter start included
+    imports_us: int          # sum of top-level cumulative import times
+    top: List[ModuleTime]
+
+
+def _import_snippet(page: Path) -> str:
+    tree = ast.parse(page.read_text(encoding="utf-8"))
+    lines = [
+        ast.unparse(node)
+        for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    ]
+    return "\n".join(lines)
+
+
+def _parse_importtime(stderr: str) -> List[ModuleTime]:
+    """
+    Lines look like: "import time:   1234 |     5678 |   package.module"
+    (indentation of the name encodes nesting; level-0 entries are top-level).
+    """
+    out: List[ModuleTime] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        out.append(ModuleTime(module=name.rstrip()[1:], self_us=int(self_us), cumulative_us=int(cumulative_us)))
+    return out
+
+
+def profile_page(page: Path, repeat: int, top: int) -> PageProfile:
+    snippet = _import_snippet(page)
+    walls: List[float] = []
+    modules: List[ModuleTime] = []
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", snippet],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+        )
+        walls.append(time.perf_counter() - started)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{page.name}: imports failed\n{proc.stderr[-2000:]}")
+        modules = _parse_importtime(proc.stderr)
+
+    top_level = [m for m in modules if not m.module.startswith(" ")]
+    ranked = sorted(top_level, key=lambda m: m.cumulative_us, reverse=True)[:top]
+    for m in ranked:
+        m.module = m.module.strip()
+
+    return PageProfile(
+        page=str(page.relative_to(PROJECT_ROOT)),
+        wall_s=statistics.median(walls),
+        imports_us=sum(m.cumulative_us for m in top_level),
+        top=ranked,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per page (median wall time is reported)")
+    parser.add_argument("--top", type=int, default=10, help="slowest top-level imports to show per page")
+    parser.add_argument("--json", type=Path, help="also write the results here")
+    args = parser.parse_args()
+
+    results: Dict[str, PageProfile] = {}
+    for page in ENTRY_POINTS:
+        profile = profile_page(page, repeat=args.repeat, top=args.top)
+        results[profile.page] = profile
+
+        print(f"\n{profile.page}: {profile.wall_s * 1000:.0f} ms wall, {profile.imports_us / 1000:.0f} ms in imports")
+        for m in profile.top:
+            print(f"  {m.cumulative_us / 1000:8.1f} ms  {m.module}")
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps({k: asdict(v) for k, v in results.items()}, indent=2))
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
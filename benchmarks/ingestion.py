@@ -0,0 +1,350 @@
+"""
+Ingestion pipeline benchmark: PDF extraction, chunking and chunk storage.
+
+Synthetic text PDFs are generated locally (no extra dependencies), then
+PDFTextExtractor, SimpleTextChunker and JSONLChunkStore.save/load are
+timed for every PDF size and chunk_size/overlap setting. Peak memory per
+stage comes from a separate tracemalloc pass so it does not skew timings.
+
+    python benchmarks/ingestion.py                                  # 10..2000 pages
+    python benchmarks/ingestion.py --pages 10,100 --chunks 1200:200,600:100
+    python benchmarks/ingestion.py --save-baseline data/ingestion_baseline.json
+    python benchmarks/ingestion.py --baseline data/ingestion_baseline.json --tolerance 0.2
+
+Each stage runs once untimed to warm caches, then --repeat timed runs whose
+median is reported. With --baseline, stages slower (or using more memory)
+than the baseline by more than the tolerance are listed and the exit status
+is 1; time deltas under --min-delta-ms are treated as noise.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+T = TypeVar("T")
+
+WORDS = [
+    "gradient", "descent", "updates", "parameters", "model", "training", "data",
+    "loss", "function", "regularization", "penalty", "complexity", "variance",
+    "bias", "validation", "error", "features", "scaling", "network", "layer",
+    "activation", "weights", "learning", "rate", "batch", "epoch", "sample",
+    "distribution", "probability", "estimate", "the", "of", "and", "to", "a",
+    "in", "is", "that", "for", "with", "as", "on", "by", "this", "an", "each",
+]
+STAGES = ("extract", "chunk", "save", "load")
+
+
+@dataclass
+class StageResult:
+    pages: int
+    chunk_size: int          # 0 for extract, which does not depend on it
+    chunk_overlap: int
+    stage: str
+    seconds: float           # median over repeats
+    pages_per_s: float
+    chunks: int
+    chunks_per_s: float
+    bytes_written: int       # save only
+    peak_mib: float          # 0 when memory was not measured
+
+    @property
+    def key(self) -> str:
+        return f"{self.pages}p/{self.chunk_size}:{self.chunk_overlap}/{self.stage}"
+
+
+# ---------------------------------------------------------------------
+# Synthetic PDFs
+# ---------------------------------------------------------------------
+def write_synthetic_pdf(path: Path, pages: int, lines_per_page: int = 45, seed: int = 7) -> int:
+    """
+    Minimal PDF 1.4 writer: one Helvetica text page per page, each line a
+    random sentence. Returns the file size.
+    """
+    rng = random.Random(seed)
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        (
+            "<< /Type /Pages /Kids ["
+            + " ".join(f"{4 + 2 * i} 0 R" for i in range(pages))
+            + f"] /Count {pages} >>"
+        ).encode("ascii"),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i in range(pages):
+        lines = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 16))).capitalize() + "."
+            for _ in range(lines_per_page)
+        ]
+        stream = ("BT /F1 10 Tf 12 TL 50 800 Td " + " ".join(f"({line}) '" for line in lines) + " ET").encode("ascii")
+        objects.append(
+            (
+                "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+            ).encode("ascii")
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    path.write_bytes(bytes(out))
+    return len(out)
+
+
+# ---------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------
+def _timed(fn: Callable[[], T], repeat: int, warmup: int = 1) -> Tuple[float, T]:
+    """
+    Median of `repeat` timed runs, after `warmup` discarded ones.
+    """
+    for _ in range(warmup):
+        fn()
+    times: List[float] = []
+    value: T
+    for _ in range(repeat):
+        started = time.perf_counter()
+        value = fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times), value
+
+
+def _peak_mib(fn: Callable[[], object]) -> float:
+    """
+    Peak traced allocation while `fn` runs, above what was live before it.
+    """
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (peak - before) / 1024 / 1024
+
+
+def bench_size(
+    pdf_path: Path,
+    pages: int,
+    chunk_settings: List[Tuple[int, int]],
+    processed_dir: Path,
+    repeat: int,
+    memory: bool,
+) -> List[StageResult]:
+    from core.pdf.extractor import PDFTextExtractor
+    from core.storage.chunk_store import JSONLChunkStore
+    from core.text.chunker import SimpleTextChunker
+
+    extractor = PDFTextExtractor()
+    store = JSONLChunkStore(processed_dir)
+
+    seconds, extracted = _timed(lambda: extractor.extract(pdf_path), repeat)
+    page_pairs = [(p.page_number, p.text) for p in extracted]
+    results = [
+        StageResult(
+            pages=pages,
+            chunk_size=0,
+            chunk_overlap=0,
+            stage="extract",
+            seconds=seconds,
+            pages_per_s=pages / seconds,
+            chunks=0,
+            chunks_per_s=0.0,
+            bytes_written=0,
+            peak_mib=_peak_mib(lambda: extractor.extract(pdf_path)) if memory else 0.0,
+        )
+    ]
+
+    for chunk_size, chunk_overlap in chunk_settings:
+        chunker = SimpleTextChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        doc_id = f"bench-{pages}-{chunk_size}-{chunk_overlap}"
+
+        chunk_s, chunks = _timed(lambda: chunker.chunk_pages(doc_id, page_pairs), repeat)
+        save_s, path = _timed(lambda: store.save(doc_id, chunks), repeat)
+        load_s, loaded = _timed(lambda: store.load(doc_id), repeat)
+        if len(loaded) != len(chunks):
+            raise RuntimeError(f"{doc_id}: saved {len(chunks)} chunks but loaded {len(loaded)}")
+        size = path.stat().st_size
+
+        peaks = {stage: 0.0 for stage in STAGES}
+        if memory:
+            peaks["chunk"] = _peak_mib(lambda: chunker.chunk_pages(doc_id, page_pairs))
+            peaks["save"] = _peak_mib(lambda: store.save(doc_id, chunks))
+            peaks["load"] = _peak_mib(lambda: store.load(doc_id))
+
+        for stage, secs in (("chunk", chunk_s), ("save", save_s), ("load", load_s)):
+            results.append(
+                StageResult(
+                    pages=pages,
+                    chunk_size=chunk_size,
+                    chunk_overlap=chunk_overlap,
+                    stage=stage,
+                    seconds=secs,
+                    pages_per_s=pages / secs,
+                    chunks=len(chunks),
+                    chunks_per_s=len(chunks) / secs,
+                    bytes_written=size if stage == "save" else 0,
+                    peak_mib=peaks[stage],
+                )
+            )
+        shutil.rmtree(store.doc_dir(doc_id), ignore_errors=True)
+    return results
+
+
+# ---------------------------------------------------------------------
+# Baseline comparison
+# ---------------------------------------------------------------------
+def compare(
+    results: List[StageResult],
+    baseline: Dict[str, dict],
+    tolerance: float,
+    min_delta_ms: float = 0.0,
+) -> List[str]:
+    """
+    Regressions as readable lines: time (and peak memory, when both runs
+    measured it) above baseline * (1 + tolerance). Time deltas below
+    `min_delta_ms` are ignored, so sub-millisecond stages don't flap.
+    """
+    out: List[str] = []
+    for r in results:
+        base = baseline.get(r.key)
+        if base is None:
+            continue
+        slower_ms = (r.seconds - base["seconds"]) * 1000
+        if r.seconds > base["seconds"] * (1 + tolerance) and slower_ms >= min_delta_ms:
+            out.append(
+                f"{r.key}: {r.seconds * 1000:.1f} ms vs {base['seconds'] * 1000:.1f} ms "
+                f"(+{r.seconds / base['seconds'] - 1:.0%})"
+            )
+        if r.peak_mib and base.get("peak_mib") and r.peak_mib > base["peak_mib"] * (1 + tolerance):
+            out.append(
+                f"{r.key}: peak {r.peak_mib:.1f} MiB vs {base['peak_mib']:.1f} MiB "
+                f"(+{r.peak_mib / base['peak_mib'] - 1:.0%})"
+            )
+    return out
+
+
+def _print_results(results: List[StageResult], baseline: Optional[Dict[str, dict]]) -> None:
+    header = (
+        f"{'pages':>6} {'chunk':>10} {'stage':<8}{'ms':>10}{'pages/s':>11}{'chunks':>8}"
+        f"{'chunks/s':>11}{'MiB out':>9}{'peak MiB':>10}"
+    )
+    if baseline is not None:
+        header += f"{'vs base':>9}"
+    print(header)
+    for r in results:
+        setting = f"{r.chunk_size}:{r.chunk_overlap}" if r.chunk_size else "-"
+        line = (
+            f"{r.pages:>6} {setting:>10} {r.stage:<8}{r.seconds * 1000:>10.1f}{r.pages_per_s:>11.0f}"
+            f"{r.chunks or '':>8}{(f'{r.chunks_per_s:.0f}' if r.chunks else ''):>11}"
+            f"{(f'{r.bytes_written / 1024 / 1024:.2f}' if r.bytes_written else ''):>9}"
+            f"{(f'{r.peak_mib:.1f}' if r.peak_mib else ''):>10}"
+        )
+        if baseline is not None:
+            base = baseline.get(r.key)
+            delta = f"{r.seconds / base['seconds'] - 1:+.0%}" if base else "new"
+            line += f"{delta:>9}"
+        print(line)
+
+
+def _parse_chunks(value: str) -> List[Tuple[int, int]]:
+    settings = []
+    for item in value.split(","):
+        size, _, overlap = item.partition(":")
+        settings.append((int(size), int(overlap or 0)))
+    return settings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", default="10,100,500,2000", help="comma-separated PDF sizes")
+    parser.add_argument("--chunks", default="1200:200,600:100,2400:400", help="chunk_size:overlap settings")
+    parser.add_argument("--lines", type=int, default=45, help="text lines per synthetic page")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage (median is reported)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory pass")
+    parser.add_argument("--workdir", type=Path, help="where PDFs and chunks go (default: a temp dir)")
+    parser.add_argument("--json", type=Path, help="also write the results here")
+    parser.add_argument("--save-baseline", type=Path, help="write these results as the new baseline")
+    parser.add_argument("--baseline", type=Path, help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown before flagging")
+    parser.add_argument(
+        "--min-delta-ms", type=float, default=2.0, help="ignore slowdowns smaller than this (ms)"
+    )
+    args = parser.parse_args()
+
+    # Profiling hooks on the extractor/chunker would distort the numbers
+    os.environ["PROFILING"] = ""
+
+    sizes = [int(p) for p in args.pages.split(",")]
+    chunk_settings = _parse_chunks(args.chunks)
+    baseline = json.loads(args.baseline.read_text())["results"] if args.baseline else None
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="tutor-ingest-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    results: List[StageResult] = []
+    try:
+        for pages in sizes:
+            pdf_path = workdir / f"synthetic_{pages}p.pdf"
+            if not pdf_path.exists():
+                size = write_synthetic_pdf(pdf_path, pages, lines_per_page=args.lines)
+                print(f"Generated {pdf_path.name}: {size / 1024 / 1024:.1f} MiB")
+            results += bench_size(
+                pdf_path,
+                pages,
+                chunk_settings,
+                processed_dir=workdir / "processed",
+                repeat=max(args.repeat, 1),
+                memory=not args.no_memory,
+            )
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print()
+    _print_results(results, baseline)
+
+    payload = {
+        "python": sys.version.split()[0],
+        "lines_per_page": args.lines,
+        "results": {r.key: asdict(r) for r in results},
+    }
+    for target in (args.json, args.save_baseline):
+        if target:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(json.dumps(payload, indent=2))
+            print(f"\nWrote {target}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
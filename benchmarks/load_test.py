@@ -0,0 +1,510 @@
+"""
+Concurrent learner load test for the tutor flow.
+
+N simulated learners walk lesson plans through TutorService (context
+selection, explanation, quiz, evaluation, learner-state upsert) against a
+throwaway data directory and the offline LLM, optionally spread over
+several processes like the API server's workers. The report gives
+throughput, client-side latency percentiles, errors (including SQLite
+"database is locked") and where time went inside SQLite and the LLM queue.
+
+    python benchmarks/load_test.py --learners 50
+    python benchmarks/load_test.py --learners 200 --processes 4 --llm-latency 0.8 --llm-tps 60
+    python benchmarks/load_test.py --learners 100 --duration 60 --json data/load_test.json
+
+The offline LLM answers instantly unless --llm-latency / --llm-tps put a
+stand-in model delay back in; --rpm applies the scheduler's rate limit.
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# Vocabulary for synthetic documents; every lesson step is a (topic, subtopic) pair
+TERMS = [
+    "gradient", "entropy", "regularization", "overfitting", "variance", "bias",
+    "kernel", "margin", "embedding", "attention", "dropout", "momentum",
+    "likelihood", "posterior", "sampling", "clustering", "centroid", "boosting",
+    "bagging", "pruning", "activation", "normalization", "convolution", "recurrence",
+]
+FILLER = [
+    "training", "model", "data", "error", "parameters", "features", "loss",
+    "validation", "prediction", "weights", "updates", "samples",
+]
+_ABOUT = re.compile(r"about (\w[\w-]*)\?")
+
+
+@dataclass(frozen=True)
+class LoadConfig:
+    learners: int
+    processes: int
+    docs: int
+    steps: int
+    chunks: int
+    max_actions: int
+    duration_s: float
+    think_s: float
+    correct: float
+    ask_ratio: float
+    seed: int
+
+
+@dataclass
+class WorkerResult:
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: Counter = field(default_factory=Counter)
+    actions: Counter = field(default_factory=Counter)
+    finished: int = 0
+    stages: list = field(default_factory=list)     # HistogramSnapshot from the worker's registry
+    index_cache: Counter = field(default_factory=Counter)   # hits / misses / evictions
+
+    def merge(self, other: "WorkerResult") -> None:
+        for op, values in other.latencies.items():
+            self.latencies[op].extend(values)
+        self.errors.update(other.errors)
+        self.actions.update(other.actions)
+        self.finished += other.finished
+        self.stages.extend(other.stages)
+        self.index_cache.update(other.index_cache)
+
+
+# ---------------------------------------------------------------------
+# Synthetic documents
+# ---------------------------------------------------------------------
+def _doc_id(n: int) -> str:
+    return f"load-doc-{n}"
+
+
+def _plan(doc_n: int, steps: int) -> List[Tuple[str, str]]:
+    return [
+        (TERMS[(doc_n + i) % len(TERMS)], TERMS[(doc_n + i + 7) % len(TERMS)])
+        for i in range(steps)
+    ]
+
+
+def seed_documents(cfg: LoadConfig) -> None:
+    """
+    Writes chunks, a processing record and a lesson plan per document into
+    the data directory TUTOR_DATA_DIR points at.
+    """
+    from core.storage.chunk_store import JSONLChunkStore
+    from core.storage.lesson_plan_store import LessonPlanRow, SQLiteLessonPlanStore
+    from core.storage.processing_registry import ProcessingRecord, SQLiteProcessingRegistry
+    from core.text.chunker import Chunk
+    from core.utils.paths import PROCESSED_DIR, REGISTRY_DB_PATH, ensure_data_dirs
+
+    ensure_data_dirs()
+    rng = random.Random(cfg.seed)
+    db_path = Path(REGISTRY_DB_PATH)
+    chunk_store = JSONLChunkStore(Path(PROCESSED_DIR))
+    plan_store = SQLiteLessonPlanStore(db_path)
+    proc_registry = SQLiteProcessingRegistry(db_path)
+
+    for n in range(cfg.docs):
+        doc_id = _doc_id(n)
+        plan = _plan(n, cfg.steps)
+        chunks = []
+        for j in range(cfg.chunks):
+            topic, subtopic = plan[j % len(plan)]
+            sentences = [
+                f"{topic.title()} {rng.choice(['shapes', 'limits', 'explains', 'controls'])} "
+                f"the {subtopic} of the {' '.join(rng.sample(FILLER, 2))}."
+                for _ in range(rng.randint(3, 6))
+            ]
+            chunks.append(
+                Chunk(
+                    chunk_id=f"{doc_id}::p{j // 4 + 1}::c{j}",
+                    text=" ".join(sentences),
+                    metadata={"doc_id": doc_id, "page_number": j // 4 + 1, "chunk_index": j},
+                )
+            )
+        chunk_store.save(doc_id, chunks)
+        plan_store.save(
+            doc_id=doc_id,
+            steps=[
+                LessonPlanRow(doc_id, i, topic, subtopic, "explain" if i % 2 == 0 else "quiz")
+                for i, (topic, subtopic) in enumerate(plan)
+            ],
+        )
+        proc_registry.upsert(
+            ProcessingRecord(
+                doc_id=doc_id,
+                status="processed",
+                num_pages=cfg.chunks // 4 + 1,
+                num_chunks=len(chunks),
+                processed_at_utc="load-test",
+                error=None,
+            )
+        )
+
+
+# ---------------------------------------------------------------------
+# Learners
+# ---------------------------------------------------------------------
+class _Learner:
+    def __init__(self, service, user_id: str, cfg: LoadConfig, deadline: float) -> None:
+        self.service = service
+        self.user_id = user_id
+        self.cfg = cfg
+        self.deadline = deadline
+        self.rng = random.Random(f"{cfg.seed}:{user_id}")
+        self.result = WorkerResult()
+        self._sentences: Dict[str, List[str]] = {}
+
+    def _call(self, op: str, fn, *args):
+        """
+        Runs one request, keeping its latency on success and its error kind otherwise.
+        """
+        from core.memory.tutor_memory import StaleStateError
+
+        started = time.perf_counter()
+        try:
+            value = fn(*args)
+        except StaleStateError:
+            self.result.errors["stale_state"] += 1
+        except sqlite3.OperationalError as exc:
+            self.result.errors["sqlite_locked" if "locked" in str(exc) else "sqlite_error"] += 1
+        except Exception as exc:
+            self.result.errors[f"{op}:{type(exc).__name__}"] += 1
+        else:
+            self.result.latencies[op].append(time.perf_counter() - started)
+            return value
+        return None
+
+    def _answer(self, doc_id: str, question: str) -> str:
+        """
+        A right answer quotes the material on the asked-about term; a wrong one doesn't.
+        """
+        if self.rng.random() >= self.cfg.correct:
+            return "I am not sure, something about the weights maybe."
+        sentences = self._sentences.get(doc_id)
+        if sentences is None:
+            chunks = self.service.services.chunk_store.load(doc_id)
+            sentences = self._sentences[doc_id] = [
+                s for c in chunks for s in c["text"].split(". ") if s
+            ]
+        match = _ABOUT.search(question)
+        term = match.group(1).lower() if match else ""
+        hits = [s for s in sentences if term and term in s.lower()]
+        return self.rng.choice(hits or sentences)
+
+    def _finish_reading(self, doc_id: str) -> None:
+        """
+        The tutor quizzes only between mastery 0.4 and 0.7 and grades only the
+        question it served, so a learner who has read an explanation is moved
+        into that band (outside the timed requests) to get a quiz next.
+        """
+        from core.memory.tutor_memory import StaleStateError
+
+        memory = self.service.services.memory
+        state = memory.get(self.user_id, doc_id)
+        if state is None:
+            return
+        try:
+            memory.upsert(replace(state, mastery_score=0.55))
+        except StaleStateError:
+            self.result.errors["stale_state"] += 1
+
+    def _think(self) -> None:
+        if self.cfg.think_s > 0:
+            time.sleep(self.rng.expovariate(1.0 / self.cfg.think_s))
+
+    def walk(self, doc_id: str) -> bool:
+        """
+        Follows the tutor until the plan is done; False if it ran out of
+        actions or time first.
+        """
+        for _ in range(self.cfg.max_actions):
+            if time.perf_counter() >= self.deadline:
+                return False
+            if self.rng.random() < self.cfg.ask_ratio:
+                topic = self.rng.choice(TERMS)
+                self._call("ask", self.service.ask, doc_id, f"What is {topic}?")
+
+            step = self._call("next_step", self.service.next_step, self.user_id, doc_id)
+            if step is None:
+                continue
+            self.result.actions[step.action] += 1
+            if step.action == "done":
+                return True
+            self._think()
+
+            if step.action not in ("quiz", "recall"):
+                self._finish_reading(doc_id)
+                continue
+            self._call(
+                "submit_answer",
+                self.service.submit_answer,
+                self.user_id,
+                doc_id,
+                step.step_index,
+                step.content,
+                self._answer(doc_id, step.content),
+            )
+            self._think()
+        return False
+
+    def run(self, first_doc: int) -> WorkerResult:
+        # With a duration, learners who finish a plan start on the next document
+        n = first_doc
+        while True:
+            if self.walk(_doc_id(n % self.cfg.docs)):
+                self.result.finished += 1
+            n += 1
+            if self.cfg.duration_s <= 0 or time.perf_counter() >= self.deadline:
+                return self.result
+
+
+def run_worker(learner_ids: List[int], cfg: LoadConfig) -> WorkerResult:
+    """
+    One process: a TutorService shared by one thread per learner, as in an
+    API worker. Returns client latencies plus the process's stage histograms.
+    """
+    from core.service.container import build_services
+    from core.service.tutor_service import TutorService
+    from core.telemetry.metrics import get_metrics
+
+    # Like the API: several processes share learners, so no in-process state cache
+    service = TutorService(build_services(tutor_state_cache_size=0))
+    get_metrics().reset()
+
+    deadline = time.perf_counter() + (cfg.duration_s if cfg.duration_s > 0 else float("inf"))
+    learners = [_Learner(service, f"learner-{i}", cfg, deadline) for i in learner_ids]
+    result = WorkerResult()
+    with ThreadPoolExecutor(max_workers=max(len(learners), 1)) as pool:
+        futures = [pool.submit(learner.run, i) for learner, i in zip(learners, learner_ids)]
+        for future in futures:
+            result.merge(future.result())
+    result.stages = get_metrics().snapshot()
+    stats = service.index_cache.stats()
+    result.index_cache.update(hits=stats.hits, misses=stats.misses, evictions=stats.evictions)
+    return result
+
+
+# ---------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _merge_stages(snapshots: list) -> list:
+    from core.telemetry.metrics import HistogramSnapshot
+
+    merged: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], HistogramSnapshot] = {}
+    for s in snapshots:
+        key = (s.stage, tuple(sorted(s.labels.items())))
+        prev = merged.get(key)
+        if prev is None:
+            merged[key] = s
+            continue
+        merged[key] = HistogramSnapshot(
+            stage=s.stage,
+            labels=s.labels,
+            bounds=s.bounds,
+            counts=[a + b for a, b in zip(prev.counts, s.counts)],
+            count=prev.count + s.count,
+            sum_s=prev.sum_s + s.sum_s,
+        )
+    return sorted(merged.values(), key=lambda s: s.sum_s, reverse=True)
+
+
+def build_report(cfg: LoadConfig, result: WorkerResult, wall_s: float, llm: Dict[str, float]) -> dict:
+    requests = sum(len(v) for v in result.latencies.values())
+    ops = {}
+    for op, values in sorted(result.latencies.items()):
+        values = sorted(values)
+        ops[op] = {
+            "count": len(values),
+            "per_s": len(values) / wall_s,
+            "p50_ms": _percentile(values, 0.50) * 1000,
+            "p90_ms": _percentile(values, 0.90) * 1000,
+            "p99_ms": _percentile(values, 0.99) * 1000,
+            "max_ms": values[-1] * 1000,
+        }
+
+    stages = _merge_stages(result.stages)
+    sqlite = [s for s in stages if s.stage == "sqlite"]
+    sqlite_total_s = sum(s.sum_s for s in sqlite)
+    request_total_s = sum(sum(v) for v in result.latencies.values())
+    return {
+        "config": asdict(cfg),
+        "llm": llm,
+        "wall_s": wall_s,
+        "requests": requests,
+        "requests_per_s": requests / wall_s,
+        "learners_finished": result.finished,
+        "actions": dict(result.actions),
+        "errors": dict(result.errors),
+        "operations": ops,
+        "index_cache": dict(result.index_cache),
+        "sqlite": {
+            "statements": sum(s.count for s in sqlite),
+            "total_s": sqlite_total_s,
+            "share_of_request_time": sqlite_total_s / request_total_s if request_total_s else 0.0,
+            "by_statement": [
+                {
+                    **s.labels,
+                    "count": s.count,
+                    "total_s": s.sum_s,
+                    "mean_ms": s.sum_s / s.count * 1000,
+                    "p99_le_ms": s.quantile(0.99) * 1000,
+                }
+                for s in sqlite[:15]
+            ],
+        },
+        "stages": [
+            {
+                "stage": s.stage,
+                **s.labels,
+                "count": s.count,
+                "mean_ms": s.sum_s / s.count * 1000,
+                "p95_le_ms": s.quantile(0.95) * 1000,
+            }
+            for s in stages
+            if s.stage.startswith(("llm.", "tutor.", "context.", "index.", "retrieval."))
+        ],
+    }
+
+
+def print_report(report: dict) -> None:
+    cfg, llm = report["config"], report["llm"]
+    print(
+        f"\n{cfg['learners']} learners over {cfg['processes']} process(es), {cfg['docs']} docs x "
+        f"{cfg['steps']} steps | LLM latency {llm['latency_s']:.2f}s, {llm['tokens_per_s']:g} tok/s, "
+        f"{llm['requests_per_minute']:g} rpm"
+    )
+    print(
+        f"Wall {report['wall_s']:.1f}s | {report['requests']} requests ({report['requests_per_s']:.1f}/s) | "
+        f"{report['learners_finished']} lesson plans finished"
+    )
+
+    print(f"\n{'operation':<15}{'count':>8}{'req/s':>9}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for op, o in report["operations"].items():
+        print(
+            f"{op:<15}{o['count']:>8}{o['per_s']:>9.1f}{o['p50_ms']:>10.1f}"
+            f"{o['p90_ms']:>10.1f}{o['p99_ms']:>10.1f}{o['max_ms']:>10.1f}"
+        )
+    print("Actions:", ", ".join(f"{k}={v}" for k, v in sorted(report["actions"].items())) or "none")
+    print("Errors: ", ", ".join(f"{k}={v}" for k, v in sorted(report["errors"].items())) or "none")
+    print("Index cache:", ", ".join(f"{k}={v}" for k, v in sorted(report["index_cache"].items())) or "none")
+
+    sq = report["sqlite"]
+    print(
+        f"\nSQLite: {sq['statements']} statements, {sq['total_s']:.2f}s inside sqlite "
+        f"({sq['share_of_request_time']:.0%} of request time; lock waits count here)"
+    )
+    print(f"  {'op':<8}{'table':<24}{'count':>8}{'total s':>9}{'mean ms':>9}{'p99 <= ms':>11}")
+    for s in sq["by_statement"]:
+        print(
+            f"  {s.get('op', ''):<8}{s.get('table', ''):<24}{s['count']:>8}{s['total_s']:>9.2f}"
+            f"{s['mean_ms']:>9.2f}{s['p99_le_ms']:>11.1f}"
+        )
+
+    print(f"\n  {'stage':<40}{'count':>8}{'mean ms':>10}{'p95 <= ms':>11}")
+    for s in report["stages"]:
+        labels = ",".join(f"{k}={v}" for k, v in s.items() if k not in ("stage", "count", "mean_ms", "p95_le_ms"))
+        name = f"{s['stage']}{'{' + labels + '}' if labels else ''}"
+        print(f"  {name:<40}{s['count']:>8}{s['mean_ms']:>10.1f}{s['p95_le_ms']:>11.1f}")
+
+
+# ---------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--learners", type=int, default=20, help="concurrent simulated learners")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes sharing one database")
+    parser.add_argument("--docs", type=int, default=2, help="documents learners are spread over")
+    parser.add_argument("--steps", type=int, default=8, help="lesson plan steps per document")
+    parser.add_argument("--chunks", type=int, default=60, help="chunks per document")
+    parser.add_argument("--max-actions", type=int, default=40, help="tutor steps per learner per plan")
+    parser.add_argument("--duration", type=float, default=0.0, help="seconds to keep going (0 = one plan each)")
+    parser.add_argument("--think", type=float, default=0.0, help="mean learner think time between requests, s")
+    parser.add_argument("--correct", type=float, default=0.7, help="share of answers that quote the material")
+    parser.add_argument("--ask-ratio", type=float, default=0.1, help="chance of a free question before each step")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="stand-in LLM delay before the first token, s")
+    parser.add_argument("--llm-tps", type=float, default=0.0, help="stand-in LLM tokens per second (0 = unlimited)")
+    parser.add_argument("--rpm", type=float, default=0.0, help="LLM requests per minute per process (0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--workdir", type=Path, help="data directory to use (default: a temp dir)")
+    parser.add_argument("--keep", action="store_true", help="keep the temp data directory")
+    parser.add_argument("--json", type=Path, help="also write the report here")
+    args = parser.parse_args()
+
+    cfg = LoadConfig(
+        learners=args.learners,
+        processes=max(args.processes, 1),
+        docs=max(args.docs, 1),
+        steps=max(args.steps, 1),
+        chunks=max(args.chunks, args.steps),
+        max_actions=args.max_actions,
+        duration_s=args.duration,
+        think_s=args.think,
+        correct=args.correct,
+        ask_ratio=args.ask_ratio,
+        seed=args.seed,
+    )
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="tutor-load-"))
+    llm = {"latency_s": args.llm_latency, "tokens_per_s": args.llm_tps, "requests_per_minute": args.rpm}
+
+    # Set before any core import so worker processes inherit the same settings
+    os.environ.update(
+        TUTOR_DATA_DIR=str(workdir),
+        LLM_PROVIDER="offline",
+        OFFLINE_LLM_LATENCY_S=str(args.llm_latency),
+        OFFLINE_LLM_TOKENS_PER_S=str(args.llm_tps),
+        LLM_REQUESTS_PER_MINUTE=str(args.rpm),
+        LLM_TOKENS_PER_MINUTE="0",
+        PROFILING="",
+    )
+
+    if args.workdir is None and not args.keep:
+        # Registered first so it runs last, after the usage and metrics flushes
+        atexit.register(shutil.rmtree, workdir, ignore_errors=True)
+
+    seed_documents(cfg)
+    shards = [list(range(p, cfg.learners, cfg.processes)) for p in range(cfg.processes)]
+    print(f"Data directory: {workdir}")
+
+    started = time.perf_counter()
+    result = WorkerResult()
+    if cfg.processes == 1:
+        result.merge(run_worker(shards[0], cfg))
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(cfg.processes) as pool:
+            for r in pool.starmap(run_worker, [(shard, cfg) for shard in shards]):
+                result.merge(r)
+    wall_s = time.perf_counter() - started
+
+    report = build_report(cfg, result, wall_s, llm)
+    print_report(report)
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+Deterministic replay of recorded tutor sessions, for end-to-end regression timing.
+
+Record real sessions by running the app or the API with SESSION_TRACE=1;
+traces land in data/traces/. This tool re-runs every recorded step (show
+next step, grade an answer, answer a question) in order through
+TutorService, against a scratch copy of the documents involved. The LLM is
+replaced by the recorded responses (LLM_PROVIDER=replay); prompts that were
+never recorded fall back to the offline backend and are counted as misses.
+Before each tutor step the learner is put back in the recorded state, so a
+step does the same work however earlier steps turned out.
+
+    python benchmarks/replay.py data/traces --json data/replay_before.json
+    # ... change the code ...
+    python benchmarks/replay.py data/traces --json data/replay_after.json
+    python benchmarks/replay.py --diff data/replay_before.json data/replay_after.json
+
+--replay-latency also sleeps each recorded LLM latency, for wall-clock
+numbers closer to production; by default only our own code is timed.
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+
+@dataclass
+class StepTiming:
+    step_id: str             # <session>#<n>, stable between replays of the same traces
+    page: str
+    op: str
+    user_id: str
+    doc_id: str
+    recorded_s: float
+    replay_s: float
+    llm_hits: int
+    llm_misses: int
+    match: Optional[bool]    # replay reached the recorded outcome (action / score)
+    error: str
+
+
+# ---------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------
+def load_steps(files: List[Path]) -> List[Tuple[str, dict]]:
+    """
+    Recorded steps from all traces in time order, each with its step id.
+    """
+    from core.telemetry.session_trace import read_trace
+
+    steps: List[Tuple[str, dict]] = []
+    for path in files:
+        counts: Dict[str, int] = {}
+        for record in read_trace(path):
+            if record.get("type") != "step":
+                continue
+            session = record["session"]
+            n = counts[session] = counts.get(session, 0) + 1
+            steps.append((f"{session}#{n}", record))
+    steps.sort(key=lambda item: item[1]["ts"])
+    return steps
+
+
+def seed_documents(doc_ids: List[str], source: Path) -> List[str]:
+    """
+    Copies chunks, processing record and lesson plan of each document from
+    the `source` data directory into the scratch one. Returns missing ids.
+    """
+    from core.storage.lesson_plan_store import SQLiteLessonPlanStore
+    from core.storage.processing_registry import SQLiteProcessingRegistry
+    from core.utils.paths import DATA_DIR, PROCESSED_DIR, REGISTRY_DB_PATH, ensure_data_dirs
+
+    ensure_data_dirs()
+    # Same layout as the scratch directory, rooted at the source
+    source_db = source / Path(REGISTRY_DB_PATH).relative_to(DATA_DIR)
+    source_processed = source / Path(PROCESSED_DIR).relative_to(DATA_DIR)
+    if not source_db.exists():
+        return list(doc_ids)
+
+    src_registry = SQLiteProcessingRegistry(source_db)
+    src_plans = SQLiteLessonPlanStore(source_db)
+    registry = SQLiteProcessingRegistry(Path(REGISTRY_DB_PATH))
+    plans = SQLiteLessonPlanStore(Path(REGISTRY_DB_PATH))
+
+    missing: List[str] = []
+    for doc_id in doc_ids:
+        record = src_registry.get(doc_id)
+        if record is None or not (source_processed / doc_id).is_dir():
+            missing.append(doc_id)
+            continue
+        shutil.copytree(source_processed / doc_id, Path(PROCESSED_DIR) / doc_id, dirs_exist_ok=True)
+        registry.upsert(record)
+        plan = src_plans.load(doc_id)
+        if plan:
+            plans.save(doc_id=doc_id, steps=plan)
+    return missing
+
+
+# ---------------------------------------------------------------------
+# Replay
+# ---------------------------------------------------------------------
+def _pin_state(services, user_id: str, doc_id: str, recorded: dict) -> None:
+    from core.memory.tutor_memory import TutorState
+
+    current = services.memory.get(user_id, doc_id)
+    services.memory.upsert(
+        TutorState(
+            user_id=user_id,
+            doc_id=doc_id,
+            step_index=recorded["step_index"],
+            difficulty=recorded["difficulty"],
+            last_action=recorded["last_action"],
+            mastery_score=recorded["mastery_score"],
+            updated_at_utc=current.updated_at_utc if current else "",
+            version=current.version if current else 0,
+        )
+    )
+
+
+def _llm_counts() -> Tuple[int, int]:
+    from core.llm.provider import list_llm_schedulers
+
+    hits = misses = 0
+    for scheduler in list_llm_schedulers():
+        hits += getattr(scheduler.provider, "hits", 0)
+        misses += getattr(scheduler.provider, "misses", 0)
+    return hits, misses
+
+
+def _run_step(service, record: dict):
+    args = record["args"]
+    if record["op"] == "ask":
+        return service.ask(record["doc_id"], args["question"], top_k=args.get("top_k", 5))
+    if record["op"] == "next_step":
+        return service.next_step(record["user_id"], record["doc_id"])
+    if record["op"] == "submit_answer":
+        return service.submit_answer(
+            record["user_id"], record["doc_id"], args["step_index"], args["question"], args["answer"],
+        )
+    raise ValueError(f"Unknown traced op {record['op']!r}")
+
+
+def _matches(record: dict, result, error: str) -> Optional[bool]:
+    outcome = record.get("outcome") or {}
+    if "error" in outcome or error:
+        return error == outcome.get("error", "")
+    if record["op"] == "next_step" and "action" in outcome:
+        return result.action == outcome["action"] and result.step_index == outcome["step_index"]
+    if record["op"] == "submit_answer" and "score" in outcome:
+        return abs(result.score - outcome["score"]) < 1e-9
+    return None
+
+
+def replay(steps: List[Tuple[str, dict]], pin: bool) -> List[StepTiming]:
+    from core.service.container import build_services
+    from core.service.tutor_service import TutorService
+
+    service = TutorService(build_services())
+    timings: List[StepTiming] = []
+    for step_id, record in steps:
+        if pin and record.get("state") and record.get("user_id"):
+            _pin_state(service.services, record["user_id"], record["doc_id"], record["state"])
+
+        hits_before, misses_before = _llm_counts()
+        error = ""
+        result = None
+        started = time.perf_counter()
+        try:
+            result = _run_step(service, record)
+        except Exception as exc:
+            error = type(exc).__name__
+        elapsed = time.perf_counter() - started
+        hits, misses = _llm_counts()
+
+        timings.append(
+            StepTiming(
+                step_id=step_id,
+                page=record["page"],
+                op=record["op"],
+                user_id=record.get("user_id", ""),
+                doc_id=record["doc_id"],
+                recorded_s=record.get("elapsed_s", 0.0),
+                replay_s=elapsed,
+                llm_hits=hits - hits_before,
+                llm_misses=misses - misses_before,
+                match=_matches(record, result, error),
+                error=error,
+            )
+        )
+    return timings
+
+
+# ---------------------------------------------------------------------
+# Reports
+# ---------------------------------------------------------------------
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def summarize(timings: List[StepTiming]) -> Dict[str, dict]:
+    by_op: Dict[str, List[StepTiming]] = {}
+    for t in timings:
+        by_op.setdefault(t.op, []).append(t)
+    return {
+        op: {
+            "steps": len(ts),
+            "replay_total_s": sum(t.replay_s for t in ts),
+            "replay_p50_ms": _percentile([t.replay_s for t in ts], 0.50) * 1000,
+            "replay_p95_ms": _percentile([t.replay_s for t in ts], 0.95) * 1000,
+            "recorded_total_s": sum(t.recorded_s for t in ts),
+            "errors": sum(1 for t in ts if t.error),
+            "mismatches": sum(1 for t in ts if t.match is False),
+            "llm_hits": sum(t.llm_hits for t in ts),
+            "llm_misses": sum(t.llm_misses for t in ts),
+        }
+        for op, ts in sorted(by_op.items())
+    }
+
+
+def print_summary(summary: Dict[str, dict]) -> None:
+    print(
+        f"\n{'op':<15}{'steps':>7}{'total s':>10}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'recorded s':>12}{'errors':>8}{'mismatch':>10}{'LLM hit/miss':>14}"
+    )
+    for op, s in summary.items():
+        print(
+            f"{op:<15}{s['steps']:>7}{s['replay_total_s']:>10.3f}{s['replay_p50_ms']:>9.1f}"
+            f"{s['replay_p95_ms']:>9.1f}{s['recorded_total_s']:>12.3f}{s['errors']:>8}"
+            f"{s['mismatches']:>10}{s['llm_hits']:>8}/{s['llm_misses']:<5}"
+        )
+
+
+def diff(before_path: Path, after_path: Path, threshold: float, top: int) -> int:
+    """
+    Compares two replay reports; returns the number of ops whose total
+    replay time grew by more than `threshold`.
+    """
+    before = json.loads(before_path.read_text())
+    after = json.loads(after_path.read_text())
+
+    print(f"{'op':<15}{'before s':>10}{'after s':>10}{'change':>9}")
+    regressions = 0
+    for op, b in before["summary"].items():
+        a = after["summary"].get(op)
+        if a is None or not b["replay_total_s"]:
+            continue
+        change = a["replay_total_s"] / b["replay_total_s"] - 1
+        flag = "  <-- slower" if change > threshold else ""
+        regressions += bool(flag)
+        print(f"{op:<15}{b['replay_total_s']:>10.3f}{a['replay_total_s']:>10.3f}{change:>+9.0%}{flag}")
+
+    # Per step, ignoring sub-millisecond noise
+    before_steps = {s["step_id"]: s for s in before["steps"]}
+    deltas = []
+    for s in after["steps"]:
+        b = before_steps.get(s["step_id"])
+        if b is not None and abs(s["replay_s"] - b["replay_s"]) >= 0.001:
+            deltas.append((s["replay_s"] - b["replay_s"], s, b))
+    deltas.sort(key=lambda d: abs(d[0]), reverse=True)
+    if deltas:
+        print(f"\nLargest per-step changes (of {len(before_steps)} steps):")
+        for delta, s, b in deltas[:top]:
+            print(
+                f"  {delta * 1000:>+9.1f} ms  {s['op']:<14} {b['replay_s'] * 1000:8.1f} -> "
+                f"{s['replay_s'] * 1000:8.1f} ms  {s['step_id']}"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("traces", nargs="*", type=Path, help="trace .jsonl files or directories")
+    parser.add_argument("--source-data", type=Path, default=PROJECT_ROOT / "data",
+                        help="data directory holding the traced documents")
+    parser.add_argument("--replay-latency", action="store_true", help="sleep the recorded LLM latencies")
+    parser.add_argument("--no-pin", action="store_true", help="don't restore recorded learner state per step")
+    parser.add_argument("--json", type=Path, help="write the replay report here (input for --diff)")
+    parser.add_argument("--diff", nargs=2, type=Path, metavar=("BEFORE", "AFTER"), help="compare two reports")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown that counts as a regression")
+    parser.add_argument("--top", type=int, default=15, help="per-step changes to list in --diff")
+    args = parser.parse_args()
+
+    if args.diff:
+        if diff(args.diff[0], args.diff[1], args.threshold, args.top):
+            sys.exit(1)
+        return
+    if not args.traces:
+        parser.error("give trace files or directories, or --diff BEFORE AFTER")
+
+    workdir = Path(tempfile.mkdtemp(prefix="tutor-replay-"))
+    # Registered first so it runs last, after the usage and metrics flushes
+    atexit.register(shutil.rmtree, workdir, ignore_errors=True)
+
+    # Set before any core import, so the whole core sees the scratch directory
+    os.environ.update(
+        TUTOR_DATA_DIR=str(workdir),
+        LLM_PROVIDER="replay",
+        LLM_REPLAY_LATENCY="1" if args.replay_latency else "",
+        LLM_REQUESTS_PER_MINUTE="0",
+        LLM_TOKENS_PER_MINUTE="0",
+        SESSION_TRACE="",
+        PROFILING="",
+        METRICS_EXPORT_INTERVAL_S="0",
+    )
+
+    from core.telemetry.session_trace import trace_files
+
+    files = trace_files(",".join(str(p.resolve()) for p in args.traces))
+    os.environ["LLM_REPLAY_TRACES"] = ",".join(str(f) for f in files)
+
+    steps = load_steps(files)
+    if not steps:
+        sys.exit(f"No recorded steps in {len(files)} trace file(s)")
+    doc_ids = sorted({record["doc_id"] for _, record in steps})
+    missing = seed_documents(doc_ids, args.source_data.resolve())
+    if missing:
+        print(f"Not found in {args.source_data} (their steps will fail): {', '.join(missing)}")
+
+    print(f"Replaying {len(steps)} steps from {len(files)} trace file(s) over {len(doc_ids)} document(s)")
+    started = time.perf_counter()
+    timings = replay(steps, pin=not args.no_pin)
+    wall_s = time.perf_counter() - started
+
+    summary = summarize(timings)
+    print_summary(summary)
+    print(f"\nWall {wall_s:.2f}s; median step {statistics.median(t.replay_s for t in timings) * 1000:.1f} ms")
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(
+            json.dumps(
+                {
+                    "traces": [str(f) for f in files],
+                    "replay_latency": args.replay_latency,
+                    "wall_s": wall_s,
+                    "summary": summary,
+                    "steps": [asdict(t) for t in timings],
+                },
+                indent=2,
+            )
+        )
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import itertools
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
+
+from core.memory.knowledge_state import KnowledgeState, SkillParams, SQLiteKnowledgeStore
+
+if TYPE_CHECKING:
+    import numpy as np
+
+ScoreRecord = Tuple[str, str, int, float]   # (user_id, doc_id, step_index, score)
+
+
+@dataclass(frozen=True)
+class BKTParams:
+    p_init: float     # P(known) before the first attempt
+    p_learn: float    # P(unknown -> known) after each attempt
+    p_guess: float    # P(good answer | unknown)
+    p_slip: float     # P(poor answer | known)
+
+
+DEFAULT_PARAMS = BKTParams(p_init=0.3, p_learn=0.15, p_guess=0.2, p_slip=0.1)
+
+
+@lru_cache(maxsize=None)
+def _grid() -> np.ndarray:
+    """
+    Candidate parameters for the fit; guess and slip stay below 0.5 so that
+    a good answer is always evidence for mastery.
+    """
+    import numpy as np
+
+    return np.array(
+        list(
+            itertools.product(
+                (0.1, 0.25, 0.4, 0.6),      # p_init
+                (0.05, 0.1, 0.2, 0.35),     # p_learn
+                (0.1, 0.2, 0.3),            # p_guess
+                (0.05, 0.1, 0.2),           # p_slip
+            )
+        )
+    )
+
+
+def _step(p_known, score, p_learn, p_guess, p_slip):
+    """
+    One BKT step for scalars or arrays. Scores in [0, 1] are soft evidence:
+    0.7 counts as 70% "good answer", 30% "poor answer".
+    Returns (next p_known, likelihood of the observed score).
+    """
+    p_correct = p_known * (1 - p_slip) + (1 - p_known) * p_guess
+    likelihood = score * p_correct + (1 - score) * (1 - p_correct)
+    posterior = p_known * (score * (1 - p_slip) + (1 - score) * p_slip) / likelihood
+    return posterior + (1 - posterior) * p_learn, likelihood
+
+
+def bkt_update(p_known: float, score: float, params: BKTParams) -> float:
+    """
+    O(1) incremental update for a single live submission.
+    """
+    p_next, _ = _step(p_known, score, params.p_learn, params.p_guess, params.p_slip)
+    return float(p_next)
+
+
+def trace(
+    obs: np.ndarray,
+    mask: np.ndarray,
+    p_init,
+    p_learn,
+    p_guess,
+    p_slip,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Runs BKT over many sequences at once.
+
+    `obs` / `mask` are (n_sequences, max_len) padded score matrices. The
+    parameters broadcast against (n_sequences,), so they may be scalars,
+    per-sequence arrays, or (n_candidates, 1) columns to score a whole
+    parameter grid in one pass. Returns (final p_known, log-likelihood).
+    """
+    import numpy as np
+
+    shape = np.broadcast_shapes(np.shape(p_init), obs.shape[:1])
+    p = np.broadcast_to(np.asarray(p_init, dtype=float), shape).copy()
+    loglik = np.zeros(shape)
+
+    for t in range(obs.shape[1]):
+        m = mask[:, t]
+        p_next, likelihood = _step(p, obs[:, t], p_learn, p_guess, p_slip)
+        loglik += np.where(m, np.log(likelihood), 0.0)
+        p = np.where(m, p_next, p)
+
+    return p, loglik
+
+
+@dataclass(frozen=True)
+class KnowledgeTracingReport:
+    attempts: int
+    learners: int
+    skills: int
+    sequences: int
+    seconds: float
+
+
+class KnowledgeTracer:
+    """
+    Bayesian Knowledge Tracing with one skill per (doc_id, step_index).
+
+    - `recompute` fits per-skill parameters by grid search and re-scores
+      every learner from the full quiz history, vectorized with NumPy.
+      Skills with fewer than `min_obs` attempts use the pooled fit.
+    - `update` applies one live submission in O(1); `next_state` computes
+      it without saving, for callers that must persist something else first.
+
+    Only the last `max_history` attempts of a learner on a skill are
+    replayed, which bounds the padded matrices.
+    """
+
+    def __init__(
+        self,
+        store: SQLiteKnowledgeStore,
+        default_params: BKTParams = DEFAULT_PARAMS,
+        min_obs: int = 30,
+        max_history: int = 50,
+        grid_batch: int = 16,
+    ) -> None:
+        self.store = store
+        self.default_params = default_params
+        self.min_obs = min_obs
+        self.max_history = max_history
+        self.grid_batch = grid_batch
+
+    def params_for(self, doc_id: str, step_index: int) -> BKTParams:
+        fitted = self.store.get_params(doc_id, step_index)
+        if fitted is None:
+            return self.default_params
+        return BKTParams(fitted.p_init, fitted.p_learn, fitted.p_guess, fitted.p_slip)
+
+    def prior(self, user_id: str, doc_id: str, step_index: int) -> float:
+        """
+        P(known) before the learner's next attempt on this step.
+        """
+        current = self.store.get_state(user_id, doc_id, step_index)
+        if current is not None:
+            return current.p_known
+        return self.params_for(doc_id, step_index).p_init
+
+    def next_state(self, user_id: str, doc_id: str, step_index: int, score: float) -> KnowledgeState:
+        params = self.params_for(doc_id, step_index)
+        current = self.store.get_state(user_id, doc_id, step_index)
+        p_known = current.p_known if current else params.p_init
+
+        return KnowledgeState(
+            user_id=user_id,
+            doc_id=doc_id,
+            step_index=step_index,
+            p_known=bkt_update(p_known, score, params),
+            n_obs=(current.n_obs if current else 0) + 1,
+            updated_at_utc=datetime.now(timezone.utc).isoformat(),
+        )
+
+    def save(self, state: KnowledgeState) -> None:
+        self.store.save_states_many([state])
+
+    def update(self, user_id: str, doc_id: str, step_index: int, score: float) -> KnowledgeState:
+        state = self.next_state(user_id, doc_id, step_index, score)
+        self.save(state)
+        return state
+
+    # ------------------------------------------------------------------
+    # Batch
+    # ------------------------------------------------------------------
+    def _sequences(self, history: Sequence[ScoreRecord]):
+        """
+        Groups history (ordered by doc, step, user, time) into padded
+        per-(skill, learner) sequences, grouped contiguously by skill.
+        """
+        import numpy as np
+
+        seq_keys: List[Tuple[str, str, int]] = []
+        skill_keys: List[Tuple[str, int]] = []
+        seq_of = np.empty(len(history), dtype=np.int64)
+        skill_of_seq: List[int] = []
+
+        for i, (user_id, doc_id, step_index, _) in enumerate(history):
+            key = (user_id, doc_id, step_index)
+            if not seq_keys or seq_keys[-1] != key:
+                if not skill_keys or skill_keys[-1] != (doc_id, step_index):
+                    skill_keys.append((doc_id, step_index))
+                seq_keys.append(key)
+                skill_of_seq.append(len(skill_keys) - 1)
+            seq_of[i] = len(seq_keys) - 1
+
+        scores = np.clip(np.fromiter((r[3] for r in history), dtype=float, count=len(history)), 0.0, 1.0)
+        lengths = np.bincount(seq_of, minlength=len(seq_keys))
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        pos = np.arange(len(history)) - starts[seq_of]
+
+        # Keep only the most recent attempts, right-aligned to position 0
+        kept = np.minimum(lengths, self.max_history)
+        col = pos - (lengths - kept)[seq_of]
+        keep = col >= 0
+
+        obs = np.zeros((len(seq_keys), int(kept.max())))
+        mask = np.zeros(obs.shape, dtype=bool)
+        obs[seq_of[keep], col[keep]] = scores[keep]
+        mask[seq_of[keep], col[keep]] = True
+
+        return seq_keys, skill_keys, np.array(skill_of_seq, dtype=np.int64), obs, mask, lengths
+
+    def _fit(self, obs: np.ndarray, mask: np.ndarray, skill_of_seq: np.ndarray, n_skills: int) -> np.ndarray:
+        """
+        Returns (n_skills, 4) parameters maximising the log-likelihood.
+        """
+        import numpy as np
+
+        grid = _grid()
+        skill_starts = np.flatnonzero(np.diff(skill_of_seq, prepend=-1))
+        loglik = np.empty((len(grid), n_skills))
+
+        for lo in range(0, len(grid), self.grid_batch):
+            g = grid[lo:lo + self.grid_batch]
+            _, ll = trace(obs, mask, g[:, 0:1], g[:, 1:2], g[:, 2:3], g[:, 3:4])
+            loglik[lo:lo + len(g)] = np.add.reduceat(ll, skill_starts, axis=1)
+
+        best = grid[np.argmax(loglik, axis=0)]
+        pooled = grid[np.argmax(loglik.sum(axis=1))]
+
+        obs_per_skill = np.bincount(skill_of_seq, weights=mask.sum(axis=1), minlength=n_skills)
+        best[obs_per_skill < self.min_obs] = pooled
+        return best
+
+    def recompute(self, history: Sequence[ScoreRecord]) -> KnowledgeTracingReport:
+        """
+        Refits parameters and rewrites every learner's knowledge state.
+        `history` must be ordered by (doc_id, step_index, user_id, time).
+        """
+        import numpy as np
+
+        started = time.perf_counter()
+        if not history:
+            return KnowledgeTracingReport(0, 0, 0, 0, 0.0)
+
+        seq_keys, skill_keys, skill_of_seq, obs, mask, lengths = self._sequences(history)
+        params = self._fit(obs, mask, skill_of_seq, len(skill_keys))
+
+        per_seq = params[skill_of_seq]
+        p_known, _ = trace(obs, mask, per_seq[:, 0], per_seq[:, 1], per_seq[:, 2], per_seq[:, 3])
+
+        now = datetime.now(timezone.utc).isoformat()
+        obs_per_skill = np.bincount(skill_of_seq, weights=lengths, minlength=len(skill_keys))
+        self.store.save_params_many(
+            [
+                SkillParams(
+                    doc_id=doc_id,
+                    step_index=step_index,
+                    p_init=float(p[0]),
+                    p_learn=float(p[1]),
+                    p_guess=float(p[2]),
+                    p_slip=float(p[3]),
+                    n_obs=int(n),
+                    fitted_at_utc=now,
+                )
+                for (doc_id, step_index), p, n in zip(skill_keys, params, obs_per_skill)
+            ]
+        )
+        self.store.save_states_many(
+            [
+                KnowledgeState(
+                    user_id=user_id,
+                    doc_id=doc_id,
+                    step_index=step_index,
+                    p_known=float(p),
+                    n_obs=int(n),
+                    updated_at_utc=now,
+                )
+                for (user_id, doc_id, step_index), p, n in zip(seq_keys, p_known, lengths)
+            ]
+        )
+
+        return KnowledgeTracingReport(
+            attempts=len(history),
+            learners=len({key[0] for key in seq_keys}),
+            skills=len(skill_keys),
+            sequences=len(seq_keys),
+            seconds=time.perf_counter() - started,
+        )
+
+    def mastery(self, user_id: str, doc_id: str) -> Dict[int, float]:
+        return {s.step_index: s.p_known for s in self.store.list_for_doc(user_id, doc_id)}
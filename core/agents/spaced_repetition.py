@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from core.memory.review_schedule import ReviewCard, SQLiteReviewStore
+
+MIN_EASE = 1.3
+INITIAL_EASE = 2.5
+
+
+def sm2_next(
+    user_id: str,
+    doc_id: str,
+    step_index: int,
+    card: ReviewCard | None,
+    score: float,
+    now: datetime,
+) -> ReviewCard:
+    """
+    SM-2 scheduling. The conceptual score (0..1) maps to SM-2 quality 0..5;
+    quality below 3 is a lapse and restarts the interval at one day.
+    """
+    quality = round(max(0.0, min(1.0, score)) * 5)
+    ease = card.ease if card else INITIAL_EASE
+    repetitions = card.repetitions if card else 0
+    interval = card.interval_days if card else 0.0
+
+    if quality < 3:
+        repetitions = 0
+        interval = 1.0
+    else:
+        repetitions += 1
+        if repetitions == 1:
+            interval = 1.0
+        elif repetitions == 2:
+            interval = 6.0
+        else:
+            interval = interval * ease
+
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+    return ReviewCard(
+        user_id=user_id,
+        doc_id=doc_id,
+        step_index=step_index,
+        ease=ease,
+        interval_days=interval,
+        repetitions=repetitions,
+        due_at_utc=(now + timedelta(days=interval)).isoformat(),
+        last_reviewed_at_utc=now.isoformat(),
+    )
+
+
+class ReviewScheduler:
+    """
+    Spaced repetition over lesson steps: every scored quiz schedules the
+    step's next review, and due steps are served most-overdue first.
+    """
+
+    def __init__(self, store: SQLiteReviewStore) -> None:
+        self.store = store
+
+    def record(
+        self,
+        user_id: str,
+        doc_id: str,
+        step_index: int,
+        score: float,
+        now: datetime | None = None,
+    ) -> ReviewCard:
+        now = now or datetime.now(timezone.utc)
+        card = sm2_next(
+            user_id, doc_id, step_index,
+            self.store.get(user_id, doc_id, step_index),
+            score, now,
+        )
+        self.store.upsert(card)
+        return card
+
+    def next_due(
+        self,
+        user_id: str,
+        doc_id: str | None = None,
+        now: datetime | None = None,
+        exclude_step: int | None = None,
+    ) -> Optional[ReviewCard]:
+        """
+        The most overdue card, skipping `exclude_step` of `doc_id` so the step
+        being learned never hides the other due reviews.
+        """
+        now = now or datetime.now(timezone.utc)
+        due = self.store.list_due(
+            user_id, now.isoformat(), doc_id=doc_id, limit=1, exclude_step=exclude_step
+        )
+        return due[0] if due else None
+
+    def count_due(self, user_id: str, now: datetime | None = None) -> int:
+        now = now or datetime.now(timezone.utc)
+        return self.store.count_due(user_id, now.isoformat())
@@ -10,13 +10,17 @@ class TutorAgent:
     No UI, no Streamlit, no DB access here.
     """
 
-    def decide_next_action(self, state: TutorState | None) -> str:
+    def decide_next_action(self, state: TutorState | None, review_due: bool = False) -> str:
         if state is None:
             return "explain"
 
         if state.mastery_score < 0.4:
             return "review"
 
+        # A spaced-repetition review of an earlier step comes before new material
+        if review_due:
+            return "recall"
+
         if state.mastery_score < 0.7:
             return "quiz"
 
@@ -26,8 +30,22 @@ class TutorAgent:
         self,
         state: TutorState,
         score: float,
+        p_known: float | None = None,
+        next_p_known: float | None = None,
     ) -> TutorState:
-        mastery = (state.mastery_score * 0.7) + (score * 0.3)
+        """
+        `p_known` is the traced mastery of the step just answered and
+        `next_p_known` the prior of the following one, used if the learner
+        advances, so a new step never inherits the previous step's mastery.
+        """
+        advance = score >= 0.7
+        # Knowledge tracing, when available, replaces the moving average
+        if advance and next_p_known is not None:
+            mastery = next_p_known
+        elif p_known is not None:
+            mastery = p_known
+        else:
+            mastery = (state.mastery_score * 0.7) + (score * 0.3)
         mastery = max(0.0, min(1.0, mastery))
 
         if mastery > 0.75:
@@ -40,9 +58,10 @@ class TutorAgent:
         return TutorState(
             user_id=state.user_id,
             doc_id=state.doc_id,
-            step_index=state.step_index + (1 if score >= 0.7 else 0),
+            step_index=state.step_index + (1 if advance else 0),
             difficulty=difficulty,
             last_action="quiz",
             mastery_score=mastery,
             updated_at_utc=datetime.now(timezone.utc).isoformat(),
+            version=state.version,
         )
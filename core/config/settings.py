@@ -1,14 +1,45 @@
 from dataclasses import dataclass
+from functools import lru_cache
 import os
-from dotenv import load_dotenv
-
-# Loads variables from .env into environment (local dev)
-load_dotenv()
+from typing import Any, Dict, Tuple
 
 @dataclass(frozen=True)
 class Settings:
     openai_api_key: str
     openai_model: str
+    openai_base_url: str            # empty = official API; point at a local stand-in for tests
+    llm_provider: str               # openai | offline | replay
+    offline_llm_latency_s: float
+    offline_llm_tokens_per_s: float # 0 = unlimited
+    llm_max_concurrency: int
+    llm_timeout_s: float
+    llm_max_retries: int
+    llm_max_connections: int
+    llm_requests_per_minute: float  # 0 = unlimited
+    llm_tokens_per_minute: float    # 0 = unlimited
+    llm_bulk_reserve: float         # share of each bucket bulk jobs may not use
+    pregen_max_concurrency: int
+    pregen_requests_per_s: float
+    pregen_quiz_pool_size: int
+    context_token_budget: int                 # default prompt-context budget
+    context_token_budgets: Dict[str, int]     # per-model overrides
+    syllabus_max_workers: int
+    tutor_state_cache_size: int               # learner states kept in memory per process
+    index_cache_mb: float                     # chunks + BM25 indexes kept in memory per process
+    index_warmup_docs: int                    # most active documents preloaded at start; 0 = off
+    index_warmup_days: float                  # how far back "recent activity" looks
+    api_host: str
+    api_port: int
+    api_workers: int                          # tutor API server processes
+    metrics_export_interval_s: float          # 0 = no histogram export
+    llm_prices: Dict[str, Tuple[float, float]]  # USD per 1M prompt/completion tokens
+    profiling: str                            # "" (off) | cpu | memory | all
+    profiling_interval_s: float               # CPU sampling period
+    profiling_top: int                        # rows per ranked profile section
+    session_trace: bool                       # record session traces under data/traces/
+    llm_replay_traces: str                    # trace files/dirs LLM_PROVIDER=replay answers from
+    llm_replay_latency: bool                  # replay also sleeps each recorded call's latency
+    data_dir: str                             # empty = <project>/data
 
 def _get_env(name: str, default: str | None = None) -> str:
     value = os.getenv(name, default)
@@ -16,7 +47,96 @@ def _get_env(name: str, default: str | None = None) -> str:
         return ""
     return value.strip()
 
-settings = Settings(
-    openai_api_key=_get_env("OPENAI_API_KEY", ""),
-    openai_model=_get_env("OPENAI_MODEL", "gpt-4o-mini"),
-)
+def _get_int(name: str, default: int) -> int:
+    try:
+        return int(_get_env(name, str(default)))
+    except ValueError:
+        return default
+
+def _get_float(name: str, default: float) -> float:
+    try:
+        return float(_get_env(name, str(default)))
+    except ValueError:
+        return default
+
+def _get_bool(name: str, default: bool = False) -> bool:
+    value = _get_env(name, "")
+    if not value:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+def _get_int_map(name: str) -> Dict[str, int]:
+    """Parses "model-a=6000,model-b=12000"."""
+    out: Dict[str, int] = {}
+    for item in _get_env(name, "").split(","):
+        key, _, value = item.partition("=")
+        try:
+            out[key.strip()] = int(value)
+        except ValueError:
+            continue
+    return out
+
+def _get_price_map(name: str) -> Dict[str, Tuple[float, float]]:
+    """Parses "model-a=0.15/0.60,model-b=2.5/10"."""
+    out: Dict[str, Tuple[float, float]] = {}
+    for item in _get_env(name, "").split(","):
+        key, _, value = item.partition("=")
+        prompt, _, completion = value.partition("/")
+        try:
+            out[key.strip()] = (float(prompt), float(completion))
+        except ValueError:
+            continue
+    return out
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """
+    Built on first use, so importing this module stays cheap.
+    """
+    from dotenv import load_dotenv
+
+    # Loads variables from .env into environment (local dev)
+    load_dotenv()
+    return Settings(
+        openai_api_key=_get_env("OPENAI_API_KEY", ""),
+        openai_model=_get_env("OPENAI_MODEL", "gpt-4o-mini"),
+        openai_base_url=_get_env("OPENAI_BASE_URL", ""),
+        llm_provider=_get_env("LLM_PROVIDER", "openai").lower(),
+        offline_llm_latency_s=_get_float("OFFLINE_LLM_LATENCY_S", 0.0),
+        offline_llm_tokens_per_s=_get_float("OFFLINE_LLM_TOKENS_PER_S", 0.0),
+        llm_max_concurrency=_get_int("LLM_MAX_CONCURRENCY", 8),
+        llm_timeout_s=_get_float("LLM_TIMEOUT_S", 60.0),
+        llm_max_retries=_get_int("LLM_MAX_RETRIES", 3),
+        llm_max_connections=_get_int("LLM_MAX_CONNECTIONS", 20),
+        llm_requests_per_minute=_get_float("LLM_REQUESTS_PER_MINUTE", 0),
+        llm_tokens_per_minute=_get_float("LLM_TOKENS_PER_MINUTE", 0),
+        llm_bulk_reserve=_get_float("LLM_BULK_RESERVE", 0.2),
+        pregen_max_concurrency=_get_int("PREGEN_MAX_CONCURRENCY", 4),
+        pregen_requests_per_s=_get_float("PREGEN_REQUESTS_PER_S", 2.0),
+        pregen_quiz_pool_size=_get_int("PREGEN_QUIZ_POOL_SIZE", 3),
+        context_token_budget=_get_int("CONTEXT_TOKEN_BUDGET", 3000),
+        context_token_budgets=_get_int_map("CONTEXT_TOKEN_BUDGETS"),
+        syllabus_max_workers=_get_int("SYLLABUS_MAX_WORKERS", 4),
+        tutor_state_cache_size=_get_int("TUTOR_STATE_CACHE_SIZE", 1024),
+        index_cache_mb=_get_float("INDEX_CACHE_MB", 512.0),
+        index_warmup_docs=_get_int("INDEX_WARMUP_DOCS", 16),
+        index_warmup_days=_get_float("INDEX_WARMUP_DAYS", 7.0),
+        api_host=_get_env("API_HOST", "127.0.0.1"),
+        api_port=_get_int("API_PORT", 8000),
+        api_workers=_get_int("API_WORKERS", 4),
+        metrics_export_interval_s=_get_float("METRICS_EXPORT_INTERVAL_S", 30.0),
+        llm_prices=_get_price_map("LLM_PRICES"),
+        profiling=_get_env("PROFILING", "").lower(),
+        profiling_interval_s=_get_float("PROFILING_INTERVAL_S", 0.005),
+        profiling_top=_get_int("PROFILING_TOP", 30),
+        session_trace=_get_bool("SESSION_TRACE"),
+        llm_replay_traces=_get_env("LLM_REPLAY_TRACES", ""),
+        llm_replay_latency=_get_bool("LLM_REPLAY_LATENCY"),
+        data_dir=_get_env("TUTOR_DATA_DIR", ""),
+    )
+
+def __getattr__(name: str) -> Any:
+    # `from core.config.settings import settings` keeps working, lazily
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
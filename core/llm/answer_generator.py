@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from typing import Iterator, List, Optional, Tuple
 
-from langchain_openai import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage
+from core.llm.context import llm_tags, stream_with_tags
+from core.llm.provider import get_llm_provider
+from core.text.token_budget import BudgetReport, ContextBudgeter
+from core.types.interfaces import ChatMessage, LLMProvider
 
 
 @dataclass(frozen=True)
@@ -13,6 +15,13 @@ class GroundedAnswer:
     citations: List[dict]
 
 
+@dataclass(frozen=True)
+class StreamingAnswer:
+    tokens: Iterator[str]
+    citations: List[dict]
+    context_report: BudgetReport
+
+
 class PDFAnswerGenerator:
     """
     Generates answers strictly from retrieved chunks.
@@ -26,36 +35,52 @@ class PDFAnswerGenerator:
         "'The provided document does not contain enough information to answer this.'\n"
         "Do not add external knowledge."
     )
+    TEMPERATURE = 0.2
 
-    def __init__(self, model: str, api_key: str) -> None:
-        self.llm = ChatOpenAI(
-            model=model,
-            api_key=api_key,
-            temperature=0.2,
-        )
+    def __init__(
+        self,
+        model: str,
+        api_key: str,
+        llm: LLMProvider | None = None,
+    ) -> None:
+        self.llm = llm or get_llm_provider(model=model, api_key=api_key)
+        self.budgeter = ContextBudgeter.for_model(model)
 
-    def answer(self, question: str, chunks: List[dict]) -> GroundedAnswer:
-        context_blocks = []
-        citations = []
-
-        for i, ch in enumerate(chunks, start=1):
-            context_blocks.append(
-                f"[Source {i} | Page {ch['metadata']['page_number']}]\n{ch['text']}"
-            )
-            citations.append(
-                {
-                    "source": i,
-                    "doc_id": ch["metadata"]["doc_id"],
-                    "page": ch["metadata"]["page_number"],
-                    "chunk_index": ch["metadata"]["chunk_index"],
-                }
-            )
+    @staticmethod
+    def citations_for(chunks: List[dict]) -> List[dict]:
+        return [
+            {
+                "source": i,
+                "doc_id": ch["metadata"]["doc_id"],
+                "page": ch["metadata"]["page_number"],
+                "chunk_index": ch["metadata"]["chunk_index"],
+            }
+            for i, ch in enumerate(chunks, start=1)
+        ]
 
+    def fit_context(self, chunks: List[dict]) -> Tuple[List[dict], BudgetReport]:
+        """
+        Keeps the best-scoring chunks (chunk["score"] when present) that fit
+        the model's context token budget.
+        """
+        scores: Optional[List[float]] = None
+        if chunks and all("score" in ch for ch in chunks):
+            scores = [ch["score"] for ch in chunks]
+        return self.budgeter.fit_chunks(chunks, scores=scores)
+
+    def _build_messages(
+        self, question: str, chunks: List[dict]
+    ) -> Tuple[List[ChatMessage], List[dict]]:
+        context_blocks = [
+            f"[Source {i} | Page {ch['metadata']['page_number']}]\n{ch['text']}"
+            for i, ch in enumerate(chunks, start=1)
+        ]
         context_text = "\n\n".join(context_blocks)
 
         messages = [
-            SystemMessage(content=self.SYSTEM_PROMPT),
-            HumanMessage(
+            ChatMessage(role="system", content=self.SYSTEM_PROMPT),
+            ChatMessage(
+                role="user",
                 content=(
                     f"Context:\n{context_text}\n\n"
                     f"Question:\n{question}\n\n"
@@ -64,9 +89,33 @@ class PDFAnswerGenerator:
             ),
         ]
 
-        response = self.llm(messages)
+        return messages, self.citations_for(chunks)
+
+    def answer(self, question: str, chunks: List[dict]) -> GroundedAnswer:
+        chunks, _ = self.fit_context(chunks)
+        messages, citations = self._build_messages(question, chunks)
+
+        with llm_tags(call_site="answer"):
+            response = self.llm.complete(messages, temperature=self.TEMPERATURE).text
 
         return GroundedAnswer(
-            answer=response.content.strip(),
+            answer=response.strip(),
+            citations=citations,
+        )
+
+    def stream_answer(self, question: str, chunks: List[dict]) -> StreamingAnswer:
+        """
+        Like `answer`, but `tokens` yields the answer as it arrives.
+        Citations are known up front from the (budgeted) chunks.
+        """
+        chunks, report = self.fit_context(chunks)
+        messages, citations = self._build_messages(question, chunks)
+
+        return StreamingAnswer(
+            tokens=stream_with_tags(
+                self.llm.stream(messages, temperature=self.TEMPERATURE),
+                call_site="answer",
+            ),
             citations=citations,
+            context_report=report,
         )
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from typing import Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class LLMCallTags:
+    """
+    Request metadata carried implicitly (via a ContextVar) from the page or
+    job that triggers an LLM call down to the provider stack.
+    """
+
+    priority: str = "interactive"   # interactive | bulk
+    tenant: str = "default"         # fair-share key: a user or a document
+    call_site: str = ""             # explain | quiz | evaluate | answer | syllabus
+    user_id: str = ""               # usage attribution; empty when unknown
+    doc_id: str = ""
+
+
+_current: ContextVar[LLMCallTags] = ContextVar("llm_call_tags", default=LLMCallTags())
+
+
+def current_llm_tags() -> LLMCallTags:
+    return _current.get()
+
+
+def bind_llm_tags(**overrides: str) -> None:
+    """
+    Sets tags for the rest of the current context (e.g. a Streamlit script run).
+    """
+    _current.set(replace(_current.get(), **overrides))
+
+
+@contextmanager
+def llm_tags(**overrides: str) -> Iterator[LLMCallTags]:
+    """
+    Sets tags for the duration of the block. Async tasks and `asyncio.run`
+    started inside the block inherit them; new threads do not.
+    """
+    token = _current.set(replace(_current.get(), **overrides))
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
+
+
+def stream_with_tags(stream: Iterator[T], **overrides: str) -> Iterator[T]:
+    """
+    Starts `stream` under the given tags, then passes its items through.
+    Providers read tags when the call is admitted (the first `next`), so the
+    tags never have to stay bound across a `yield` into the caller.
+    """
+    stream = iter(stream)
+    with llm_tags(**overrides):
+        try:
+            first = next(stream)
+        except StopIteration:
+            return
+    yield first
+    yield from stream
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import asyncio
+import queue
+import random
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterator, List, Tuple
+
+from core.config.settings import get_settings
+from core.types.interfaces import ChatMessage, LLMResult
+
+# openai / langchain / httpx are imported on first use: together they are
+# most of a cold page start, and many page runs never call the LLM
+
+_DONE = object()
+
+
+@lru_cache(maxsize=None)
+def _retryable_errors() -> Tuple[type, ...]:
+    import openai
+
+    return (
+        openai.APIConnectionError,   # includes APITimeoutError
+        openai.RateLimitError,
+        openai.InternalServerError,
+        asyncio.TimeoutError,
+    )
+
+
+def _to_langchain(messages: List[ChatMessage]) -> List[Any]:
+    from langchain.schema import AIMessage, HumanMessage, SystemMessage
+
+    classes = {
+        "system": SystemMessage,
+        "user": HumanMessage,
+        "assistant": AIMessage,
+    }
+    return [classes[m.role](content=m.content) for m in messages]
+
+
+@dataclass(frozen=True)
+class GatewayConfig:
+    model: str
+    api_key: str
+    base_url: str = ""
+    max_concurrency: int = 8
+    timeout_s: float = 60.0
+    max_retries: int = 3
+    max_connections: int = 20
+    backoff_base_s: float = 0.5
+    backoff_max_s: float = 8.0
+
+
+@dataclass(frozen=True)
+class _Failure:
+    error: BaseException
+
+
+class LLMGateway:
+    """
+    Process-wide async gateway in front of the chat completion API
+    (the OpenAI implementation of LLMProvider).
+
+    - One pooled keep-alive HTTP client shared by every generator
+    - A semaphore bounding in-flight requests
+    - Retries with full-jitter exponential backoff and per-request timeouts
+
+    All network I/O runs on a private event loop thread, so sync callers
+    (Streamlit pages) and async callers on any loop can share it.
+    """
+
+    def __init__(self, config: GatewayConfig, http_transport: Any = None) -> None:
+        self.config = config
+        self.model = config.model
+        # An httpx transport to send requests through instead of the network (tests)
+        self._http_transport = http_transport
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever,
+            name="llm-gateway",
+            daemon=True,
+        )
+        self._thread.start()
+
+        self._semaphore = asyncio.Semaphore(config.max_concurrency)
+        self._http: Any = None
+        self._models: Dict[float, Any] = {}
+        self._models_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Internals (run on the gateway loop)
+    # ------------------------------------------------------------------
+    def _http_client(self) -> Any:
+        # Caller holds _models_lock
+        if self._http is None:
+            import httpx
+
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.config.max_connections,
+                    max_keepalive_connections=self.config.max_connections,
+                ),
+                timeout=httpx.Timeout(self.config.timeout_s),
+                transport=self._http_transport,
+            )
+        return self._http
+
+    def _chat(self, temperature: float) -> Any:
+        with self._models_lock:
+            llm = self._models.get(temperature)
+            if llm is None:
+                from langchain_openai import ChatOpenAI
+
+                llm = ChatOpenAI(
+                    model=self.config.model,
+                    api_key=self.config.api_key,
+                    base_url=self.config.base_url or None,
+                    temperature=temperature,
+                    http_async_client=self._http_client(),
+                    max_retries=0,  # retries are handled here, with jitter
+                    timeout=self.config.timeout_s,
+                )
+                self._models[temperature] = llm
+            return llm
+
+    def _backoff(self, attempt: int) -> float:
+        cap = min(self.config.backoff_max_s, self.config.backoff_base_s * (2 ** attempt))
+        return random.uniform(0.0, cap)
+
+    async def _acomplete(self, messages: List[ChatMessage], temperature: float) -> LLMResult:
+        llm = self._chat(temperature)
+        lc_messages = _to_langchain(messages)
+
+        for attempt in range(self.config.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    response = await asyncio.wait_for(
+                        llm.ainvoke(lc_messages),
+                        timeout=self.config.timeout_s,
+                    )
+                usage = response.usage_metadata or {}
+                return LLMResult(
+                    text=response.content,
+                    model=self.model,
+                    prompt_tokens=usage.get("input_tokens", 0),
+                    completion_tokens=usage.get("output_tokens", 0),
+                )
+            except _retryable_errors():
+                if attempt >= self.config.max_retries:
+                    raise
+            # Back off outside the semaphore so waiting retries don't hold slots
+            await asyncio.sleep(self._backoff(attempt))
+
+        raise RuntimeError("unreachable")
+
+    async def _astream(
+        self, messages: List[ChatMessage], temperature: float
+    ) -> AsyncIterator[str]:
+        llm = self._chat(temperature)
+        lc_messages = _to_langchain(messages)
+
+        for attempt in range(self.config.max_retries + 1):
+            started = False
+            try:
+                async with self._semaphore:
+                    async for chunk in llm.astream(lc_messages):
+                        if chunk.content:
+                            started = True
+                            yield chunk.content
+                return
+            except _retryable_errors():
+                # Once tokens reached the caller a retry would duplicate text
+                if started or attempt >= self.config.max_retries:
+                    raise
+            await asyncio.sleep(self._backoff(attempt))
+
+    def _on_own_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    async def acomplete(self, messages: List[ChatMessage], temperature: float = 0.0) -> LLMResult:
+        if self._on_own_loop():
+            return await self._acomplete(messages, temperature)
+        future = asyncio.run_coroutine_threadsafe(
+            self._acomplete(messages, temperature), self._loop
+        )
+        return await asyncio.wrap_future(future)
+
+    async def astream(
+        self, messages: List[ChatMessage], temperature: float = 0.0
+    ) -> AsyncIterator[str]:
+        if self._on_own_loop():
+            async for token in self._astream(messages, temperature):
+                yield token
+            return
+
+        caller_loop = asyncio.get_running_loop()
+        tokens: asyncio.Queue = asyncio.Queue()
+
+        async def pump() -> None:
+            try:
+                async for token in self._astream(messages, temperature):
+                    caller_loop.call_soon_threadsafe(tokens.put_nowait, token)
+            except BaseException as e:
+                caller_loop.call_soon_threadsafe(tokens.put_nowait, _Failure(e))
+            finally:
+                caller_loop.call_soon_threadsafe(tokens.put_nowait, _DONE)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        try:
+            while True:
+                item = await tokens.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            future.cancel()
+
+    def complete(self, messages: List[ChatMessage], temperature: float = 0.0) -> LLMResult:
+        future = asyncio.run_coroutine_threadsafe(
+            self._acomplete(messages, temperature), self._loop
+        )
+        return future.result()
+
+    def stream(self, messages: List[ChatMessage], temperature: float = 0.0) -> Iterator[str]:
+        tokens: queue.Queue = queue.Queue()
+
+        async def pump() -> None:
+            try:
+                async for token in self._astream(messages, temperature):
+                    tokens.put(token)
+            except BaseException as e:
+                tokens.put(_Failure(e))
+            finally:
+                tokens.put(_DONE)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        try:
+            while True:
+                item = tokens.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            # Consumer went away (e.g. Streamlit rerun): stop the upstream request
+            future.cancel()
+
+    def close(self) -> None:
+        if self._http is not None:
+            asyncio.run_coroutine_threadsafe(self._http.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+_gateways: Dict[Tuple[str, str, str], LLMGateway] = {}
+_gateways_lock = threading.Lock()
+
+
+def get_llm_gateway(model: str, api_key: str) -> LLMGateway:
+    """
+    Returns the process-wide gateway for (model, api_key, base_url).
+    Pool and concurrency limits come from settings.
+    """
+    settings = get_settings()
+    key = (model, api_key, settings.openai_base_url)
+    with _gateways_lock:
+        gateway = _gateways.get(key)
+        if gateway is None:
+            gateway = LLMGateway(
+                GatewayConfig(
+                    model=model,
+                    api_key=api_key,
+                    base_url=settings.openai_base_url,
+                    max_concurrency=settings.llm_max_concurrency,
+                    timeout_s=settings.llm_timeout_s,
+                    max_retries=settings.llm_max_retries,
+                    max_connections=settings.llm_max_connections,
+                )
+            )
+            _gateways[key] = gateway
+        return gateway
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import Counter
+from typing import AsyncIterator, Iterator, List
+
+from core.text.token_budget import TokenCounter
+from core.types.interfaces import ChatMessage, LLMResult
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z0-9-]{3,}")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+_SOURCE_TAG = re.compile(r"\[Source \d+ \| Page [^\]]*\]\n?")
+# A word with the whitespace around it; whitespace-only text is one piece
+_STREAM_PIECE = re.compile(r"\s*\S+\s*|\s+")
+_SECTION_END = re.compile(r"\n\n(?:[A-Z][A-Za-z ]+:\n|[A-Z][^\n]{0,60}[.!?](?:\n\n|$))")
+_STOPWORDS = {
+    "about", "also", "because", "been", "being", "between", "both", "could",
+    "does", "each", "from", "have", "into", "more", "most", "only", "other",
+    "over", "some", "such", "than", "that", "their", "them", "then", "there",
+    "these", "they", "this", "those", "through", "very", "were", "what",
+    "when", "where", "which", "while", "will", "with", "would", "your",
+}
+
+
+def stream_pieces(text: str) -> List[str]:
+    """
+    Splits a finished response into word-sized stream chunks that join back
+    to exactly `text`, whitespace included.
+    """
+    return _STREAM_PIECE.findall(text)
+
+
+def _section(text: str, label: str) -> str:
+    """
+    Text following "<label>:\\n" up to the next blank-line-separated label
+    or short instruction line ("Evaluate now.").
+    """
+    marker = f"{label}:\n"
+    start = text.find(marker)
+    if start < 0:
+        return ""
+    body = text[start + len(marker):]
+    end = _SECTION_END.search(body)
+    return body[: end.start()] if end else body
+
+
+def _keywords(text: str, n: int) -> List[str]:
+    counts = Counter(
+        w.lower() for w in _WORD.findall(text) if w.lower() not in _STOPWORDS
+    )
+    # Ties broken alphabetically so output never depends on dict ordering
+    return [w for w, _ in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))[:n]]
+
+
+class OfflineLLMProvider:
+    """
+    Deterministic, network-free LLMProvider for load tests, benchmarks and CI.
+
+    The same messages always give the same response. Responses are shaped
+    by the task the system prompt asks for (syllabus JSON, evaluation JSON,
+    quiz question, or an extractive explanation/answer), so the full tutor
+    flow runs end to end. `latency_s` is added before the first token and
+    `tokens_per_s` (0 = unlimited) paces the rest.
+    """
+
+    def __init__(
+        self,
+        model: str = "offline",
+        latency_s: float = 0.0,
+        tokens_per_s: float = 0.0,
+    ) -> None:
+        self.model = model
+        self.latency_s = latency_s
+        self.tokens_per_s = tokens_per_s
+        self.counter = TokenCounter(model)
+
+    # ------------------------------------------------------------------
+    # Response synthesis
+    # ------------------------------------------------------------------
+    def _respond(self, messages: List[ChatMessage]) -> str:
+        system = "\n".join(m.content for m in messages if m.role == "system")
+        prompt = "\n".join(m.content for m in messages if m.role != "system")
+        digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+
+        if '"topics"' in system:
+            return self._syllabus(_section(prompt, "Study material") or prompt)
+        if "score" in system and "feedback" in system:
+            return self._evaluation(
+                _section(prompt, "Context"),
+                _section(prompt, "Student answer"),
+            )
+        if "quiz question" in system:
+            return self._question(_section(prompt, "Context") or prompt, digest)
+        return self._extract(_section(prompt, "Context") or prompt)
+
+    @staticmethod
+    def _syllabus(material: str) -> str:
+        words = _keywords(material, 9)
+        topics = [
+            {
+                "title": words[i].title(),
+                "subtopics": [w.title() for w in words[i + 1:i + 3]] or [words[i].title()],
+            }
+            for i in range(0, len(words), 3)
+        ]
+        return json.dumps({"topics": topics})
+
+    @staticmethod
+    def _evaluation(context: str, answer: str) -> str:
+        answer_words = {w.lower() for w in _WORD.findall(answer)}
+        context_words = {w.lower() for w in _WORD.findall(context)}
+        overlap = len(answer_words & context_words) / len(answer_words) if answer_words else 0.0
+
+        # Snap to the rubric levels the real evaluator is asked to use
+        score = 1.0 if overlap >= 0.75 else 0.7 if overlap >= 0.5 else 0.4 if overlap >= 0.25 else 0.0
+        feedback = f"Offline evaluation: {overlap:.0%} of the answer's key words appear in the material."
+        return json.dumps({"score": score, "feedback": feedback})
+
+    @staticmethod
+    def _question(context: str, digest: int) -> str:
+        words = _keywords(context, 5) or ["this concept"]
+        return f"In your own words, what does the material say about {words[digest % len(words)]}?"
+
+    @staticmethod
+    def _extract(context: str) -> str:
+        context = _SOURCE_TAG.sub("", context)
+        sentences = [s.strip() for s in _SENTENCE.split(context.strip()) if s.strip()]
+        return " ".join(sentences[:3]) or "The provided document does not contain enough information to answer this."
+
+    def _result(self, messages: List[ChatMessage], text: str) -> LLMResult:
+        return LLMResult(
+            text=text,
+            model=self.model,
+            prompt_tokens=sum(self.counter.count(m.content) for m in messages),
+            completion_tokens=self.counter.count(text),
+        )
+
+    def _generation_time(self, text: str) -> float:
+        if self.tokens_per_s <= 0:
+            return self.latency_s
+        return self.latency_s + self.counter.count(text) / self.tokens_per_s
+
+    # ------------------------------------------------------------------
+    # LLMProvider
+    # ------------------------------------------------------------------
+    def complete(self, messages: List[ChatMessage], temperature: float = 0.0) -> LLMResult:
+        text = self._respond(messages)
+        time.sleep(self._generation_time(text))
+        return self._result(messages, text)
+
+    async def acomplete(self, messages: List[ChatMessage], temperature: float = 0.0) -> LLMResult:
+        text = self._respond(messages)
+        await asyncio.sleep(self._generation_time(text))
+        return self._result(messages, text)
+
+    def stream(self, messages: List[ChatMessage], temperature: float = 0.0) -> Iterator[str]:
+        text = self._respond(messages)
+        time.sleep(self.latency_s)
+        for piece in stream_pieces(text):
+            if self.tokens_per_s > 0:
+                time.sleep(self.counter.count(piece) / self.tokens_per_s)
+            yield piece
+
+    async def astream(self, messages: List[ChatMessage], temperature: float = 0.0) -> AsyncIterator[str]:
+        text = self._respond(messages)
+        await asyncio.sleep(self.latency_s)
+        for piece in stream_pieces(text):
+            if self.tokens_per_s > 0:
+                await asyncio.sleep(self.counter.count(piece) / self.tokens_per_s)
+            yield piece
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict, List, Tuple
+
+from core.config.settings import get_settings
+from core.llm.gateway import get_llm_gateway
+from core.llm.offline_provider import OfflineLLMProvider
+from core.llm.recorded_provider import RecordedLLMProvider
+from core.llm.scheduler import LLMScheduler
+from core.telemetry.session_trace import load_recorded_responses, trace_files
+from core.types.interfaces import LLMProvider
+
+_schedulers: Dict[Tuple[str, str, str], LLMScheduler] = {}
+_lock = threading.Lock()
+
+
+def _base_provider(model: str, api_key: str) -> LLMProvider:
+    settings = get_settings()
+    offline = OfflineLLMProvider(
+        model=model,
+        latency_s=settings.offline_llm_latency_s,
+        tokens_per_s=settings.offline_llm_tokens_per_s,
+    )
+    if settings.llm_provider == "offline":
+        return offline
+    if settings.llm_provider == "replay":
+        # Prompts that were never recorded fall back to the offline backend
+        return RecordedLLMProvider(
+            load_recorded_responses(trace_files(settings.llm_replay_traces)),
+            fallback=offline,
+            model=model,
+            replay_latency=settings.llm_replay_latency,
+        )
+    return get_llm_gateway(model=model, api_key=api_key)
+
+
+def get_llm_provider(model: str, api_key: str) -> LLMProvider:
+    """
+    The process-wide provider selected by LLM_PROVIDER ("openai" by default,
+    "offline" for the deterministic local backend, or "replay" to answer
+    from recorded session traces), behind the shared rate-limiting scheduler.
+    """
+    settings = get_settings()
+    key = (settings.llm_provider, model, api_key)
+    with _lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            scheduler = LLMScheduler(
+                _base_provider(model, api_key),
+                requests_per_minute=settings.llm_requests_per_minute,
+                tokens_per_minute=settings.llm_tokens_per_minute,
+                bulk_reserve=settings.llm_bulk_reserve,
+            )
+            _schedulers[key] = scheduler
+        return scheduler
+
+
+def list_llm_schedulers() -> List[LLMScheduler]:
+    """
+    Every scheduler created so far, oldest first. Several can share a model
+    (e.g. different providers or API keys), so they are not keyed by it.
+    """
+    with _lock:
+        return list(_schedulers.values())
@@ -3,8 +3,10 @@ from __future__ import annotations
 import json
 from dataclasses import dataclass
 
-from langchain_openai import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage
+from core.llm.context import llm_tags
+from core.llm.provider import get_llm_provider
+from core.text.token_budget import ContextBudgeter
+from core.types.interfaces import ChatMessage, LLMProvider
 
 
 @dataclass(frozen=True)
@@ -29,13 +31,16 @@ class ConceptualQuizEvaluator:
         "Return JSON with keys: score (0–1), feedback (string).\n"
         "Feedback must explain what is correct and what is missing."
     )
+    TEMPERATURE = 0.0
 
-    def __init__(self, model: str, api_key: str) -> None:
-        self.llm = ChatOpenAI(
-            model=model,
-            api_key=api_key,
-            temperature=0.0,
-        )
+    def __init__(
+        self,
+        model: str,
+        api_key: str,
+        llm: LLMProvider | None = None,
+    ) -> None:
+        self.llm = llm or get_llm_provider(model=model, api_key=api_key)
+        self.budgeter = ContextBudgeter.for_model(model)
 
     def evaluate(
         self,
@@ -43,9 +48,12 @@ class ConceptualQuizEvaluator:
         question: str,
         user_answer: str,
     ) -> EvaluationResult:
+        context, _ = self.budgeter.fit_text(context)
+
         messages = [
-            SystemMessage(content=self.SYSTEM_PROMPT),
-            HumanMessage(
+            ChatMessage(role="system", content=self.SYSTEM_PROMPT),
+            ChatMessage(
+                role="user",
                 content=(
                     f"Context:\n{context}\n\n"
                     f"Question:\n{question}\n\n"
@@ -55,7 +63,8 @@ class ConceptualQuizEvaluator:
             ),
         ]
 
-        response = self.llm(messages).content
+        with llm_tags(call_site="evaluate"):
+            response = self.llm.complete(messages, temperature=self.TEMPERATURE).text
 
         try:
             parsed = json.loads(response)
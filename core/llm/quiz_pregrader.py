@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set
+
+from core.llm.quiz_evaluator import ConceptualQuizEvaluator, EvaluationResult
+from core.memory.quiz_attempts import QuizAttempt
+from core.telemetry.llm_usage import record_llm_cache_hit
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "can", "do", "does",
+    "for", "from", "has", "have", "how", "i", "if", "in", "into", "is", "it",
+    "its", "of", "on", "or", "so", "that", "the", "their", "then", "there",
+    "these", "this", "to", "was", "we", "what", "when", "where", "which", "who",
+    "why", "will", "with", "you", "your",
+}
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def _content_words(text: str) -> List[str]:
+    return [w for w in _words(text) if w not in _STOPWORDS]
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _shingles(words: List[str], n: int) -> Set[tuple]:
+    return {tuple(words[i:i + n]) for i in range(len(words) - n + 1)}
+
+
+@dataclass(frozen=True)
+class PreGradeResult:
+    resolved: bool
+    reason: str                  # resolved: blank | repeat_attempt | restates_question | copied_context
+                                 # escalated: short | low_overlap | ambiguous
+    evaluation: Optional[EvaluationResult]
+    context_overlap: float       # share of answer content words found in the context
+    key_term_coverage: float     # share of the context's key terms used in the answer
+
+
+class QuizPreGrader:
+    """
+    Cheap lexical checks that settle clear-cut quiz answers locally.
+    Anything not clear-cut is marked for escalation to the LLM evaluator.
+
+    Only an answer with no content words at all counts as blank. Answers with
+    fewer than `min_content_words` content words ("gradient descent") can be
+    correct, so apart from an exact repeat they always go to the LLM. So do
+    answers sharing little vocabulary with the lesson: grading is about
+    understanding, not wording, and a correct paraphrase looks just like that.
+    """
+
+    def __init__(
+        self,
+        min_content_words: int = 3,
+        repeat_similarity: float = 0.9,
+        question_copy_ratio: float = 0.8,
+        context_copy_ratio: float = 0.9,
+        copy_shingle_size: int = 6,
+        copied_context_score: float = 0.4,
+        low_overlap: float = 0.1,
+        key_terms: int = 15,
+    ) -> None:
+        self.min_content_words = min_content_words
+        self.repeat_similarity = repeat_similarity
+        self.question_copy_ratio = question_copy_ratio
+        self.context_copy_ratio = context_copy_ratio
+        self.copy_shingle_size = copy_shingle_size
+        self.copied_context_score = copied_context_score
+        self.low_overlap = low_overlap
+        self.key_terms = key_terms
+
+    def _key_terms(self, context: str) -> Set[str]:
+        counts = Counter(w for w in _content_words(context) if len(w) > 3)
+        return {w for w, _ in counts.most_common(self.key_terms)}
+
+    def grade(
+        self,
+        context: str,
+        question: str,
+        user_answer: str,
+        previous_attempts: Sequence[QuizAttempt] = (),
+    ) -> PreGradeResult:
+        answer_words = _content_words(user_answer)
+        answer_set = set(answer_words)
+
+        context_set = set(_content_words(context))
+        key_terms = self._key_terms(context)
+        overlap = len(answer_set & context_set) / len(answer_set) if answer_set else 0.0
+        coverage = len(answer_set & key_terms) / len(key_terms) if key_terms else 0.0
+
+        def resolved(reason: str, score: float, feedback: str) -> PreGradeResult:
+            return PreGradeResult(
+                resolved=True,
+                reason=reason,
+                evaluation=EvaluationResult(score=score, feedback=feedback),
+                context_overlap=overlap,
+                key_term_coverage=coverage,
+            )
+
+        def escalated(reason: str) -> PreGradeResult:
+            return PreGradeResult(
+                resolved=False,
+                reason=reason,
+                evaluation=None,
+                context_overlap=overlap,
+                key_term_coverage=coverage,
+            )
+
+        if not answer_set:
+            return resolved(
+                "blank", 0.0,
+                "The answer is empty or says nothing specific. Try explaining the idea in a sentence or two.",
+            )
+
+        for attempt in previous_attempts:
+            if attempt.question != question:
+                continue
+            if _jaccard(answer_set, set(_content_words(attempt.answer))) >= self.repeat_similarity:
+                return resolved(
+                    "repeat_attempt", attempt.score,
+                    "This is essentially the same answer as your previous attempt.\n\n"
+                    f"Previous feedback: {attempt.feedback}",
+                )
+
+        if len(answer_words) < self.min_content_words:
+            return escalated("short")
+
+        question_set = set(_content_words(question))
+        novel = answer_set - question_set
+        if question_set and len(answer_set & question_set) / len(answer_set) >= self.question_copy_ratio and len(novel) < 3:
+            return resolved(
+                "restates_question", 0.0,
+                "The answer restates the question without answering it.",
+            )
+
+        n = self.copy_shingle_size
+        answer_words_all = _words(user_answer)
+        if len(answer_words_all) >= 2 * n:
+            answer_shingles = _shingles(answer_words_all, n)
+            copied = len(answer_shingles & _shingles(_words(context), n)) / len(answer_shingles)
+            if copied >= self.context_copy_ratio:
+                return resolved(
+                    "copied_context", self.copied_context_score,
+                    "The answer is copied from the lesson material. "
+                    "It may be accurate, but explain it in your own words to show understanding.",
+                )
+
+        if overlap < self.low_overlap and not (answer_set & key_terms):
+            # Off topic or a paraphrase: only the evaluator can tell
+            return escalated("low_overlap")
+
+        return escalated("ambiguous")
+
+
+@dataclass
+class PreGradeStats:
+    total: int = 0
+    escalated: int = 0
+    by_reason: Dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, result: PreGradeResult) -> None:
+        with self._lock:
+            self.total += 1
+            if not result.resolved:
+                self.escalated += 1
+            self.by_reason[result.reason] = self.by_reason.get(result.reason, 0) + 1
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.escalated / self.total if self.total else 0.0
+
+
+# Process-wide counters, shared by every GatedQuizEvaluator
+pregrade_stats = PreGradeStats()
+
+
+class GatedQuizEvaluator:
+    """
+    Runs the local pre-grader first and only calls the LLM evaluator for
+    answers it cannot settle. Same `evaluate` contract as the LLM evaluator.
+    """
+
+    def __init__(
+        self,
+        evaluator: ConceptualQuizEvaluator,
+        pregrader: QuizPreGrader | None = None,
+        stats: PreGradeStats | None = None,
+    ) -> None:
+        self.evaluator = evaluator
+        self.pregrader = pregrader or QuizPreGrader()
+        self.stats = stats or pregrade_stats
+
+    def evaluate(
+        self,
+        context: str,
+        question: str,
+        user_answer: str,
+        previous_attempts: Sequence[QuizAttempt] = (),
+    ) -> EvaluationResult:
+        result = self.pregrader.grade(context, question, user_answer, previous_attempts)
+        self.stats.record(result)
+        logger.info(
+            "Pre-grade: %s (overlap=%.2f, coverage=%.2f, escalation_rate=%.2f)",
+            result.reason, result.context_overlap, result.key_term_coverage,
+            self.stats.escalation_rate,
+        )
+
+        if result.evaluation is not None:
+            record_llm_cache_hit(self.evaluator.llm.model, call_site="evaluate")
+            return result.evaluation
+
+        return self.evaluator.evaluate(
+            context=context,
+            question=question,
+            user_answer=user_answer,
+        )
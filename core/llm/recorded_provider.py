@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Iterator, List, Optional
+
+from core.llm.offline_provider import stream_pieces
+from core.telemetry.session_trace import llm_request_key
+from core.types.interfaces import ChatMessage, LLMProvider, LLMResult
+
+
+class RecordedLLMProvider:
+    """
+    LLMProvider that answers from recorded session traces (LLM_PROVIDER=replay).
+
+    A request whose messages match a recorded one gets the recorded text;
+    repeats of the same request are served in recording order (the last one
+    is reused once they run out). Anything else goes to `fallback` and is
+    counted as a miss. With `replay_latency` the recorded latency is slept
+    too, otherwise responses are immediate.
+    """
+
+    def __init__(
+        self,
+        responses: Dict[str, List[dict]],
+        fallback: LLMProvider,
+        model: str,
+        replay_latency: bool = False,
+    ) -> None:
+        self.model = model
+        self.fallback = fallback
+        self.replay_latency = replay_latency
+        self._responses: Dict[str, Deque[dict]] = {k: deque(v) for k, v in responses.items()}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, messages: List[ChatMessage]) -> Optional[dict]:
+        key = llm_request_key(messages)
+        with self._lock:
+            queue = self._responses.get(key)
+            if not queue:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return queue.popleft() if len(queue) > 1 else queue[0]
+
+    def _delay(self, record: dict) -> float:
+        return record.get("latency_s", 0.0) if self.replay_latency else 0.0
+
+    def _result(self, record: dict) -> LLMResult:
+        return LLMResult(
+            text=record["text"],
+            model=self.model,
+            prompt_tokens=record.get("prompt_tokens", 0),
+            completion_tokens=record.get("completion_tokens", 0),
+        )
+
+    def complete(self, messages: List[ChatMessage], temperature: float = 0.0) -> LLMResult:
+        record = self._lookup(messages)
+        if record is None:
+            return self.fallback.complete(messages, temperature=temperature)
+        time.sleep(self._delay(record))
+        return self._result(record)
+
+    async def acomplete(self, messages: List[ChatMessage], temperature: float = 0.0) -> LLMResult:
+        record = self._lookup(messages)
+        if record is None:
+            return await self.fallback.acomplete(messages, temperature=temperature)
+        await asyncio.sleep(self._delay(record))
+        return self._result(record)
+
+    def stream(self, messages: List[ChatMessage], temperature: float = 0.0) -> Iterator[str]:
+        record = self._lookup(messages)
+        if record is None:
+            yield from self.fallback.stream(messages, temperature=temperature)
+            return
+        time.sleep(self._delay(record))
+        yield from stream_pieces(record["text"])
+
+    async def astream(self, messages: List[ChatMessage], temperature: float = 0.0) -> AsyncIterator[str]:
+        record = self._lookup(messages)
+        if record is None:
+            async for piece in self.fallback.astream(messages, temperature=temperature):
+                yield piece
+            return
+        await asyncio.sleep(self._delay(record))
+        for piece in stream_pieces(record["text"]):
+            yield piece
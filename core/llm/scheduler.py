@@ -0,0 +1,402 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Deque, Dict, Iterator, List
+
+from core.llm.context import LLMCallTags, current_llm_tags
+from core.telemetry.llm_usage import record_llm_call
+from core.telemetry.metrics import get_metrics, span
+from core.telemetry.session_trace import record_llm_response, trace_active
+from core.text.token_budget import TokenCounter
+from core.types.interfaces import ChatMessage, LLMProvider, LLMResult
+
+PRIORITIES = ("interactive", "bulk")   # served strictly in this order
+
+
+class TokenBucket:
+    """
+    Continuous-refill token bucket sized for one minute of capacity.
+    A rate of 0 means unlimited.
+    """
+
+    def __init__(self, per_minute: float) -> None:
+        self.per_minute = per_minute
+        self.capacity = per_minute
+        self._tokens = per_minute
+        self._updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.per_minute <= 0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.per_minute / 60.0)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float, reserve: float = 0.0) -> float:
+        """
+        Seconds until `amount` can be taken while leaving `reserve` in the bucket.
+        """
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        # Requests larger than the bucket can never fit; let them through at full
+        amount = min(amount, self.capacity - reserve)
+        missing = amount + reserve - self._tokens
+        return max(0.0, missing * 60.0 / self.per_minute)
+
+    def take(self, amount: float) -> None:
+        if not self.unlimited:
+            self._tokens -= amount
+
+    def adjust(self, delta: float) -> None:
+        """
+        Corrects an earlier estimate once actual usage is known (may go negative).
+        """
+        if not self.unlimited:
+            self._tokens = min(self.capacity, self._tokens + delta)
+
+
+@dataclass
+class _Ticket:
+    seq: int
+    priority: str
+    tenant: str
+    est_tokens: int
+    enqueued_at: float
+    tags: LLMCallTags
+
+
+class _Claim:
+    """
+    Links a waiter on a worker thread to the task awaiting it, so a cancelled
+    task can pull its ticket out of the queue. Guarded by the scheduler lock.
+    """
+
+    def __init__(self) -> None:
+        self.ticket: _Ticket | None = None
+        self.abandoned = False
+
+
+@dataclass
+class SchedulerMetrics:
+    queue_depth: Dict[str, int]
+    in_flight: int
+    granted: Dict[str, int]
+    avg_wait_s: Dict[str, float]
+    tenants_waiting: Dict[str, int] = field(default_factory=dict)
+
+
+class LLMScheduler:
+    """
+    Sits in front of an LLMProvider and decides who calls it next.
+
+    - Requests-per-minute and tokens-per-minute token buckets
+    - Priority classes: "interactive" always goes before "bulk", and bulk may
+      not drain the buckets below `bulk_reserve` of their capacity
+    - Round-robin fair sharing between tenants (users / documents) within a
+      priority class, so one large batch cannot monopolise the provider
+
+    Priority and tenant come from the current LLMCallTags.
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        bulk_reserve: float = 0.2,
+        expected_completion_tokens: int = 512,
+    ) -> None:
+        self.provider = provider
+        self.model = provider.model
+        self.rpm = TokenBucket(requests_per_minute)
+        self.tpm = TokenBucket(tokens_per_minute)
+        self.bulk_reserve = bulk_reserve
+        self.expected_completion_tokens = expected_completion_tokens
+        self.counter = TokenCounter(provider.model)
+
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._queues: Dict[str, "OrderedDict[str, Deque[_Ticket]]"] = {
+            p: OrderedDict() for p in PRIORITIES
+        }
+        self._in_flight = 0
+        self._granted = {p: 0 for p in PRIORITIES}
+        self._wait_total = {p: 0.0 for p in PRIORITIES}
+
+    # ------------------------------------------------------------------
+    # Queueing
+    # ------------------------------------------------------------------
+    def _head(self) -> _Ticket | None:
+        for priority in PRIORITIES:
+            tenants = self._queues[priority]
+            if tenants:
+                return next(iter(tenants.values()))[0]
+        return None
+
+    def _wait_time(self, ticket: _Ticket, now: float) -> float:
+        reserve = 0.0 if ticket.priority == PRIORITIES[0] else self.bulk_reserve
+        return max(
+            self.rpm.wait_time(1, now, reserve * self.rpm.capacity),
+            self.tpm.wait_time(ticket.est_tokens, now, reserve * self.tpm.capacity),
+        )
+
+    def _acquire(self, est_tokens: int, claim: _Claim | None = None) -> _Ticket | None:
+        tags = current_llm_tags()
+        priority = tags.priority if tags.priority in PRIORITIES else PRIORITIES[0]
+
+        with self._cond:
+            ticket = _Ticket(
+                seq=next(self._seq),
+                priority=priority,
+                tenant=tags.tenant,
+                est_tokens=est_tokens,
+                enqueued_at=time.monotonic(),
+                tags=tags,
+            )
+            self._queues[priority].setdefault(ticket.tenant, deque()).append(ticket)
+
+            while True:
+                if claim is not None and claim.abandoned:
+                    # The awaiting task was cancelled: leave the queue without a grant
+                    tenants = self._queues[priority]
+                    tenants[ticket.tenant].remove(ticket)
+                    if not tenants[ticket.tenant]:
+                        del tenants[ticket.tenant]
+                    self._cond.notify_all()
+                    return None
+                if self._head() is ticket:
+                    now = time.monotonic()
+                    wait = self._wait_time(ticket, now)
+                    if wait <= 0:
+                        break
+                    self._cond.wait(timeout=wait)
+                else:
+                    self._cond.wait()
+
+            tenants = self._queues[priority]
+            queue = tenants.pop(ticket.tenant)
+            queue.popleft()
+            if queue:
+                tenants[ticket.tenant] = queue   # back of the line: round-robin
+
+            self.rpm.take(1)
+            self.tpm.take(est_tokens)
+            self._in_flight += 1
+            self._granted[priority] += 1
+            waited = time.monotonic() - ticket.enqueued_at
+            self._wait_total[priority] += waited
+            if claim is not None:
+                claim.ticket = ticket
+            self._cond.notify_all()
+
+        get_metrics().observe("llm.queue", waited, model=self.model, priority=priority)
+        return ticket
+
+    async def _aacquire(self, est_tokens: int) -> _Ticket:
+        """
+        `_acquire` on a worker thread. If the awaiting task is cancelled, the
+        ticket leaves the queue, or is refunded when it was already granted.
+        """
+        claim = _Claim()
+        try:
+            # to_thread copies the current context, so tags survive the hop
+            ticket = await asyncio.to_thread(self._acquire, est_tokens, claim)
+        except asyncio.CancelledError:
+            with self._cond:
+                claim.abandoned = True
+                if claim.ticket is not None:
+                    self._in_flight -= 1
+                    self.rpm.adjust(1)
+                    self.tpm.adjust(claim.ticket.est_tokens)
+                self._cond.notify_all()
+            raise
+        assert ticket is not None
+        return ticket
+
+    def _release(self, ticket: _Ticket, actual_tokens: int | None) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            if actual_tokens:
+                self.tpm.adjust(ticket.est_tokens - actual_tokens)
+            self._cond.notify_all()
+
+    def _estimate(self, messages: List[ChatMessage]) -> int:
+        return sum(self.counter.count(m.content) for m in messages) + self.expected_completion_tokens
+
+    @staticmethod
+    def _actual(result: LLMResult) -> int | None:
+        total = result.prompt_tokens + result.completion_tokens
+        return total or None
+
+    def _record(
+        self,
+        ticket: _Ticket,
+        messages: List[ChatMessage],
+        result: LLMResult | None,
+        started: float,
+        cancelled: bool = False,
+    ) -> None:
+        # Providers that don't report usage get local token counts
+        prompt_tokens = (result.prompt_tokens if result else 0) or sum(
+            self.counter.count(m.content) for m in messages
+        )
+        completion_tokens = (result.completion_tokens or self.counter.count(result.text)) if result else 0
+        record_llm_call(
+            self.model, ticket.tags, prompt_tokens, completion_tokens, started,
+            ok=result is not None or cancelled, cancelled=cancelled,
+        )
+        if result is not None:
+            record_llm_response(
+                messages, result.text, self.model, prompt_tokens, completion_tokens,
+                time.perf_counter() - started,
+            )
+
+    def _observe_first_token(self, ticket: _Ticket, started: float) -> None:
+        get_metrics().observe(
+            "llm.first_token", time.perf_counter() - started,
+            model=self.model, priority=ticket.priority,
+        )
+
+    def _observe_stream(self, ticket: _Ticket, started: float) -> None:
+        # Includes the time the consumer spends between tokens (e.g. rendering)
+        get_metrics().observe(
+            "llm.call", time.perf_counter() - started,
+            model=self.model, priority=ticket.priority, mode="stream",
+        )
+
+    # ------------------------------------------------------------------
+    # LLMProvider
+    # ------------------------------------------------------------------
+    def complete(self, messages: List[ChatMessage], temperature: float = 0.0) -> LLMResult:
+        ticket = self._acquire(self._estimate(messages))
+        actual = None
+        result = None
+        started = time.perf_counter()
+        try:
+            with span("llm.call", model=self.model, priority=ticket.priority, mode="complete"):
+                result = self.provider.complete(messages, temperature=temperature)
+            actual = self._actual(result)
+            return result
+        finally:
+            self._release(ticket, actual)
+            self._record(ticket, messages, result, started)
+
+    async def acomplete(self, messages: List[ChatMessage], temperature: float = 0.0) -> LLMResult:
+        ticket = await self._aacquire(self._estimate(messages))
+        actual = None
+        result = None
+        cancelled = False
+        started = time.perf_counter()
+        try:
+            with span("llm.call", model=self.model, priority=ticket.priority, mode="complete"):
+                result = await self.provider.acomplete(messages, temperature=temperature)
+            actual = self._actual(result)
+            return result
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            self._release(ticket, actual)
+            self._record(ticket, messages, result, started, cancelled=cancelled)
+
+    def stream(self, messages: List[ChatMessage], temperature: float = 0.0) -> Iterator[str]:
+        prompt_tokens = sum(self.counter.count(m.content) for m in messages)
+        ticket = self._acquire(prompt_tokens + self.expected_completion_tokens)
+        completion_tokens = 0
+        started = time.perf_counter()
+        first = True
+        status = "ok"
+        pieces: List[str] | None = [] if trace_active() else None
+        try:
+            for token in self.provider.stream(messages, temperature=temperature):
+                if first:
+                    self._observe_first_token(ticket, started)
+                    first = False
+                completion_tokens += self.counter.count(token)
+                if pieces is not None:
+                    pieces.append(token)
+                yield token
+        except GeneratorExit:
+            # The consumer stopped reading (e.g. a Streamlit rerun): a partial response
+            status = "cancelled"
+            raise
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            self._finish_stream(ticket, messages, prompt_tokens, completion_tokens, started, status, pieces)
+
+    def _finish_stream(
+        self,
+        ticket: _Ticket,
+        messages: List[ChatMessage],
+        prompt_tokens: int,
+        completion_tokens: int,
+        started: float,
+        status: str,
+        pieces: List[str] | None,
+    ) -> None:
+        self._observe_stream(ticket, started)
+        self._release(ticket, prompt_tokens + completion_tokens)
+        record_llm_call(
+            self.model, ticket.tags, prompt_tokens, completion_tokens, started,
+            ok=status != "error", cancelled=status == "cancelled",
+        )
+        # Only complete responses are replayable
+        if pieces is not None and status == "ok":
+            record_llm_response(
+                messages, "".join(pieces), self.model, prompt_tokens, completion_tokens,
+                time.perf_counter() - started,
+            )
+
+    async def astream(self, messages: List[ChatMessage], temperature: float = 0.0) -> AsyncIterator[str]:
+        prompt_tokens = sum(self.counter.count(m.content) for m in messages)
+        ticket = await self._aacquire(prompt_tokens + self.expected_completion_tokens)
+        completion_tokens = 0
+        started = time.perf_counter()
+        first = True
+        status = "ok"
+        pieces: List[str] | None = [] if trace_active() else None
+        try:
+            async for token in self.provider.astream(messages, temperature=temperature):
+                if first:
+                    self._observe_first_token(ticket, started)
+                    first = False
+                completion_tokens += self.counter.count(token)
+                if pieces is not None:
+                    pieces.append(token)
+                yield token
+        except (GeneratorExit, asyncio.CancelledError):
+            status = "cancelled"
+            raise
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            self._finish_stream(ticket, messages, prompt_tokens, completion_tokens, started, status, pieces)
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+    def metrics(self) -> SchedulerMetrics:
+        with self._cond:
+            return SchedulerMetrics(
+                queue_depth={
+                    p: sum(len(q) for q in self._queues[p].values()) for p in PRIORITIES
+                },
+                in_flight=self._in_flight,
+                granted=dict(self._granted),
+                avg_wait_s={
+                    p: (self._wait_total[p] / self._granted[p]) if self._granted[p] else 0.0
+                    for p in PRIORITIES
+                },
+                tenants_waiting={p: len(self._queues[p]) for p in PRIORITIES},
+            )
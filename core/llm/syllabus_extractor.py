@@ -3,8 +3,9 @@ from __future__ import annotations
 import json
 from typing import List, Dict
 
-from langchain_openai import ChatOpenAI
-from langchain.schema import SystemMessage, HumanMessage
+from core.llm.context import llm_tags
+from core.llm.provider import get_llm_provider
+from core.types.interfaces import ChatMessage, LLMProvider
 
 
 class SyllabusExtractor:
@@ -27,23 +28,50 @@ class SyllabusExtractor:
         "  ]\n"
         "}"
     )
+    TEMPERATURE = 0.1
 
-    def __init__(self, model: str, api_key: str) -> None:
-        self.llm = ChatOpenAI(
-            model=model,
-            api_key=api_key,
-            temperature=0.1,
-        )
+    def __init__(
+        self,
+        model: str,
+        api_key: str,
+        llm: LLMProvider | None = None,
+    ) -> None:
+        self.model = model
+        self.llm = llm or get_llm_provider(model=model, api_key=api_key)
 
-    def extract(self, context: str) -> Dict:
-        messages = [
-            SystemMessage(content=self.SYSTEM_PROMPT),
-            HumanMessage(content=f"Study material:\n{context}"),
+    def _messages(self, context: str) -> List[ChatMessage]:
+        return [
+            ChatMessage(role="system", content=self.SYSTEM_PROMPT),
+            ChatMessage(role="user", content=f"Study material:\n{context}"),
         ]
 
-        response = self.llm(messages).content
-
+    @staticmethod
+    def _parse(response: str) -> Dict:
+        """
+        {"topics": [{"title": ..., "subtopics": [...]}]}; anything else the
+        model returns (invalid JSON, a list, a bare string) counts as empty.
+        """
         try:
-            return json.loads(response)
+            data = json.loads(response)
         except Exception:
             return {"topics": []}
+        if not isinstance(data, dict) or not isinstance(data.get("topics"), list):
+            return {"topics": []}
+
+        topics = []
+        for topic in data["topics"]:
+            if not isinstance(topic, dict):
+                continue
+            subtopics = topic.get("subtopics")
+            topics.append({**topic, "subtopics": subtopics if isinstance(subtopics, list) else []})
+        return {**data, "topics": topics}
+
+    def extract(self, context: str) -> Dict:
+        with llm_tags(call_site="syllabus"):
+            response = self.llm.complete(self._messages(context), temperature=self.TEMPERATURE).text
+        return self._parse(response)
+
+    async def aextract(self, context: str) -> Dict:
+        with llm_tags(call_site="syllabus"):
+            result = await self.llm.acomplete(self._messages(context), temperature=self.TEMPERATURE)
+        return self._parse(result.text)
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.llm.context import llm_tags
+from core.llm.syllabus_extractor import SyllabusExtractor
+from core.storage.syllabus_cache import SQLiteSyllabusSectionCache
+from core.telemetry.llm_usage import record_llm_cache_hit
+from core.text.token_budget import ContextBudgeter
+
+ProgressCallback = Callable[[int, int], None]   # (sections_done, sections_total)
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_TITLE_STOPWORDS = {"a", "an", "and", "the", "of", "to", "in", "on", "for", "intro", "introduction", "overview", "basics"}
+
+
+def _title_key(title: str) -> str:
+    """
+    Dedup key for topic/subtopic titles: case, punctuation, word order and
+    filler words ("Introduction to", "the") don't matter.
+    """
+    words = [w for w in _NON_WORD.sub(" ", title.lower()).split() if w not in _TITLE_STOPWORDS]
+    return " ".join(sorted(words)) or title.strip().lower()
+
+
+def _merge_pair(left: Dict, right: Dict) -> Dict:
+    topics: List[Dict] = []
+    by_key: Dict[str, Tuple[Dict, set]] = {}
+
+    for topic in left.get("topics", []) + right.get("topics", []):
+        title = str(topic.get("title", "")).strip()
+        if not title:
+            continue
+
+        key = _title_key(title)
+        if key not in by_key:
+            merged = {"title": title, "subtopics": []}
+            by_key[key] = (merged, set())
+            topics.append(merged)
+
+        merged, seen = by_key[key]
+        for sub in topic.get("subtopics", []):
+            sub = str(sub).strip()
+            sub_key = _title_key(sub)
+            if sub and sub_key not in seen:
+                seen.add(sub_key)
+                merged["subtopics"].append(sub)
+
+    return {"topics": topics}
+
+
+def merge_syllabi(parts: List[Dict]) -> Dict:
+    """
+    Hierarchical (pairwise, tree-shaped) merge of partial syllabi.
+    Document order is preserved: earlier sections' topics come first.
+    """
+    if not parts:
+        return {"topics": []}
+
+    level = list(parts)
+    while len(level) > 1:
+        level = [
+            _merge_pair(level[i], level[i + 1]) if i + 1 < len(level) else _merge_pair(level[i], {})
+            for i in range(0, len(level), 2)
+        ]
+    return _merge_pair(level[0], {})
+
+
+class MapReduceSyllabusExtractor:
+    """
+    Extracts a syllabus from the whole document instead of its first pages.
+
+    - Map: consecutive chunks are packed into sections that fit the model's
+      context budget; each section is extracted concurrently (bounded).
+    - Reduce: partial syllabi are merged and deduplicated hierarchically.
+
+    Per-section results are cached, so re-runs only redo changed sections.
+    """
+
+    def __init__(
+        self,
+        extractor: SyllabusExtractor,
+        cache: SQLiteSyllabusSectionCache,
+        max_workers: int = 4,
+        section_tokens: int | None = None,
+    ) -> None:
+        self.extractor = extractor
+        self.cache = cache
+        self.max_workers = max_workers
+        self.budgeter = ContextBudgeter.for_model(extractor.model)
+        self.section_tokens = section_tokens or self.budgeter.budget_tokens
+
+    def split_sections(self, chunks: List[dict]) -> List[str]:
+        sections: List[str] = []
+        current: List[str] = []
+        current_tokens = 0
+
+        for ch in chunks:
+            n = self.budgeter.counter.count(ch["text"])
+            if current and current_tokens + n > self.section_tokens:
+                sections.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(ch["text"])
+            current_tokens += n
+
+        if current:
+            sections.append("\n".join(current))
+
+        # A single oversized chunk still has to fit the prompt
+        return [self.budgeter.fit_text(s)[0] for s in sections]
+
+    def _section_hash(self, section: str) -> str:
+        h = hashlib.sha256()
+        for part in (self.extractor.model, self.extractor.SYSTEM_PROMPT, section):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    async def aextract(
+        self,
+        chunks: List[dict],
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Dict:
+        sections = self.split_sections(chunks)
+        total = len(sections)
+        done = 0
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def map_section(section: str) -> Dict:
+            nonlocal done
+            key = self._section_hash(section)
+            partial = self.cache.get(key)
+
+            if partial is None:
+                async with semaphore:
+                    partial = await self.extractor.aextract(section)
+                # Don't cache failed parses; they should be retried next run
+                if partial.get("topics"):
+                    self.cache.put(key, partial)
+            else:
+                record_llm_cache_hit(self.extractor.model, call_site="syllabus")
+
+            done += 1
+            if on_progress is not None:
+                on_progress(done, total)
+            return partial
+
+        # Whole-document extraction is batch work: never ahead of live learners
+        with llm_tags(priority="bulk"):
+            parts = await asyncio.gather(*(map_section(s) for s in sections))
+        return merge_syllabi(list(parts))
+
+    def extract(
+        self,
+        chunks: List[dict],
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Dict:
+        return asyncio.run(self.aextract(chunks, on_progress=on_progress))
@@ -1,39 +1,105 @@
 from __future__ import annotations
 
-from langchain_openai import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage
+from typing import Iterator, List, Sequence
+
+from core.llm.context import llm_tags, stream_with_tags
+from core.llm.provider import get_llm_provider
+from core.types.interfaces import ChatMessage, LLMProvider
 
 
 class TutorContentGenerator:
-    def __init__(self, model: str, api_key: str) -> None:
-        self.llm = ChatOpenAI(
-            model=model,
-            api_key=api_key,
-            temperature=0.3,
-        )
+    TEMPERATURE = 0.3
 
-    def explain(self, context: str, difficulty: str) -> str:
+    def __init__(
+        self,
+        model: str,
+        api_key: str,
+        llm: LLMProvider | None = None,
+    ) -> None:
+        self.llm = llm or get_llm_provider(model=model, api_key=api_key)
+
+    def _explain_messages(self, context: str, difficulty: str) -> List[ChatMessage]:
         system = (
             f"You are a tutor explaining concepts at {difficulty} difficulty.\n"
             "Explain step-by-step using only the provided context.\n"
             "Be clear and concise."
         )
 
-        msg = HumanMessage(
+        msg = ChatMessage(
+            role="user",
             content=f"Context:\n{context}\n\nExplain the next concept."
         )
 
-        return self.llm([SystemMessage(content=system), msg]).content
+        return [ChatMessage(role="system", content=system), msg]
 
-    def quiz(self, context: str, difficulty: str) -> str:
+    def explain(self, context: str, difficulty: str) -> str:
+        with llm_tags(call_site="explain"):
+            return self.llm.complete(
+                self._explain_messages(context, difficulty),
+                temperature=self.TEMPERATURE,
+            ).text
+
+    def stream_explain(self, context: str, difficulty: str) -> Iterator[str]:
+        """
+        Same prompt as `explain`, but yields text tokens as they arrive.
+        """
+        yield from stream_with_tags(
+            self.llm.stream(
+                self._explain_messages(context, difficulty),
+                temperature=self.TEMPERATURE,
+            ),
+            call_site="explain",
+        )
+
+    def _quiz_messages(
+        self,
+        context: str,
+        difficulty: str,
+        avoid: Sequence[str] = (),
+    ) -> List[ChatMessage]:
         system = (
             f"You are a tutor creating a quiz question at {difficulty} difficulty.\n"
             "Ask ONE clear question based only on the context.\n"
             "Do not provide the answer."
         )
 
-        msg = HumanMessage(
-            content=f"Context:\n{context}\n\nCreate a quiz question."
-        )
+        content = f"Context:\n{context}\n\nCreate a quiz question."
+        if avoid:
+            previous = "\n".join(f"- {q}" for q in avoid)
+            content += f"\n\nAsk something different from:\n{previous}"
+
+        return [
+            ChatMessage(role="system", content=system),
+            ChatMessage(role="user", content=content),
+        ]
+
+    def quiz(self, context: str, difficulty: str) -> str:
+        with llm_tags(call_site="quiz"):
+            return self.llm.complete(
+                self._quiz_messages(context, difficulty),
+                temperature=self.TEMPERATURE,
+            ).text
+
+    # ------------------------------------------------------------------
+    # Async variants (bulk pre-generation)
+    # ------------------------------------------------------------------
+    async def aexplain(self, context: str, difficulty: str) -> str:
+        with llm_tags(call_site="explain"):
+            result = await self.llm.acomplete(
+                self._explain_messages(context, difficulty),
+                temperature=self.TEMPERATURE,
+            )
+        return result.text
 
-        return self.llm([SystemMessage(content=system), msg]).content
+    async def aquiz(
+        self,
+        context: str,
+        difficulty: str,
+        avoid: Sequence[str] = (),
+    ) -> str:
+        with llm_tags(call_site="quiz"):
+            result = await self.llm.acomplete(
+                self._quiz_messages(context, difficulty, avoid),
+                temperature=self.TEMPERATURE,
+            )
+        return result.text
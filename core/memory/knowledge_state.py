@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from core.telemetry.sqlite_timing import TimedConnection
+
+
+@dataclass(frozen=True)
+class SkillParams:
+    doc_id: str
+    step_index: int
+    p_init: float
+    p_learn: float
+    p_guess: float
+    p_slip: float
+    n_obs: int
+    fitted_at_utc: str
+
+
+@dataclass(frozen=True)
+class KnowledgeState:
+    user_id: str
+    doc_id: str
+    step_index: int
+    p_known: float         # probability the learner has mastered this step
+    n_obs: int
+    updated_at_utc: str
+
+
+class SQLiteKnowledgeStore:
+    """
+    Knowledge-tracing parameters per lesson step and per-learner mastery.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, factory=TimedConnection)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS knowledge_params (
+                    doc_id TEXT NOT NULL,
+                    step_index INTEGER NOT NULL,
+                    p_init REAL NOT NULL,
+                    p_learn REAL NOT NULL,
+                    p_guess REAL NOT NULL,
+                    p_slip REAL NOT NULL,
+                    n_obs INTEGER NOT NULL,
+                    fitted_at_utc TEXT NOT NULL,
+                    PRIMARY KEY (doc_id, step_index)
+                );
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS knowledge_state (
+                    user_id TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    step_index INTEGER NOT NULL,
+                    p_known REAL NOT NULL,
+                    n_obs INTEGER NOT NULL,
+                    updated_at_utc TEXT NOT NULL,
+                    PRIMARY KEY (user_id, doc_id, step_index)
+                );
+                """
+            )
+            conn.commit()
+
+    def get_params(self, doc_id: str, step_index: int) -> Optional[SkillParams]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM knowledge_params WHERE doc_id = ? AND step_index = ?",
+                (doc_id, step_index),
+            ).fetchone()
+
+        if not row:
+            return None
+
+        return SkillParams(
+            doc_id=row["doc_id"],
+            step_index=row["step_index"],
+            p_init=row["p_init"],
+            p_learn=row["p_learn"],
+            p_guess=row["p_guess"],
+            p_slip=row["p_slip"],
+            n_obs=row["n_obs"],
+            fitted_at_utc=row["fitted_at_utc"],
+        )
+
+    def save_params_many(self, params: List[SkillParams]) -> None:
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO knowledge_params
+                (doc_id, step_index, p_init, p_learn, p_guess, p_slip, n_obs, fitted_at_utc)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(doc_id, step_index) DO UPDATE SET
+                    p_init=excluded.p_init,
+                    p_learn=excluded.p_learn,
+                    p_guess=excluded.p_guess,
+                    p_slip=excluded.p_slip,
+                    n_obs=excluded.n_obs,
+                    fitted_at_utc=excluded.fitted_at_utc;
+                """,
+                [
+                    (p.doc_id, p.step_index, p.p_init, p.p_learn, p.p_guess, p.p_slip, p.n_obs, p.fitted_at_utc)
+                    for p in params
+                ],
+            )
+            conn.commit()
+
+    def get_state(self, user_id: str, doc_id: str, step_index: int) -> Optional[KnowledgeState]:
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT * FROM knowledge_state
+                WHERE user_id = ? AND doc_id = ? AND step_index = ?
+                """,
+                (user_id, doc_id, step_index),
+            ).fetchone()
+
+        return self._to_state(row) if row else None
+
+    def list_for_doc(self, user_id: str, doc_id: str) -> List[KnowledgeState]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT * FROM knowledge_state
+                WHERE user_id = ? AND doc_id = ?
+                ORDER BY step_index
+                """,
+                (user_id, doc_id),
+            ).fetchall()
+
+        return [self._to_state(row) for row in rows]
+
+    def save_states_many(self, states: List[KnowledgeState]) -> None:
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO knowledge_state
+                (user_id, doc_id, step_index, p_known, n_obs, updated_at_utc)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(user_id, doc_id, step_index) DO UPDATE SET
+                    p_known=excluded.p_known,
+                    n_obs=excluded.n_obs,
+                    updated_at_utc=excluded.updated_at_utc;
+                """,
+                [
+                    (s.user_id, s.doc_id, s.step_index, s.p_known, s.n_obs, s.updated_at_utc)
+                    for s in states
+                ],
+            )
+            conn.commit()
+
+    def delete_doc(self, doc_id: str) -> None:
+        """
+        Drops fitted parameters and mastery for every step of the document,
+        e.g. when its lesson plan is replaced and step indexes change meaning.
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM knowledge_params WHERE doc_id = ?", (doc_id,))
+            conn.execute("DELETE FROM knowledge_state WHERE doc_id = ?", (doc_id,))
+            conn.commit()
+
+    @staticmethod
+    def _to_state(row: sqlite3.Row) -> KnowledgeState:
+        return KnowledgeState(
+            user_id=row["user_id"],
+            doc_id=row["doc_id"],
+            step_index=row["step_index"],
+            p_known=row["p_known"],
+            n_obs=row["n_obs"],
+            updated_at_utc=row["updated_at_utc"],
+        )
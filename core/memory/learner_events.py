@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from core.memory.tutor_memory import TutorState
+from core.telemetry.sqlite_timing import TimedConnection
+
+EVENT_KINDS = ("started", "explained", "quizzed", "scored", "advanced")
+
+
+@dataclass(frozen=True)
+class LearnerEvent:
+    user_id: str
+    doc_id: str
+    kind: str                    # one of EVENT_KINDS
+    step_index: int
+    payload: Dict[str, Any]
+    created_at_utc: str
+    seq: int = 0                 # assigned by the log
+
+
+def apply_event(state: Optional[TutorState], event: LearnerEvent) -> Optional[TutorState]:
+    """
+    Reducer: the learner state after `event`. Events carry their resulting
+    values, so replay never re-runs tutor logic.
+    """
+    if event.kind == "started":
+        return TutorState(
+            user_id=event.user_id,
+            doc_id=event.doc_id,
+            step_index=event.step_index,
+            difficulty=event.payload["difficulty"],
+            last_action="explain",
+            mastery_score=event.payload["mastery_score"],
+            updated_at_utc=event.created_at_utc,
+        )
+
+    if state is None:
+        return None
+
+    if event.kind == "explained":
+        return replace(state, last_action=event.payload.get("action", "explain"), updated_at_utc=event.created_at_utc)
+    if event.kind == "quizzed":
+        return replace(state, last_action="quiz", updated_at_utc=event.created_at_utc)
+    if event.kind == "scored":
+        return replace(
+            state,
+            last_action="quiz",
+            difficulty=event.payload["difficulty"],
+            mastery_score=event.payload["mastery_score"],
+            updated_at_utc=event.created_at_utc,
+        )
+    if event.kind == "advanced":
+        return replace(state, step_index=event.payload["to_step"], updated_at_utc=event.created_at_utc)
+
+    return state
+
+
+class SQLiteLearnerEventLog:
+    """
+    Append-only learner event log with periodic state snapshots.
+
+    Current state = latest snapshot + the events appended after it, so
+    reconstruction replays at most `snapshot_every` events. Analytics read
+    incrementally with `stream(after_seq=...)`.
+
+    Learners whose state predates the log have no "started" event: on their
+    first append, `seed_state(user_id, doc_id)` (the stored TutorState) is
+    written as the initial snapshot.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        snapshot_every: int = 50,
+        seed_state: Callable[[str, str], Optional[TutorState]] | None = None,
+    ) -> None:
+        self.db_path = db_path
+        self.snapshot_every = snapshot_every
+        self.seed_state = seed_state
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, factory=TimedConnection)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS learner_events (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    step_index INTEGER NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at_utc TEXT NOT NULL
+                );
+                """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_learner_events_user_doc_seq
+                ON learner_events(user_id, doc_id, seq);
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS learner_snapshots (
+                    user_id TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    state TEXT NOT NULL,
+                    created_at_utc TEXT NOT NULL,
+                    PRIMARY KEY (user_id, doc_id)
+                );
+                """
+            )
+            conn.commit()
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def append(
+        self,
+        user_id: str,
+        doc_id: str,
+        kind: str,
+        step_index: int,
+        payload: Dict[str, Any] | None = None,
+    ) -> int:
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"Unknown learner event kind: {kind}")
+        now = datetime.now(timezone.utc).isoformat()
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT seq FROM learner_snapshots WHERE user_id = ? AND doc_id = ?",
+                (user_id, doc_id),
+            ).fetchone()
+            after_seq = row["seq"] if row else 0
+            if row is None and kind != "started" and self.seed_state is not None:
+                self._seed(conn, user_id, doc_id, now)
+
+            cur = conn.execute(
+                """
+                INSERT INTO learner_events (user_id, doc_id, kind, step_index, payload, created_at_utc)
+                VALUES (?, ?, ?, ?, ?, ?);
+                """,
+                (user_id, doc_id, kind, step_index, json.dumps(payload or {}), now),
+            )
+            seq = cur.lastrowid
+            pending = conn.execute(
+                """
+                SELECT COUNT(*) AS n FROM learner_events
+                WHERE user_id = ? AND doc_id = ? AND seq > ?
+                """,
+                (user_id, doc_id, after_seq),
+            ).fetchone()["n"]
+            conn.commit()
+
+        if pending >= self.snapshot_every:
+            self.snapshot(user_id, doc_id)
+        return seq
+
+    def _seed(self, conn: sqlite3.Connection, user_id: str, doc_id: str, now: str) -> None:
+        """
+        Initial snapshot (seq 0) for a learner with no events yet. The stored
+        state may already include the change being logged; replaying it is
+        harmless, since events carry their resulting values.
+        """
+        logged = conn.execute(
+            "SELECT 1 FROM learner_events WHERE user_id = ? AND doc_id = ? LIMIT 1",
+            (user_id, doc_id),
+        ).fetchone()
+        if logged:
+            return
+        state = self.seed_state(user_id, doc_id)
+        if state is None:
+            return
+        conn.execute(
+            """
+            INSERT INTO learner_snapshots (user_id, doc_id, seq, state, created_at_utc)
+            VALUES (?, ?, 0, ?, ?)
+            ON CONFLICT(user_id, doc_id) DO NOTHING;
+            """,
+            (user_id, doc_id, json.dumps(asdict(state)), now),
+        )
+
+    def record_scored(
+        self,
+        before: TutorState,
+        after: TutorState,
+        score: float,
+        question: str,
+    ) -> None:
+        """
+        Logs a graded quiz and, if the learner moved on, the step change.
+        """
+        self.append(
+            before.user_id, before.doc_id, "scored", before.step_index,
+            {
+                "score": score,
+                "question": question,
+                "difficulty": after.difficulty,
+                "mastery_score": after.mastery_score,
+            },
+        )
+        if after.step_index != before.step_index:
+            self.append(
+                before.user_id, before.doc_id, "advanced", before.step_index,
+                {"to_step": after.step_index},
+            )
+
+    def last_event(self, user_id: str, doc_id: str, kinds: Sequence[str]) -> Optional[LearnerEvent]:
+        """
+        The learner's most recent event of one of `kinds` on this document.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                f"""
+                SELECT * FROM learner_events
+                WHERE user_id = ? AND doc_id = ? AND kind IN ({", ".join("?" for _ in kinds)})
+                ORDER BY seq DESC
+                LIMIT 1
+                """,
+                (user_id, doc_id, *kinds),
+            ).fetchone()
+
+        return self._to_event(row) if row else None
+
+    # ------------------------------------------------------------------
+    # Snapshots + reconstruction
+    # ------------------------------------------------------------------
+    def _snapshot(self, user_id: str, doc_id: str) -> Optional[tuple]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT seq, state FROM learner_snapshots WHERE user_id = ? AND doc_id = ?",
+                (user_id, doc_id),
+            ).fetchone()
+
+        if not row:
+            return None
+        state = json.loads(row["state"])
+        return row["seq"], TutorState(**state) if state else None
+
+    def _events_after(self, user_id: str, doc_id: str, after_seq: int) -> List[LearnerEvent]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT * FROM learner_events
+                WHERE user_id = ? AND doc_id = ? AND seq > ?
+                ORDER BY seq
+                """,
+                (user_id, doc_id, after_seq),
+            ).fetchall()
+
+        return [self._to_event(row) for row in rows]
+
+    def reconstruct(self, user_id: str, doc_id: str) -> Optional[TutorState]:
+        snapshot = self._snapshot(user_id, doc_id)
+        after_seq, state = snapshot if snapshot else (0, None)
+
+        for event in self._events_after(user_id, doc_id, after_seq):
+            state = apply_event(state, event)
+        return state
+
+    def snapshot(self, user_id: str, doc_id: str) -> Optional[TutorState]:
+        snapshot = self._snapshot(user_id, doc_id)
+        after_seq, state = snapshot if snapshot else (0, None)
+
+        events = self._events_after(user_id, doc_id, after_seq)
+        if not events:
+            return state
+        for event in events:
+            state = apply_event(state, event)
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO learner_snapshots (user_id, doc_id, seq, state, created_at_utc)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(user_id, doc_id) DO UPDATE SET
+                    seq=excluded.seq,
+                    state=excluded.state,
+                    created_at_utc=excluded.created_at_utc;
+                """,
+                (
+                    user_id,
+                    doc_id,
+                    events[-1].seq,
+                    json.dumps(asdict(state) if state else None),
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
+            conn.commit()
+        return state
+
+    # ------------------------------------------------------------------
+    # Analytics
+    # ------------------------------------------------------------------
+    def stream(self, after_seq: int = 0, batch_size: int = 1000) -> Iterator[LearnerEvent]:
+        """
+        Every event with seq > after_seq, in order, fetched in batches.
+        Remember the last seq seen and pass it next time to resume.
+        """
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT * FROM learner_events WHERE seq > ? ORDER BY seq LIMIT ?",
+                    (after_seq, batch_size),
+                ).fetchall()
+
+            if not rows:
+                return
+            for row in rows:
+                event = self._to_event(row)
+                after_seq = event.seq
+                yield event
+
+    @staticmethod
+    def _to_event(row: sqlite3.Row) -> LearnerEvent:
+        return LearnerEvent(
+            user_id=row["user_id"],
+            doc_id=row["doc_id"],
+            kind=row["kind"],
+            step_index=row["step_index"],
+            payload=json.loads(row["payload"]),
+            created_at_utc=row["created_at_utc"],
+            seq=row["seq"],
+        )
@@ -3,7 +3,9 @@ from __future__ import annotations
 import sqlite3
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Tuple
+
+from core.telemetry.sqlite_timing import TimedConnection
 
 
 @dataclass(frozen=True)
@@ -25,7 +27,7 @@ class SQLiteQuizAttemptStore:
         self._init_db()
 
     def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=TimedConnection)
         conn.row_factory = sqlite3.Row
         return conn
 
@@ -46,6 +48,19 @@ class SQLiteQuizAttemptStore:
                 );
                 """
             )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_quiz_attempts_user_doc_step
+                ON quiz_attempts(user_id, doc_id, step_index);
+                """
+            )
+            # Per-question statistics for the question bank
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_quiz_attempts_doc_step_question
+                ON quiz_attempts(doc_id, step_index, question);
+                """
+            )
             conn.commit()
 
     def insert(self, attempt: QuizAttempt) -> None:
@@ -81,6 +96,57 @@ class SQLiteQuizAttemptStore:
                 (user_id, doc_id),
             ).fetchall()
 
+        return self._to_attempts(rows)
+
+    def list_for_step(self, user_id: str, doc_id: str, step_index: int) -> List[QuizAttempt]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT user_id, doc_id, step_index, question, answer, score, feedback, created_at_utc
+                FROM quiz_attempts
+                WHERE user_id = ? AND doc_id = ? AND step_index = ?
+                ORDER BY created_at_utc DESC;
+                """,
+                (user_id, doc_id, step_index),
+            ).fetchall()
+
+        return self._to_attempts(rows)
+
+    def score_history(self) -> List[Tuple[str, str, int, float]]:
+        """
+        (user_id, doc_id, step_index, score) for every attempt, grouped by
+        step and learner in time order, for batch knowledge tracing.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT user_id, doc_id, step_index, score
+                FROM quiz_attempts
+                ORDER BY doc_id, step_index, user_id, id;
+                """
+            ).fetchall()
+
+        return [tuple(row) for row in rows]
+
+    def active_docs(self, since_utc: str) -> Dict[str, int]:
+        """
+        Attempts per document made at or after `since_utc`.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT doc_id, COUNT(*) AS attempts
+                FROM quiz_attempts
+                WHERE created_at_utc >= ?
+                GROUP BY doc_id;
+                """,
+                (since_utc,),
+            ).fetchall()
+
+        return {row["doc_id"]: row["attempts"] for row in rows}
+
+    @staticmethod
+    def _to_attempts(rows: List[sqlite3.Row]) -> List[QuizAttempt]:
         return [
             QuizAttempt(
                 user_id=row["user_id"],
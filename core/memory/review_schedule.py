@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from core.telemetry.sqlite_timing import TimedConnection
+
+
+@dataclass(frozen=True)
+class ReviewCard:
+    user_id: str
+    doc_id: str
+    step_index: int
+    ease: float              # SM-2 easiness factor, >= 1.3
+    interval_days: float
+    repetitions: int         # successful reviews in a row
+    due_at_utc: str
+    last_reviewed_at_utc: str
+
+
+class SQLiteReviewStore:
+    """
+    Spaced-repetition cards, one per (user, doc, lesson step).
+    Indexed on due date so "what is due next" never scans attempts.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, factory=TimedConnection)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS review_cards (
+                    user_id TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    step_index INTEGER NOT NULL,
+                    ease REAL NOT NULL,
+                    interval_days REAL NOT NULL,
+                    repetitions INTEGER NOT NULL,
+                    due_at_utc TEXT NOT NULL,
+                    last_reviewed_at_utc TEXT NOT NULL,
+                    PRIMARY KEY (user_id, doc_id, step_index)
+                );
+                """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_review_cards_user_due
+                ON review_cards(user_id, due_at_utc);
+                """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_review_cards_user_doc_due
+                ON review_cards(user_id, doc_id, due_at_utc);
+                """
+            )
+            conn.commit()
+
+    def get(self, user_id: str, doc_id: str, step_index: int) -> Optional[ReviewCard]:
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT * FROM review_cards
+                WHERE user_id = ? AND doc_id = ? AND step_index = ?
+                """,
+                (user_id, doc_id, step_index),
+            ).fetchone()
+
+        return self._to_card(row) if row else None
+
+    def upsert(self, card: ReviewCard) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO review_cards
+                (user_id, doc_id, step_index, ease, interval_days, repetitions, due_at_utc, last_reviewed_at_utc)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(user_id, doc_id, step_index) DO UPDATE SET
+                    ease=excluded.ease,
+                    interval_days=excluded.interval_days,
+                    repetitions=excluded.repetitions,
+                    due_at_utc=excluded.due_at_utc,
+                    last_reviewed_at_utc=excluded.last_reviewed_at_utc;
+                """,
+                (
+                    card.user_id,
+                    card.doc_id,
+                    card.step_index,
+                    card.ease,
+                    card.interval_days,
+                    card.repetitions,
+                    card.due_at_utc,
+                    card.last_reviewed_at_utc,
+                ),
+            )
+            conn.commit()
+
+    def list_due(
+        self,
+        user_id: str,
+        now_utc: str,
+        doc_id: str | None = None,
+        limit: int = 10,
+        exclude_step: int | None = None,
+    ) -> List[ReviewCard]:
+        """
+        Cards due at `now_utc`, most overdue first. Both variants are
+        range scans on an index (ISO timestamps sort chronologically).
+        `exclude_step` skips one step of `doc_id` (the one being learned).
+        """
+        with self._connect() as conn:
+            if doc_id is None:
+                rows = conn.execute(
+                    """
+                    SELECT * FROM review_cards
+                    WHERE user_id = ? AND due_at_utc <= ?
+                    ORDER BY due_at_utc
+                    LIMIT ?
+                    """,
+                    (user_id, now_utc, limit),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    """
+                    SELECT * FROM review_cards
+                    WHERE user_id = ? AND doc_id = ? AND due_at_utc <= ?
+                      AND step_index IS NOT ?
+                    ORDER BY due_at_utc
+                    LIMIT ?
+                    """,
+                    (user_id, doc_id, now_utc, exclude_step, limit),
+                ).fetchall()
+
+        return [self._to_card(row) for row in rows]
+
+    def count_due(self, user_id: str, now_utc: str) -> int:
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT COUNT(*) AS n FROM review_cards
+                WHERE user_id = ? AND due_at_utc <= ?
+                """,
+                (user_id, now_utc),
+            ).fetchone()
+
+        return row["n"]
+
+    def delete_doc(self, doc_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM review_cards WHERE doc_id = ?", (doc_id,))
+            conn.commit()
+
+    @staticmethod
+    def _to_card(row: sqlite3.Row) -> ReviewCard:
+        return ReviewCard(
+            user_id=row["user_id"],
+            doc_id=row["doc_id"],
+            step_index=row["step_index"],
+            ease=row["ease"],
+            interval_days=row["interval_days"],
+            repetitions=row["repetitions"],
+            due_at_utc=row["due_at_utc"],
+            last_reviewed_at_utc=row["last_reviewed_at_utc"],
+        )
@@ -1,9 +1,19 @@
 from __future__ import annotations
 
 import sqlite3
-from dataclasses import dataclass
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
+
+from core.telemetry.sqlite_timing import TimedConnection
+
+
+class StaleStateError(Exception):
+    """
+    Raised when a TutorState is written on top of a newer version.
+    """
 
 
 @dataclass(frozen=True)
@@ -15,11 +25,15 @@ class TutorState:
     last_action: str         # explain | quiz | review
     mastery_score: float     # 0.0 → 1.0
     updated_at_utc: str
+    version: int = 0         # 0 = never saved; bumped on every write
 
 
 class SQLiteTutorMemory:
     """
     Persistent learner memory for the Tutor Agent.
+
+    Writes use optimistic concurrency: a state is only saved if the stored
+    row still has the version it was read at.
     """
 
     def __init__(self, db_path: Path) -> None:
@@ -28,7 +42,7 @@ class SQLiteTutorMemory:
         self._init_db()
 
     def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=TimedConnection)
         conn.row_factory = sqlite3.Row
         return conn
 
@@ -44,10 +58,15 @@ class SQLiteTutorMemory:
                     last_action TEXT NOT NULL,
                     mastery_score REAL NOT NULL,
                     updated_at_utc TEXT NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 1,
                     PRIMARY KEY (user_id, doc_id)
                 );
                 """
             )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(tutor_memory)")}
+            if "version" not in columns:
+                # Existing rows become version 1, i.e. "saved once"
+                conn.execute("ALTER TABLE tutor_memory ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
             conn.commit()
 
     def get(self, user_id: str, doc_id: str) -> Optional[TutorState]:
@@ -71,30 +90,148 @@ class SQLiteTutorMemory:
             last_action=row["last_action"],
             mastery_score=row["mastery_score"],
             updated_at_utc=row["updated_at_utc"],
+            version=row["version"],
+        )
+
+    def upsert(self, state: TutorState) -> TutorState:
+        """
+        Saves `state` and returns it with its new version.
+        Raises StaleStateError if someone else saved in the meantime.
+        """
+        saved = replace(state, version=state.version + 1)
+        values = (
+            state.step_index,
+            state.difficulty,
+            state.last_action,
+            state.mastery_score,
+            state.updated_at_utc,
+            saved.version,
         )
 
-    def upsert(self, state: TutorState) -> None:
         with self._connect() as conn:
-            conn.execute(
+            if state.version == 0:
+                cur = conn.execute(
+                    """
+                    INSERT INTO tutor_memory
+                    (step_index, difficulty, last_action, mastery_score, updated_at_utc, version, user_id, doc_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(user_id, doc_id) DO NOTHING;
+                    """,
+                    values + (state.user_id, state.doc_id),
+                )
+            else:
+                cur = conn.execute(
+                    """
+                    UPDATE tutor_memory SET
+                        step_index = ?,
+                        difficulty = ?,
+                        last_action = ?,
+                        mastery_score = ?,
+                        updated_at_utc = ?,
+                        version = ?
+                    WHERE user_id = ? AND doc_id = ? AND version = ?;
+                    """,
+                    values + (state.user_id, state.doc_id, state.version),
+                )
+            conn.commit()
+
+        if cur.rowcount == 0:
+            raise StaleStateError(
+                f"tutor state for user={state.user_id} doc={state.doc_id} "
+                f"changed since version {state.version}"
+            )
+        return saved
+
+    def active_docs(self, since_utc: str) -> Dict[str, int]:
+        """
+        Learners per document whose state changed at or after `since_utc`.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
                 """
-                INSERT INTO tutor_memory
-                (user_id, doc_id, step_index, difficulty, last_action, mastery_score, updated_at_utc)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(user_id, doc_id) DO UPDATE SET
-                    step_index=excluded.step_index,
-                    difficulty=excluded.difficulty,
-                    last_action=excluded.last_action,
-                    mastery_score=excluded.mastery_score,
-                    updated_at_utc=excluded.updated_at_utc;
+                SELECT doc_id, COUNT(*) AS learners
+                FROM tutor_memory
+                WHERE updated_at_utc >= ?
+                GROUP BY doc_id;
                 """,
-                (
-                    state.user_id,
-                    state.doc_id,
-                    state.step_index,
-                    state.difficulty,
-                    state.last_action,
-                    state.mastery_score,
-                    state.updated_at_utc,
-                ),
-            )
-            conn.commit()
+                (since_utc,),
+            ).fetchall()
+
+        return {row["doc_id"]: row["learners"] for row in rows}
+
+
+class CachedTutorMemory:
+    """
+    Bounded in-process LRU of TutorState in front of SQLiteTutorMemory.
+
+    Reads are served from memory; writes go through to SQLite first and
+    only then update the cache. A stale write evicts the entry so the next
+    read reloads from disk (e.g. after a write from another process).
+    """
+
+    def __init__(self, memory: SQLiteTutorMemory, max_entries: int = 1024) -> None:
+        self.memory = memory
+        self.max_entries = max_entries
+        self._states: "OrderedDict[Tuple[str, str], TutorState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str, doc_id: str) -> Optional[TutorState]:
+        key = (user_id, doc_id)
+        with self._lock:
+            state = self._states.get(key)
+            if state is not None:
+                self._states.move_to_end(key)
+                self.hits += 1
+                return state
+            self.misses += 1
+
+        state = self.memory.get(user_id, doc_id)
+        if state is not None:
+            self._put(state)
+        return state
+
+    def upsert(self, state: TutorState) -> TutorState:
+        try:
+            saved = self.memory.upsert(state)
+        except StaleStateError:
+            self.evict(state.user_id, state.doc_id)
+            raise
+        self._put(saved)
+        return saved
+
+    def evict(self, user_id: str, doc_id: str) -> None:
+        with self._lock:
+            self._states.pop((user_id, doc_id), None)
+
+    def active_docs(self, since_utc: str) -> Dict[str, int]:
+        return self.memory.active_docs(since_utc)
+
+    def _put(self, state: TutorState) -> None:
+        key = (state.user_id, state.doc_id)
+        with self._lock:
+            current = self._states.get(key)
+            # Never replace a newer cached version with an older read
+            if current is not None and current.version > state.version:
+                return
+            self._states[key] = state
+            self._states.move_to_end(key)
+            while len(self._states) > self.max_entries:
+                self._states.popitem(last=False)
+
+
+_cached_memories: Dict[Path, CachedTutorMemory] = {}
+_cached_memories_lock = threading.Lock()
+
+
+def get_tutor_memory(db_path: Path, max_entries: int = 1024) -> CachedTutorMemory:
+    """
+    Process-wide cached tutor memory, shared by every session.
+    """
+    with _cached_memories_lock:
+        memory = _cached_memories.get(db_path)
+        if memory is None:
+            memory = CachedTutorMemory(SQLiteTutorMemory(db_path), max_entries=max_entries)
+            _cached_memories[db_path] = memory
+        return memory
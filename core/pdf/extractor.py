@@ -6,6 +6,9 @@ from typing import List
 
 from pypdf import PdfReader
 
+from core.telemetry.metrics import timed
+from core.telemetry.profiling import profile
+
 
 @dataclass(frozen=True)
 class PageText:
@@ -16,6 +19,8 @@ class PageText:
 class PDFTextExtractor:
     """Extracts text from a PDF page-by-page using pypdf (no OCR)."""
 
+    @timed("pdf.extract")
+    @profile("pdf.extract")
     def extract(self, pdf_path: Path) -> List[PageText]:
         if not pdf_path.exists():
             raise FileNotFoundError(f"PDF not found: {pdf_path}")
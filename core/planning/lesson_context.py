@@ -1,26 +1,42 @@
 from __future__ import annotations
 from typing import List
 
+from core.config.settings import get_settings
 from core.retrieval.bm25_retriever import BM25ChunkRetriever
+from core.telemetry.metrics import timed
+from core.text.token_budget import ContextBudgeter
 
 
 class LessonContextSelector:
     """
-    Selects relevant chunks for a specific lesson step.
+    Selects relevant chunks for a specific lesson step,
+    trimmed to the model's context token budget.
     """
 
+    def __init__(self, budgeter: ContextBudgeter | None = None) -> None:
+        self.budgeter = budgeter or ContextBudgeter.for_model(get_settings().openai_model)
+
+    @timed("context.select")
     def select(
         self,
         chunks: List[dict],
         topic: str,
         subtopic: str,
         top_k: int = 3,
+        retriever: BM25ChunkRetriever | None = None,
     ) -> str:
+        """
+        Pass `retriever` to reuse an index already built over `chunks`.
+        """
         query = f"{topic} {subtopic}"
-        retriever = BM25ChunkRetriever(chunks)
+        retriever = retriever or BM25ChunkRetriever(chunks)
         results = retriever.query(query, top_k=top_k)
 
         if not results:
             return ""
 
-        return "\n".join(r.text for r in results)
+        kept, _ = self.budgeter.fit_chunks(
+            [{"text": r.text} for r in results],
+            scores=[r.score for r in results],
+        )
+        return "\n".join(c["text"] for c in kept)
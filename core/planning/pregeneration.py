@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.llm.context import llm_tags
+from core.llm.tutor_generator import TutorContentGenerator
+from core.planning.lesson_context import LessonContextSelector
+from core.retrieval.bm25_retriever import BM25ChunkRetriever
+from core.storage.lesson_content_store import LessonContentRow, SQLiteLessonContentStore
+from core.storage.lesson_plan_store import LessonPlanRow, SQLiteLessonPlanStore, plan_version
+from core.storage.question_bank import SQLiteQuestionBank
+
+logger = logging.getLogger(__name__)
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+
+@dataclass
+class PregenerationJob:
+    doc_id: str
+    plan_version: str = ""
+    status: str = "pending"      # pending | running | done | failed | superseded
+    total: int = 0
+    done: int = 0
+    failed: int = 0
+    error: str | None = None
+    # Held around every store write, so once `supersede` returns the job writes nothing more
+    _write_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+    # Set while running: cancels the outstanding generation tasks (from any thread)
+    _cancel: Optional[Callable[[], None]] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("pending", "running")
+
+    def supersede(self) -> None:
+        with self._write_lock:
+            if not self.active:
+                return
+            self.status = "superseded"
+            cancel = self._cancel
+        if cancel is not None:
+            cancel()
+
+
+class _RateLimiter:
+    """
+    Spaces request starts to at most `rate` per second.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            start_at = max(now, self._next_at)
+            self._next_at = start_at + self.interval
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+
+
+class LessonPregenerator:
+    """
+    Pre-generates explanations (per difficulty) into the lesson content
+    store and quiz questions into the question bank for every step of a
+    lesson plan, so the Tutor page can serve them without a live LLM call.
+
+    Steps sharing a (topic, subtopic) share the same context, so content is
+    generated once per unit and stored under each of its step indexes.
+
+    Content is only written while the job's plan is still the saved one: a
+    superseded job, or one whose plan was re-saved (by any process, when
+    `plan_store` is given), drops what it generated.
+    """
+
+    def __init__(
+        self,
+        generator: TutorContentGenerator,
+        store: SQLiteLessonContentStore,
+        question_bank: SQLiteQuestionBank,
+        context_selector: LessonContextSelector | None = None,
+        difficulties: Sequence[str] = DIFFICULTIES,
+        quiz_pool_size: int = 3,
+        max_concurrency: int = 4,
+        requests_per_second: float = 2.0,
+        plan_store: SQLiteLessonPlanStore | None = None,
+    ) -> None:
+        self.generator = generator
+        self.plan_store = plan_store
+        self.store = store
+        self.question_bank = question_bank
+        self.context_selector = context_selector or LessonContextSelector()
+        self.difficulties = tuple(difficulties)
+        self.quiz_pool_size = quiz_pool_size
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+
+    async def run(
+        self,
+        doc_id: str,
+        chunks: List[dict],
+        steps: List[LessonPlanRow],
+        job: PregenerationJob | None = None,
+    ) -> PregenerationJob:
+        job = job or PregenerationJob(doc_id=doc_id, plan_version=plan_version(steps))
+        with job._write_lock:
+            if not job.active:
+                return job
+            job.status = "running"
+
+        retriever = BM25ChunkRetriever(chunks)
+        units: Dict[Tuple[str, str], List[int]] = {}
+        for s in steps:
+            units.setdefault((s.topic, s.subtopic), []).append(s.step_index)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        limiter = _RateLimiter(self.requests_per_second)
+
+        tasks = []
+        for (topic, subtopic), step_indexes in units.items():
+            context = self.context_selector.select(
+                chunks=chunks,
+                topic=topic,
+                subtopic=subtopic,
+                retriever=retriever,
+            )
+            if not context.strip():
+                continue
+
+            for difficulty in self.difficulties:
+                for kind in ("explain", "quiz"):
+                    # Resumable: skip anything already stored for this unit
+                    if self._has(doc_id, step_indexes[0], difficulty, kind):
+                        continue
+                    tasks.append(
+                        self._generate(
+                            job, semaphore, limiter,
+                            doc_id, step_indexes, context, difficulty, kind,
+                        )
+                    )
+
+        job.total = len(tasks)
+        running = [asyncio.ensure_future(t) for t in tasks]
+        loop = asyncio.get_running_loop()
+
+        def cancel_all() -> None:
+            for task in running:
+                task.cancel()
+
+        def cancel_from_any_thread() -> None:
+            try:
+                loop.call_soon_threadsafe(cancel_all)
+            except RuntimeError:
+                pass   # loop already closed: nothing left to cancel
+
+        with job._write_lock:
+            job._cancel = cancel_from_any_thread
+            superseded = not job.active
+        if superseded:
+            cancel_all()
+        try:
+            # Cancelled tasks come back as results rather than cancelling the run
+            await asyncio.gather(*running, return_exceptions=True)
+        finally:
+            with job._write_lock:
+                job._cancel = None
+
+        with job._write_lock:
+            if job.active:
+                job.status = "done"
+        return job
+
+    def _is_current(self, job: PregenerationJob) -> bool:
+        # Caller holds job._write_lock
+        if not job.active:
+            return False
+        if self.plan_store is None or not job.plan_version:
+            return True
+        if plan_version(self.plan_store.load(job.doc_id)) == job.plan_version:
+            return True
+        job.status = "superseded"
+        cancel = job._cancel
+        if cancel is not None:
+            cancel()
+        return False
+
+    def _has(self, doc_id: str, step_index: int, difficulty: str, kind: str) -> bool:
+        if kind == "quiz":
+            return self.question_bank.size(doc_id, step_index, difficulty) > 0
+        return self.store.has(doc_id, step_index, difficulty, kind)
+
+    async def _generate(
+        self,
+        job: PregenerationJob,
+        semaphore: asyncio.Semaphore,
+        limiter: _RateLimiter,
+        doc_id: str,
+        step_indexes: List[int],
+        context: str,
+        difficulty: str,
+        kind: str,
+    ) -> None:
+        try:
+            async with semaphore:
+                # A superseded job stops before every wait and every LLM call
+                if kind == "explain":
+                    if not job.active:
+                        return
+                    await limiter.wait()
+                    if not job.active:
+                        return
+                    variants = [await self.generator.aexplain(context, difficulty)]
+                else:
+                    # Sequential within a unit so each question can avoid the previous ones
+                    variants = []
+                    for _ in range(self.quiz_pool_size):
+                        if not job.active:
+                            return
+                        await limiter.wait()
+                        if not job.active:
+                            return
+                        variants.append(
+                            await self.generator.aquiz(context, difficulty, avoid=variants)
+                        )
+
+            with job._write_lock:
+                # The step indexes may belong to a newer plan by now
+                if not self._is_current(job):
+                    return
+                if kind == "quiz":
+                    for step_index in step_indexes:
+                        self.question_bank.add_many(doc_id, step_index, difficulty, variants)
+                else:
+                    now = datetime.now(timezone.utc).isoformat()
+                    self.store.save_many(
+                        [
+                            LessonContentRow(
+                                doc_id=doc_id,
+                                step_index=step_index,
+                                difficulty=difficulty,
+                                kind=kind,
+                                variant=variant,
+                                content=content,
+                                created_at_utc=now,
+                            )
+                            for step_index in step_indexes
+                            for variant, content in enumerate(variants)
+                        ]
+                    )
+                job.done += 1
+        except Exception:
+            logger.exception(
+                "Pre-generation failed for doc=%s steps=%s %s/%s",
+                doc_id, step_indexes, difficulty, kind,
+            )
+            job.failed += 1
+
+
+_jobs: Dict[str, PregenerationJob] = {}
+_jobs_lock = threading.Lock()
+
+
+def start_pregeneration(
+    pregenerator: LessonPregenerator,
+    doc_id: str,
+    chunks: List[dict],
+    steps: List[LessonPlanRow],
+) -> PregenerationJob:
+    """
+    Runs the pre-generation for a document on a background thread.
+    Jobs are identified by (doc_id, plan version): starting one for the same
+    plan returns the running job, starting one for a new plan supersedes it.
+    """
+    version = plan_version(steps)
+    with _jobs_lock:
+        existing = _jobs.get(doc_id)
+        if existing is not None and existing.active:
+            if existing.plan_version == version:
+                return existing
+            existing.supersede()
+
+        job = PregenerationJob(doc_id=doc_id, plan_version=version)
+        _jobs[doc_id] = job
+
+    def _target() -> None:
+        try:
+            # New thread, fresh context: tag the whole job as bulk work for this document
+            with llm_tags(priority="bulk", tenant=doc_id, doc_id=doc_id):
+                asyncio.run(pregenerator.run(doc_id, chunks, steps, job=job))
+        except Exception as e:
+            logger.exception("Pre-generation job failed for doc=%s", doc_id)
+            job.status = "failed"
+            job.error = str(e)
+
+    threading.Thread(
+        target=_target,
+        name=f"pregenerate-{doc_id[:8]}",
+        daemon=True,
+    ).start()
+    return job
+
+
+def supersede_pregeneration(doc_id: str) -> None:
+    """
+    Stops the document's running job from writing anything more. Call before
+    replacing its plan and deleting the content generated for it.
+    """
+    with _jobs_lock:
+        job = _jobs.get(doc_id)
+    if job is not None:
+        job.supersede()
+
+
+def get_pregeneration_job(doc_id: str) -> Optional[PregenerationJob]:
+    with _jobs_lock:
+        return _jobs.get(doc_id)
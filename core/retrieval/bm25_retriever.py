@@ -3,7 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import List, Dict, Any
 
-from rank_bm25 import BM25Okapi
+from core.telemetry.metrics import timed
+from core.telemetry.profiling import profile
 
 
 @dataclass(frozen=True)
@@ -20,7 +21,12 @@ class BM25ChunkRetriever:
     Index can be rebuilt quickly per session.
     """
 
+    @timed("index.build")
+    @profile("index.build")
     def __init__(self, chunks: List[dict]) -> None:
+        # rank_bm25 pulls in numpy; only pay for it when an index is built
+        from rank_bm25 import BM25Okapi
+
         self.chunks = chunks
         self.tokenized_corpus = [
             self._tokenize(c["text"]) for c in chunks
@@ -31,6 +37,7 @@ class BM25ChunkRetriever:
     def _tokenize(text: str) -> List[str]:
         return text.lower().split()
 
+    @timed("retrieval.query")
     def query(self, question: str, top_k: int = 5) -> List[RetrievedChunk]:
         tokens = self._tokenize(question)
         scores = self.bm25.get_scores(tokens)
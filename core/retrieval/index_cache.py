@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from core.config.settings import get_settings
+from core.retrieval.bm25_retriever import BM25ChunkRetriever
+
+
+@dataclass(frozen=True)
+class IndexCacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+    max_bytes: int
+
+
+class _Entry:
+    __slots__ = ("version", "chunks", "retriever", "nbytes")
+
+    def __init__(self, version: str, chunks: List[dict], nbytes: int) -> None:
+        self.version = version
+        self.chunks = chunks
+        self.retriever: Optional[BM25ChunkRetriever] = None
+        self.nbytes = nbytes
+
+
+def estimate_chunks_bytes(chunks: List[dict]) -> int:
+    """
+    Rough resident size of parsed chunks: the dicts, their text and metadata.
+    """
+    total = sys.getsizeof(chunks)
+    for chunk in chunks:
+        total += sys.getsizeof(chunk)
+        for value in chunk.values():
+            total += sys.getsizeof(value)
+            if isinstance(value, dict):
+                total += sum(sys.getsizeof(v) for v in value.values())
+    return total
+
+
+def estimate_index_bytes(retriever: BM25ChunkRetriever) -> int:
+    """
+    Rough size of what a BM25 index adds on top of its chunks: the tokenized
+    corpus, per-chunk term frequencies and the idf table.
+    """
+    total = sys.getsizeof(retriever.tokenized_corpus)
+    for tokens in retriever.tokenized_corpus:
+        total += sys.getsizeof(tokens) + sum(sys.getsizeof(t) for t in tokens)
+    bm25 = retriever.bm25
+    total += sum(sys.getsizeof(freqs) for freqs in bm25.doc_freqs)
+    total += sys.getsizeof(bm25.idf) + sys.getsizeof(bm25.doc_len)
+    return total
+
+
+class DocIndexCache:
+    """
+    Process-wide LRU of parsed chunks and BM25 indexes, bounded by their
+    approximate size in bytes rather than by document count.
+
+    Entries are keyed by doc_id and tagged with the processing version, so a
+    re-processed document simply misses. The index is built on first use, as
+    pages that only list chunks never need it. A document too large for the
+    cap on its own is returned but not kept.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get(self, doc_id: str, version: str) -> Optional[_Entry]:
+        entry = self._entries.get(doc_id)
+        if entry is None or entry.version != version:
+            return None
+        self._entries.move_to_end(doc_id)
+        return entry
+
+    def _evict(self) -> None:
+        # Never evicts the entry just used: it sits at the MRU end
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= old.nbytes
+            self.evictions += 1
+
+    def _drop(self, doc_id: str) -> None:
+        entry = self._entries.pop(doc_id, None)
+        if entry is not None:
+            self._bytes -= entry.nbytes
+
+    def _load_chunks(self, doc_id: str, version: str, load: Callable[[], List[dict]]) -> List[dict]:
+        chunks = load()
+        if not chunks:
+            return chunks
+        nbytes = estimate_chunks_bytes(chunks)
+
+        with self._lock:
+            current = self._get(doc_id, version)
+            if current is not None:
+                # Another thread loaded it meanwhile; share its copy
+                return current.chunks
+            self._drop(doc_id)
+            if nbytes <= self.max_bytes:
+                self._entries[doc_id] = _Entry(version, chunks, nbytes)
+                self._bytes += nbytes
+                self._evict()
+        return chunks
+
+    def chunks(self, doc_id: str, version: str, load: Callable[[], List[dict]]) -> List[dict]:
+        """
+        Cached chunks for this processing version of the document; `load`
+        reads them on a miss. Empty results are not cached. Treat as read-only.
+        """
+        with self._lock:
+            entry = self._get(doc_id, version)
+            if entry is not None:
+                self.hits += 1
+                return entry.chunks
+            self.misses += 1
+        return self._load_chunks(doc_id, version, load)
+
+    def retriever(
+        self, doc_id: str, version: str, load: Callable[[], List[dict]]
+    ) -> Optional[BM25ChunkRetriever]:
+        """
+        Cached BM25 index for the document, or None when it has no chunks.
+        """
+        with self._lock:
+            entry = self._get(doc_id, version)
+            if entry is not None and entry.retriever is not None:
+                self.hits += 1
+                return entry.retriever
+            self.misses += 1
+            chunks = entry.chunks if entry is not None else None
+
+        if chunks is None:
+            chunks = self._load_chunks(doc_id, version, load)
+        if not chunks:
+            return None
+        retriever = BM25ChunkRetriever(chunks)
+        nbytes = estimate_index_bytes(retriever)
+
+        with self._lock:
+            entry = self._get(doc_id, version)
+            if entry is None or entry.chunks is not chunks:
+                return retriever
+            if entry.retriever is not None:
+                return entry.retriever
+            if entry.nbytes + nbytes > self.max_bytes:
+                self._drop(doc_id)
+                return retriever
+            entry.retriever = retriever
+            entry.nbytes += nbytes
+            self._bytes += nbytes
+            self._evict()
+        return retriever
+
+    def invalidate(self, doc_id: str) -> None:
+        with self._lock:
+            self._drop(doc_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def cached_doc_ids(self) -> List[str]:
+        """
+        Least to most recently used.
+        """
+        with self._lock:
+            return list(self._entries)
+
+    def stats(self) -> IndexCacheStats:
+        with self._lock:
+            return IndexCacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                max_bytes=self.max_bytes,
+            )
+
+
+_cache: Optional[DocIndexCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_index_cache() -> DocIndexCache:
+    """
+    The process-wide index cache, sized by INDEX_CACHE_MB.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DocIndexCache(int(get_settings().index_cache_mb * 1024 * 1024))
+        return _cache
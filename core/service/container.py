@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+from core.agents.knowledge_tracing import KnowledgeTracer
+from core.agents.spaced_repetition import ReviewScheduler
+from core.agents.tutor_agent import TutorAgent
+from core.config.settings import get_settings
+from core.llm.answer_generator import PDFAnswerGenerator
+from core.llm.quiz_evaluator import ConceptualQuizEvaluator
+from core.llm.quiz_pregrader import GatedQuizEvaluator
+from core.llm.syllabus_extractor import SyllabusExtractor
+from core.llm.tutor_generator import TutorContentGenerator
+from core.memory.knowledge_state import SQLiteKnowledgeStore
+from core.memory.learner_events import SQLiteLearnerEventLog
+from core.memory.quiz_attempts import SQLiteQuizAttemptStore
+from core.memory.review_schedule import SQLiteReviewStore
+from core.memory.tutor_memory import CachedTutorMemory, get_tutor_memory
+from core.planning.lesson_context import LessonContextSelector
+from core.storage.answer_cache import SQLiteAnswerCache
+from core.storage.chunk_store import JSONLChunkStore
+from core.storage.lesson_content_store import SQLiteLessonContentStore
+from core.storage.lesson_plan_store import SQLiteLessonPlanStore
+from core.storage.processing_registry import SQLiteProcessingRegistry
+from core.storage.question_bank import SQLiteQuestionBank
+from core.storage.registry import SQLiteDocumentRegistry
+from core.storage.syllabus_cache import SQLiteSyllabusSectionCache
+from core.telemetry.export import start_metrics_export
+from core.utils import paths
+
+
+@dataclass(frozen=True)
+class Services:
+    doc_registry: SQLiteDocumentRegistry
+    proc_registry: SQLiteProcessingRegistry
+    chunk_store: JSONLChunkStore
+    plan_store: SQLiteLessonPlanStore
+    content_store: SQLiteLessonContentStore
+    question_bank: SQLiteQuestionBank
+    answer_cache: SQLiteAnswerCache
+    section_cache: SQLiteSyllabusSectionCache
+    attempt_store: SQLiteQuizAttemptStore
+    memory: CachedTutorMemory
+    review_store: SQLiteReviewStore
+    review_scheduler: ReviewScheduler
+    tracer: KnowledgeTracer
+    event_log: SQLiteLearnerEventLog
+    agent: TutorAgent
+    context_selector: LessonContextSelector
+    tutor_generator: TutorContentGenerator
+    answer_generator: PDFAnswerGenerator
+    syllabus_extractor: SyllabusExtractor
+    evaluator: GatedQuizEvaluator
+
+
+def build_services(
+    db_path: Path | None = None,
+    processed_dir: Path | None = None,
+    tutor_state_cache_size: int | None = None,
+) -> Services:
+    """
+    Stores, agents and LLM clients for one process. All of them are safe to
+    share between threads: stores open a connection per call and the LLM
+    clients sit behind the process-wide scheduler.
+
+    Pass tutor_state_cache_size=0 when several processes serve the same
+    learners, so every read of learner state goes to SQLite.
+    """
+    settings = get_settings()
+    if db_path is None:
+        paths.ensure_data_dirs()
+        db_path = Path(paths.REGISTRY_DB_PATH)
+    processed_dir = processed_dir or Path(paths.PROCESSED_DIR)
+    if tutor_state_cache_size is None:
+        tutor_state_cache_size = settings.tutor_state_cache_size
+
+    start_metrics_export(db_path, Path(paths.METRICS_DIR), settings.metrics_export_interval_s)
+    review_store = SQLiteReviewStore(db_path)
+    memory = get_tutor_memory(db_path, max_entries=tutor_state_cache_size)
+
+    return Services(
+        doc_registry=SQLiteDocumentRegistry(db_path),
+        proc_registry=SQLiteProcessingRegistry(db_path),
+        chunk_store=JSONLChunkStore(processed_dir),
+        plan_store=SQLiteLessonPlanStore(db_path),
+        content_store=SQLiteLessonContentStore(db_path),
+        question_bank=SQLiteQuestionBank(db_path),
+        answer_cache=SQLiteAnswerCache(db_path),
+        section_cache=SQLiteSyllabusSectionCache(db_path),
+        attempt_store=SQLiteQuizAttemptStore(db_path),
+        memory=memory,
+        review_store=review_store,
+        review_scheduler=ReviewScheduler(review_store),
+        tracer=KnowledgeTracer(SQLiteKnowledgeStore(db_path)),
+        # Seeds learners that predate the log from their stored (uncached) state
+        event_log=SQLiteLearnerEventLog(db_path, seed_state=memory.memory.get),
+        agent=TutorAgent(),
+        context_selector=LessonContextSelector(),
+        tutor_generator=TutorContentGenerator(
+            model=settings.openai_model,
+            api_key=settings.openai_api_key,
+        ),
+        answer_generator=PDFAnswerGenerator(
+            model=settings.openai_model,
+            api_key=settings.openai_api_key,
+        ),
+        syllabus_extractor=SyllabusExtractor(
+            model=settings.openai_model,
+            api_key=settings.openai_api_key,
+        ),
+        # Clear-cut answers are graded locally; only ambiguous ones reach the LLM
+        evaluator=GatedQuizEvaluator(
+            ConceptualQuizEvaluator(
+                model=settings.openai_model,
+                api_key=settings.openai_api_key,
+            )
+        ),
+    )
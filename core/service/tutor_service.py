@@ -0,0 +1,448 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from core.config.settings import get_settings
+from core.llm.answer_generator import GroundedAnswer
+from core.llm.context import llm_tags
+from core.memory.quiz_attempts import QuizAttempt
+from core.memory.tutor_memory import StaleStateError, TutorState
+from core.retrieval.bm25_retriever import BM25ChunkRetriever
+from core.retrieval.index_cache import DocIndexCache, get_index_cache
+from core.service.container import Services
+from core.storage.lesson_plan_store import LessonPlanRow
+from core.telemetry.llm_usage import record_llm_cache_hit
+from core.telemetry.metrics import timed
+from core.telemetry.profiling import profile
+from core.telemetry.session_trace import learner_state, traced_step, tracing_enabled
+
+
+class NotFoundError(LookupError):
+    """
+    The document, its chunks, its lesson plan or the learner state is missing.
+    """
+
+
+class InvalidStepError(ValueError):
+    """
+    An answer was submitted for a step that is neither current nor due for review.
+    """
+
+
+class InvalidAnswerError(ValueError):
+    """
+    The submitted answer is empty.
+    """
+
+
+@dataclass(frozen=True)
+class AskResult:
+    answer: str
+    citations: List[dict]
+    sources: List[dict]              # retrieved chunks: chunk_id, page, score
+    cached_question: Optional[str]   # set when served from the answer cache
+
+
+@dataclass(frozen=True)
+class TutorStep:
+    doc_id: str
+    step_index: int
+    topic: str
+    subtopic: str
+    action: str                      # explain | review | quiz | recall | done
+    difficulty: str
+    mastery_score: float
+    content: str                     # explanation, or the question to answer
+    reviews_due: int
+
+
+@dataclass(frozen=True)
+class SubmitResult:
+    step_index: int
+    score: float
+    feedback: str
+    recall: bool
+    next_step_index: int
+    difficulty: str
+    mastery_score: float
+    next_review_in_days: float
+
+
+class TutorService:
+    """
+    Headless tutor flow: ask, next step, submit answer. No Streamlit here.
+
+    Every request re-reads learner state, so any number of processes can serve
+    the same learners; concurrent writes are caught by the versioned upsert
+    and surface as StaleStateError. Parsed chunks and BM25 indexes come from
+    the process-wide index cache (bounded by INDEX_CACHE_MB) unless one is given.
+    """
+
+    def __init__(self, services: Services, index_cache: Optional[DocIndexCache] = None) -> None:
+        self.services = services
+        self.index_cache = index_cache or get_index_cache()
+
+    # ------------------------------------------------------------------
+    # Documents
+    # ------------------------------------------------------------------
+    def _doc_index(self, doc_id: str) -> Tuple[List[dict], BM25ChunkRetriever]:
+        record = self.services.proc_registry.get(doc_id)
+        if record is None or record.status != "processed":
+            raise NotFoundError(f"Document {doc_id} has not been processed")
+
+        # Re-processing rewrites processed_at_utc, so stale entries stop matching
+        retriever = self.index_cache.retriever(
+            doc_id, record.processed_at_utc, lambda: self.services.chunk_store.load(doc_id)
+        )
+        if retriever is None:
+            raise NotFoundError(f"No chunks found for document {doc_id}")
+        return retriever.chunks, retriever
+
+    def _lesson_plan(self, doc_id: str) -> List[LessonPlanRow]:
+        steps = self.services.plan_store.load(doc_id)
+        if not steps:
+            raise NotFoundError(f"No lesson plan for document {doc_id}")
+        return steps
+
+    @staticmethod
+    def _trace_session(key: str) -> str:
+        # One trace file per learner (or per document, for questions) per day
+        return f"api-{key}-{datetime.now(timezone.utc):%Y%m%d}"
+
+    def _traced_state(self, user_id: str, doc_id: str) -> dict:
+        return learner_state(self.services.memory.get(user_id, doc_id)) if tracing_enabled() else {}
+
+    # ------------------------------------------------------------------
+    # Ask
+    # ------------------------------------------------------------------
+    @timed("tutor.ask")
+    @profile("tutor.ask")
+    def ask(self, doc_id: str, question: str, top_k: int = 5) -> AskResult:
+        with traced_step(
+            self._trace_session(doc_id), "api", "ask", doc_id=doc_id, question=question, top_k=top_k,
+        ) as trace:
+            result = self._ask(doc_id, question, top_k)
+            trace.finish(cached=result.cached_question is not None, answer_chars=len(result.answer))
+            return result
+
+    def _ask(self, doc_id: str, question: str, top_k: int) -> AskResult:
+        _, retriever = self._doc_index(doc_id)
+        results = retriever.query(question, top_k=top_k)
+        if not results:
+            return AskResult(answer="", citations=[], sources=[], cached_question=None)
+
+        chunks = [
+            {"chunk_id": r.chunk_id, "text": r.text, "score": r.score, "metadata": r.metadata}
+            for r in results
+        ]
+        sources = [
+            {"chunk_id": r.chunk_id, "page": r.metadata["page_number"], "score": r.score}
+            for r in results
+        ]
+        chunk_ids = [r.chunk_id for r in results]
+        model = get_settings().openai_model
+
+        with llm_tags(priority="interactive", tenant=doc_id, doc_id=doc_id):
+            cached = self.services.answer_cache.lookup(
+                doc_id=doc_id, model=model, question=question, chunk_ids=chunk_ids,
+            )
+            if cached is not None:
+                record_llm_cache_hit(model, call_site="answer")
+                return AskResult(
+                    answer=cached.answer.answer,
+                    citations=cached.answer.citations,
+                    sources=sources,
+                    cached_question=cached.question,
+                )
+
+            answer: GroundedAnswer = self.services.answer_generator.answer(
+                question=question, chunks=chunks,
+            )
+        if answer.answer.strip():
+            self.services.answer_cache.put(
+                doc_id=doc_id, model=model, question=question, chunk_ids=chunk_ids, answer=answer,
+            )
+        return AskResult(
+            answer=answer.answer,
+            citations=answer.citations,
+            sources=sources,
+            cached_question=None,
+        )
+
+    # ------------------------------------------------------------------
+    # Tutor
+    # ------------------------------------------------------------------
+    def _load_or_start(self, user_id: str, doc_id: str) -> TutorState:
+        s = self.services
+        state = s.memory.get(user_id, doc_id)
+        if state is not None:
+            return state
+
+        state = TutorState(
+            user_id=user_id,
+            doc_id=doc_id,
+            step_index=0,
+            difficulty="easy",
+            last_action="explain",
+            mastery_score=0.3,
+            updated_at_utc=datetime.now(timezone.utc).isoformat(),
+        )
+        try:
+            state = s.memory.upsert(state)
+            s.event_log.append(
+                user_id, doc_id, "started", state.step_index,
+                {"difficulty": state.difficulty, "mastery_score": state.mastery_score},
+            )
+        except StaleStateError:
+            # Another request created it first
+            state = s.memory.get(user_id, doc_id)
+        return state
+
+    def _context(self, doc_id: str, step: LessonPlanRow) -> str:
+        chunks, retriever = self._doc_index(doc_id)
+        context = self.services.context_selector.select(
+            chunks=chunks,
+            topic=step.topic,
+            subtopic=step.subtopic,
+            retriever=retriever,
+        )
+        if not context.strip():
+            raise NotFoundError(f"No relevant content for lesson step {step.step_index}")
+        return context
+
+    def _review_step(
+        self, user_id: str, doc_id: str, steps: List[LessonPlanRow], current_index: int,
+    ) -> Optional[LessonPlanRow]:
+        # The current step is still being learned, so it is never a review
+        due_card = self.services.review_scheduler.next_due(
+            user_id, doc_id=doc_id, exclude_step=current_index
+        )
+        if due_card is None:
+            return None
+        return next((s for s in steps if s.step_index == due_card.step_index), None)
+
+    def _question(
+        self, user_id: str, doc_id: str, step: LessonPlanRow, difficulty: str, context: str,
+    ) -> str:
+        banked = self.services.question_bank.next_question(
+            user_id, doc_id, step.step_index, difficulty
+        )
+        if banked is not None:
+            record_llm_cache_hit(get_settings().openai_model, call_site="quiz")
+            return banked.question
+        return self.services.tutor_generator.quiz(context=context, difficulty=difficulty)
+
+    def _explanation(self, doc_id: str, step: LessonPlanRow, difficulty: str) -> str:
+        explanation = self.services.content_store.get(
+            doc_id, step.step_index, difficulty, "explain"
+        )
+        if explanation:
+            record_llm_cache_hit(get_settings().openai_model, call_site="explain")
+            return explanation
+        return self.services.tutor_generator.explain(
+            context=self._context(doc_id, step), difficulty=difficulty,
+        )
+
+    @timed("tutor.next_step")
+    @profile("tutor.next_step")
+    def next_step(self, user_id: str, doc_id: str) -> TutorStep:
+        """
+        What the learner should do now. Quiz and recall steps return the
+        question; the client sends it back with the answer.
+        """
+        with traced_step(
+            self._trace_session(user_id), "api", "next_step",
+            user_id=user_id, doc_id=doc_id, state=self._traced_state(user_id, doc_id),
+        ) as trace:
+            step = self._next_step(user_id, doc_id)
+            trace.finish(action=step.action, step_index=step.step_index, content_chars=len(step.content))
+            return step
+
+    def _next_step(self, user_id: str, doc_id: str) -> TutorStep:
+        s = self.services
+        steps = self._lesson_plan(doc_id)
+        state = self._load_or_start(user_id, doc_id)
+        reviews_due = s.review_scheduler.count_due(user_id)
+
+        current = next((row for row in steps if row.step_index == state.step_index), None)
+        if current is None:
+            return TutorStep(
+                doc_id=doc_id,
+                step_index=state.step_index,
+                topic="",
+                subtopic="",
+                action="done",
+                difficulty=state.difficulty,
+                mastery_score=state.mastery_score,
+                content="",
+                reviews_due=reviews_due,
+            )
+
+        review_step = self._review_step(user_id, doc_id, steps, current.step_index)
+        action = s.agent.decide_next_action(state, review_due=review_step is not None)
+        step = review_step if action == "recall" else current
+
+        with llm_tags(priority="interactive", tenant=user_id, user_id=user_id, doc_id=doc_id):
+            if action in ("explain", "review"):
+                difficulty = "easy" if action == "review" else state.difficulty
+                content = self._explanation(doc_id, step, difficulty)
+                s.event_log.append(
+                    user_id, doc_id, "explained", step.step_index,
+                    {"action": action, "difficulty": state.difficulty},
+                )
+            else:
+                content = self._question(
+                    user_id, doc_id, step, state.difficulty, self._context(doc_id, step),
+                )
+                payload = {"question": content, "difficulty": state.difficulty}
+                if action == "recall":
+                    payload["recall"] = True
+                s.event_log.append(user_id, doc_id, "quizzed", step.step_index, payload)
+
+        return TutorStep(
+            doc_id=doc_id,
+            step_index=step.step_index,
+            topic=step.topic,
+            subtopic=step.subtopic,
+            action=action,
+            difficulty=state.difficulty,
+            mastery_score=state.mastery_score,
+            content=content,
+            reviews_due=reviews_due,
+        )
+
+    @timed("tutor.submit_answer")
+    @profile("tutor.submit_answer")
+    def submit_answer(
+        self,
+        user_id: str,
+        doc_id: str,
+        step_index: int,
+        question: str,
+        answer: str,
+    ) -> SubmitResult:
+        """
+        Grades an answer to the question last served by `next_step`, which
+        must be the current step's quiz or a due review. Raises
+        StaleStateError if the learner's state moved on meanwhile; nothing
+        is recorded in that case, so the client can simply retry.
+        """
+        with traced_step(
+            self._trace_session(user_id), "api", "submit_answer",
+            user_id=user_id, doc_id=doc_id, state=self._traced_state(user_id, doc_id),
+            step_index=step_index, question=question, answer=answer,
+        ) as trace:
+            result = self._submit_answer(user_id, doc_id, step_index, question, answer)
+            trace.finish(
+                score=result.score, recall=result.recall, next_step_index=result.next_step_index,
+            )
+            return result
+
+    def _submit_answer(
+        self,
+        user_id: str,
+        doc_id: str,
+        step_index: int,
+        question: str,
+        answer: str,
+    ) -> SubmitResult:
+        if not answer.strip():
+            raise InvalidAnswerError("Answer must not be empty")
+
+        s = self.services
+        steps = self._lesson_plan(doc_id)
+        state = s.memory.get(user_id, doc_id)
+        if state is None:
+            raise NotFoundError(f"Learner {user_id} has not started document {doc_id}")
+
+        step = next((row for row in steps if row.step_index == step_index), None)
+        recall = step_index != state.step_index
+        now = datetime.now(timezone.utc)
+        if recall:
+            card = s.review_store.get(user_id, doc_id, step_index)
+            if step is None or card is None or card.due_at_utc > now.isoformat():
+                raise InvalidStepError(
+                    f"Step {step_index} is not the current step ({state.step_index}) or a due review"
+                )
+        elif step is None:
+            raise InvalidStepError(f"Step {step_index} is not in the lesson plan")
+
+        # Only the question next_step served last is graded, and only once:
+        # a later explanation or a grade for it closes the quiz
+        served = s.event_log.last_event(user_id, doc_id, ("explained", "quizzed", "scored"))
+        if (
+            served is None
+            or served.kind != "quizzed"
+            or served.step_index != step_index
+            or bool(served.payload.get("recall")) != recall
+            or served.payload.get("question") != question
+        ):
+            raise InvalidStepError(
+                f"No open {'review' if recall else 'quiz'} with this question for step {step_index}"
+            )
+
+        with llm_tags(priority="interactive", tenant=user_id, user_id=user_id, doc_id=doc_id):
+            evaluation = s.evaluator.evaluate(
+                context=self._context(doc_id, step),
+                question=question,
+                user_answer=answer,
+                previous_attempts=s.attempt_store.list_for_step(user_id, doc_id, step_index),
+            )
+
+        knowledge = s.tracer.next_state(user_id, doc_id, step_index, evaluation.score)
+        if recall:
+            # A recall doesn't change the lesson state, but saving it unchanged
+            # still bumps the version, so a concurrent duplicate fails here
+            new_state = s.memory.upsert(replace(state, updated_at_utc=now.isoformat()))
+        else:
+            new_state = s.memory.upsert(
+                s.agent.update_after_scored_quiz(
+                    state=state,
+                    score=evaluation.score,
+                    p_known=knowledge.p_known,
+                    next_p_known=s.tracer.prior(user_id, doc_id, step_index + 1),
+                )
+            )
+
+        # The versioned write succeeded: only now record the answer's side effects
+        s.attempt_store.insert(
+            QuizAttempt(
+                user_id=user_id,
+                doc_id=doc_id,
+                step_index=step_index,
+                question=question,
+                answer=answer,
+                score=evaluation.score,
+                feedback=evaluation.feedback,
+                created_at_utc=now.isoformat(),
+            )
+        )
+        card = s.review_scheduler.record(user_id, doc_id, step_index, evaluation.score, now=now)
+        s.tracer.save(knowledge)
+
+        if recall:
+            s.event_log.append(
+                user_id, doc_id, "scored", step_index,
+                {
+                    "score": evaluation.score,
+                    "question": question,
+                    "difficulty": state.difficulty,
+                    "mastery_score": state.mastery_score,
+                    "recall": True,
+                },
+            )
+        else:
+            s.event_log.record_scored(state, new_state, evaluation.score, question)
+
+        return SubmitResult(
+            step_index=step_index,
+            score=evaluation.score,
+            feedback=evaluation.feedback,
+            recall=recall,
+            next_step_index=new_state.step_index,
+            difficulty=new_state.difficulty,
+            mastery_score=new_state.mastery_score,
+            next_review_in_days=card.interval_days,
+        )
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from core.config.settings import get_settings
+from core.retrieval.index_cache import DocIndexCache, get_index_cache
+from core.service.container import Services
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupJob:
+    status: str = "pending"      # pending | running | done | failed
+    doc_ids: List[str] = field(default_factory=list)   # most active first
+    warmed: int = 0
+    skipped: int = 0             # not processed, no chunks, or no room left in the cache
+    elapsed_s: float = 0.0
+    error: str | None = None
+
+
+def recent_active_docs(services: Services, days: float, limit: int) -> List[str]:
+    """
+    Documents ranked by learners with recent state changes plus recent quiz attempts.
+    """
+    since = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    activity: Counter = Counter()
+    activity.update(services.memory.active_docs(since))
+    activity.update(services.attempt_store.active_docs(since))
+    return [doc_id for doc_id, _ in activity.most_common(limit)]
+
+
+def _warm_doc(services: Services, cache: DocIndexCache, doc_id: str) -> bool:
+    record = services.proc_registry.get(doc_id)
+    if record is None or record.status != "processed":
+        return False
+    retriever = cache.retriever(
+        doc_id, record.processed_at_utc, lambda: services.chunk_store.load(doc_id)
+    )
+    if retriever is None:
+        return False
+
+    # One context selection loads the tokenizer and the BM25 scoring path too
+    steps = services.plan_store.load(doc_id)
+    if steps:
+        services.context_selector.select(
+            chunks=retriever.chunks,
+            topic=steps[0].topic,
+            subtopic=steps[0].subtopic,
+            retriever=retriever,
+        )
+    return True
+
+
+def run_warmup(services: Services, cache: DocIndexCache, job: WarmupJob) -> WarmupJob:
+    """
+    Preloads chunks and BM25 indexes for `job.doc_ids`, most active first.
+    Stops once the cache starts evicting: later documents would only push
+    out the more active ones already loaded.
+    """
+    job.status = "running"
+    started = time.perf_counter()
+    evictions = cache.stats().evictions
+    for n, doc_id in enumerate(job.doc_ids):
+        try:
+            warmed = _warm_doc(services, cache, doc_id)
+        except Exception:
+            logger.exception("Warm-up failed for doc=%s", doc_id)
+            warmed = False
+        if warmed:
+            job.warmed += 1
+        else:
+            job.skipped += 1
+        if cache.stats().evictions > evictions:
+            job.skipped += len(job.doc_ids) - n - 1
+            break
+    job.elapsed_s = time.perf_counter() - started
+    job.status = "done"
+    logger.info(
+        "Warmed %d of %d recently used documents in %.2fs", job.warmed, len(job.doc_ids), job.elapsed_s
+    )
+    return job
+
+
+_job: Optional[WarmupJob] = None
+_job_lock = threading.Lock()
+
+
+def start_warmup(services: Services, cache: DocIndexCache | None = None) -> Optional[WarmupJob]:
+    """
+    Starts the process-wide warm-up once, on a background thread, so the
+    first request never waits for it (at worst both load the same document).
+    INDEX_WARMUP_DOCS=0 disables it.
+    """
+    global _job
+    settings = get_settings()
+    if settings.index_warmup_docs <= 0:
+        return None
+    with _job_lock:
+        if _job is not None:
+            return _job
+        job = _job = WarmupJob()
+
+    cache = cache or get_index_cache()
+
+    def _target() -> None:
+        try:
+            job.doc_ids = recent_active_docs(
+                services, settings.index_warmup_days, settings.index_warmup_docs
+            )
+            run_warmup(services, cache, job)
+        except Exception as e:
+            logger.exception("Warm-up job failed")
+            job.status = "failed"
+            job.error = str(e)
+
+    threading.Thread(target=_target, name="index-warmup", daemon=True).start()
+    return job
+
+
+def get_warmup_job() -> Optional[WarmupJob]:
+    with _job_lock:
+        return _job
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import FrozenSet, Optional, Sequence
+
+from core.llm.answer_generator import GroundedAnswer
+from core.telemetry.sqlite_timing import TimedConnection
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Question framing that doesn't change what is being asked
+_FRAMING_WORDS = {
+    "a", "an", "the", "of", "in", "on", "to", "for", "and", "or", "with",
+    "what", "whats", "which", "who", "is", "are", "was", "were", "be", "does",
+    "do", "did", "can", "could", "would", "should", "please", "tell", "me",
+    "us", "about", "define", "definition", "explain", "describe", "meaning",
+    "mean", "means", "term", "concept", "give", "briefly", "simple", "words",
+}
+
+# Kept in the key, but two questions may differ in these and still ask the same thing
+_STOP_WORDS = {
+    "as", "at", "by", "from", "into", "it", "its", "this", "that", "these",
+    "those", "there", "here", "i", "my", "we", "our", "you", "your", "they",
+    "their", "so", "very", "really", "just", "also", "exactly", "actually",
+    "some", "any", "all", "like", "how", "why", "when", "where",
+}
+
+
+def _stem(word: str) -> str:
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    return word
+
+
+_STOP_TERMS = frozenset(_stem(w) for w in _STOP_WORDS)
+
+
+def question_terms(question: str) -> FrozenSet[str]:
+    return frozenset(
+        _stem(w) for w in _WORD.findall(question.lower()) if w not in _FRAMING_WORDS
+    )
+
+
+def normalize_question(question: str) -> str:
+    """
+    Order-insensitive key without framing words, so "What is overfitting?"
+    and "define overfitting" map to the same string.
+    """
+    return " ".join(sorted(question_terms(question)))
+
+
+def simhash(terms: FrozenSet[str], bits: int = 64) -> int:
+    weights = [0] * bits
+    for term in terms:
+        h = int.from_bytes(hashlib.md5(term.encode("utf-8")).digest()[:8], "big")
+        for i in range(bits):
+            weights[i] += 1 if (h >> i) & 1 else -1
+    value = 0
+    for i in range(bits):
+        if weights[i] > 0:
+            value |= 1 << i
+    # SQLite INTEGER is signed 64-bit
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _hamming(a: int, b: int) -> int:
+    return bin((a ^ b) & ((1 << 64) - 1)).count("1")
+
+
+def _jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass(frozen=True)
+class CachedAnswer:
+    question: str
+    answer: GroundedAnswer
+    question_similarity: float
+    chunk_overlap: float
+
+
+class SQLiteAnswerCache:
+    """
+    Grounded answers per document, looked up by question similarity.
+
+    A cached answer is reused only if the new question is a near-duplicate
+    (close simhash / term overlap, and no differing term other than a stop
+    word: "bias and variance" never serves "bias and noise") AND retrieval
+    returned a sufficiently overlapping set of chunks, so the citations
+    still hold for the new question.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        min_question_similarity: float = 0.75,
+        max_hamming_distance: int = 6,
+        min_chunk_overlap: float = 0.5,
+        max_candidates: int = 500,
+    ) -> None:
+        self.db_path = db_path
+        self.min_question_similarity = min_question_similarity
+        self.max_hamming_distance = max_hamming_distance
+        self.min_chunk_overlap = min_chunk_overlap
+        self.max_candidates = max_candidates
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, factory=TimedConnection)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS answer_cache (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    doc_id TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    question_norm TEXT NOT NULL,
+                    simhash INTEGER NOT NULL,
+                    chunk_ids TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    citations TEXT NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    created_at_utc TEXT NOT NULL
+                );
+                """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_answer_cache_doc_norm
+                ON answer_cache(doc_id, model, question_norm);
+                """
+            )
+            conn.commit()
+
+    def lookup(
+        self,
+        doc_id: str,
+        model: str,
+        question: str,
+        chunk_ids: Sequence[str],
+    ) -> Optional[CachedAnswer]:
+        terms = question_terms(question)
+        if not terms:
+            return None
+
+        norm = normalize_question(question)
+        fingerprint = simhash(terms)
+        retrieved = frozenset(chunk_ids)
+
+        with self._connect() as conn:
+            # Exact normalized match first (indexed), then recent near-duplicates
+            rows = conn.execute(
+                """
+                SELECT * FROM answer_cache
+                WHERE doc_id = ? AND model = ? AND question_norm = ?
+                ORDER BY id DESC
+                """,
+                (doc_id, model, norm),
+            ).fetchall()
+            rows += conn.execute(
+                """
+                SELECT * FROM answer_cache
+                WHERE doc_id = ? AND model = ? AND question_norm != ?
+                ORDER BY id DESC
+                LIMIT ?
+                """,
+                (doc_id, model, norm, self.max_candidates),
+            ).fetchall()
+
+        best: Optional[CachedAnswer] = None
+        best_id: Optional[int] = None
+        for row in rows:
+            cached_terms = frozenset(row["question_norm"].split())
+            if (terms ^ cached_terms) - _STOP_TERMS:
+                continue
+            similarity = _jaccard(terms, cached_terms)
+            if (
+                similarity < self.min_question_similarity
+                and _hamming(fingerprint, row["simhash"]) > self.max_hamming_distance
+            ):
+                continue
+
+            overlap = _jaccard(retrieved, frozenset(json.loads(row["chunk_ids"])))
+            if overlap < self.min_chunk_overlap:
+                continue
+
+            if best is None or (similarity, overlap) > (best.question_similarity, best.chunk_overlap):
+                best_id = row["id"]
+                best = CachedAnswer(
+                    question=row["question"],
+                    answer=GroundedAnswer(
+                        answer=row["answer"],
+                        citations=json.loads(row["citations"]),
+                    ),
+                    question_similarity=similarity,
+                    chunk_overlap=overlap,
+                )
+
+        if best_id is not None:
+            with self._connect() as conn:
+                conn.execute("UPDATE answer_cache SET hits = hits + 1 WHERE id = ?", (best_id,))
+                conn.commit()
+
+        return best
+
+    def put(
+        self,
+        doc_id: str,
+        model: str,
+        question: str,
+        chunk_ids: Sequence[str],
+        answer: GroundedAnswer,
+    ) -> None:
+        terms = question_terms(question)
+        if not terms:
+            return
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO answer_cache
+                (doc_id, model, question, question_norm, simhash, chunk_ids, answer, citations, created_at_utc)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+                """,
+                (
+                    doc_id,
+                    model,
+                    question,
+                    normalize_question(question),
+                    simhash(terms),
+                    json.dumps(list(chunk_ids)),
+                    answer.answer,
+                    json.dumps(answer.citations),
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
+            conn.commit()
+
+    def delete_doc(self, doc_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM answer_cache WHERE doc_id = ?", (doc_id,))
+            conn.commit()
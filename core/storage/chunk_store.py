@@ -5,6 +5,7 @@ from dataclasses import asdict
 from pathlib import Path
 from typing import Iterable, List
 
+from core.telemetry.metrics import timed
 from core.text.chunker import Chunk
 
 
@@ -26,6 +27,7 @@ class JSONLChunkStore:
     def chunks_path(self, doc_id: str) -> Path:
         return self.doc_dir(doc_id) / "chunks.jsonl"
 
+    @timed("chunk_store.save")
     def save(self, doc_id: str, chunks: Iterable[Chunk]) -> Path:
         path = self.chunks_path(doc_id)
         with path.open("w", encoding="utf-8") as f:
@@ -33,6 +35,7 @@ class JSONLChunkStore:
                 f.write(json.dumps(asdict(ch), ensure_ascii=False) + "\n")
         return path
 
+    @timed("chunk_store.load")
     def load(self, doc_id: str, limit: int | None = None) -> List[dict]:
         path = self.chunks_path(doc_id)
         if not path.exists():
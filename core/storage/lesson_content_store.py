@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from core.telemetry.sqlite_timing import TimedConnection
+
+
+@dataclass(frozen=True)
+class LessonContentRow:
+    doc_id: str
+    step_index: int
+    difficulty: str      # easy | medium | hard
+    kind: str            # explain
+    variant: int         # 0 for explanations
+    content: str
+    created_at_utc: str
+
+
+class SQLiteLessonContentStore:
+    """
+    Pre-generated lesson explanations per lesson step.
+    Filled in the background after a lesson plan is saved; quiz questions
+    live in the question bank.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, factory=TimedConnection)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS lesson_content (
+                    doc_id TEXT NOT NULL,
+                    step_index INTEGER NOT NULL,
+                    difficulty TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    variant INTEGER NOT NULL,
+                    content TEXT NOT NULL,
+                    created_at_utc TEXT NOT NULL,
+                    PRIMARY KEY (doc_id, step_index, difficulty, kind, variant)
+                );
+                """
+            )
+            conn.commit()
+
+    def save_many(self, rows: List[LessonContentRow]) -> None:
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO lesson_content
+                (doc_id, step_index, difficulty, kind, variant, content, created_at_utc)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(doc_id, step_index, difficulty, kind, variant) DO UPDATE SET
+                    content=excluded.content,
+                    created_at_utc=excluded.created_at_utc;
+                """,
+                [
+                    (r.doc_id, r.step_index, r.difficulty, r.kind, r.variant, r.content, r.created_at_utc)
+                    for r in rows
+                ],
+            )
+            conn.commit()
+
+    def get(
+        self,
+        doc_id: str,
+        step_index: int,
+        difficulty: str,
+        kind: str,
+        variant: int = 0,
+    ) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT content FROM lesson_content
+                WHERE doc_id = ? AND step_index = ? AND difficulty = ? AND kind = ? AND variant = ?
+                """,
+                (doc_id, step_index, difficulty, kind, variant),
+            ).fetchone()
+
+        return row["content"] if row else None
+
+    def list_variants(
+        self,
+        doc_id: str,
+        step_index: int,
+        difficulty: str,
+        kind: str,
+    ) -> List[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT content FROM lesson_content
+                WHERE doc_id = ? AND step_index = ? AND difficulty = ? AND kind = ?
+                ORDER BY variant
+                """,
+                (doc_id, step_index, difficulty, kind),
+            ).fetchall()
+
+        return [row["content"] for row in rows]
+
+    def has(self, doc_id: str, step_index: int, difficulty: str, kind: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT 1 FROM lesson_content
+                WHERE doc_id = ? AND step_index = ? AND difficulty = ? AND kind = ?
+                LIMIT 1
+                """,
+                (doc_id, step_index, difficulty, kind),
+            ).fetchone()
+
+        return row is not None
+
+    def delete_doc(self, doc_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM lesson_content WHERE doc_id = ?", (doc_id,))
+            conn.commit()
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import sqlite3
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import List, Sequence
+
+from core.telemetry.sqlite_timing import TimedConnection
 
 
 @dataclass(frozen=True)
@@ -15,6 +19,17 @@ class LessonPlanRow:
     action: str
 
 
+def plan_version(steps: Sequence[LessonPlanRow]) -> str:
+    """
+    Fingerprint of a lesson plan; changes whenever a re-save changes any step.
+    """
+    payload = json.dumps(
+        [[s.step_index, s.topic, s.subtopic, s.action] for s in sorted(steps, key=lambda s: s.step_index)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
 class SQLiteLessonPlanStore:
     def __init__(self, db_path: Path) -> None:
         self.db_path = db_path
@@ -22,7 +37,7 @@ class SQLiteLessonPlanStore:
         self._init_db()
 
     def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=TimedConnection)
         conn.row_factory = sqlite3.Row
         return conn
 
@@ -4,6 +4,8 @@ import sqlite3
 from dataclasses import dataclass
 from pathlib import Path
 
+from core.telemetry.sqlite_timing import TimedConnection
+
 
 @dataclass(frozen=True)
 class ProcessingRecord:
@@ -22,7 +24,7 @@ class SQLiteProcessingRegistry:
         self._init_db()
 
     def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=TimedConnection)
         conn.row_factory = sqlite3.Row
         return conn
 
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import sqlite3
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from core.telemetry.sqlite_timing import TimedConnection
+
+
+@dataclass(frozen=True)
+class BankQuestion:
+    doc_id: str
+    step_index: int
+    difficulty: str
+    slot: int
+    question: str
+
+
+@dataclass(frozen=True)
+class QuestionStats:
+    slot: int
+    question: str
+    attempts: int
+    avg_score: Optional[float]
+    pass_rate: Optional[float]   # share of attempts scoring >= 0.7
+
+
+class SQLiteQuestionBank:
+    """
+    Quiz questions per (doc_id, step_index, difficulty), filled ahead of time.
+
+    Questions sit in numbered slots, so serving one is a primary-key lookup.
+    Each learner has a cursor per bank that walks the slots round-robin, so
+    nobody sees a question twice before seeing the whole pool.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, factory=TimedConnection)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS quiz_questions (
+                    doc_id TEXT NOT NULL,
+                    step_index INTEGER NOT NULL,
+                    difficulty TEXT NOT NULL,
+                    slot INTEGER NOT NULL,
+                    question TEXT NOT NULL,
+                    created_at_utc TEXT NOT NULL,
+                    PRIMARY KEY (doc_id, step_index, difficulty, slot)
+                );
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS quiz_question_cursors (
+                    user_id TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    step_index INTEGER NOT NULL,
+                    difficulty TEXT NOT NULL,
+                    next_slot INTEGER NOT NULL,
+                    PRIMARY KEY (user_id, doc_id, step_index, difficulty)
+                );
+                """
+            )
+            conn.commit()
+
+    def add_many(
+        self,
+        doc_id: str,
+        step_index: int,
+        difficulty: str,
+        questions: Sequence[str],
+    ) -> None:
+        """
+        Replaces the pool for one bank.
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM quiz_questions WHERE doc_id = ? AND step_index = ? AND difficulty = ?",
+                (doc_id, step_index, difficulty),
+            )
+            conn.executemany(
+                """
+                INSERT INTO quiz_questions
+                (doc_id, step_index, difficulty, slot, question, created_at_utc)
+                VALUES (?, ?, ?, ?, ?, ?);
+                """,
+                [
+                    (doc_id, step_index, difficulty, slot, question, now)
+                    for slot, question in enumerate(questions)
+                ],
+            )
+            conn.commit()
+
+    def size(self, doc_id: str, step_index: int, difficulty: str) -> int:
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT COUNT(*) AS n FROM quiz_questions
+                WHERE doc_id = ? AND step_index = ? AND difficulty = ?
+                """,
+                (doc_id, step_index, difficulty),
+            ).fetchone()
+
+        return row["n"]
+
+    def next_question(
+        self,
+        user_id: str,
+        doc_id: str,
+        step_index: int,
+        difficulty: str,
+    ) -> Optional[BankQuestion]:
+        """
+        Serves the learner's next question and advances their cursor.
+        Returns None if the bank is empty.
+        """
+        with self._connect() as conn:
+            # Cursor read + advance must not interleave with another session
+            conn.execute("BEGIN IMMEDIATE")
+            size = conn.execute(
+                """
+                SELECT COUNT(*) AS n FROM quiz_questions
+                WHERE doc_id = ? AND step_index = ? AND difficulty = ?
+                """,
+                (doc_id, step_index, difficulty),
+            ).fetchone()["n"]
+            if size == 0:
+                return None
+
+            cursor = conn.execute(
+                """
+                SELECT next_slot FROM quiz_question_cursors
+                WHERE user_id = ? AND doc_id = ? AND step_index = ? AND difficulty = ?
+                """,
+                (user_id, doc_id, step_index, difficulty),
+            ).fetchone()
+            if cursor is None:
+                # Learners start at different slots, so a shared pool spreads out
+                slot = zlib.crc32(user_id.encode("utf-8")) % size
+            else:
+                slot = cursor["next_slot"] % size
+
+            row = conn.execute(
+                """
+                SELECT question FROM quiz_questions
+                WHERE doc_id = ? AND step_index = ? AND difficulty = ? AND slot = ?
+                """,
+                (doc_id, step_index, difficulty, slot),
+            ).fetchone()
+
+            conn.execute(
+                """
+                INSERT INTO quiz_question_cursors (user_id, doc_id, step_index, difficulty, next_slot)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(user_id, doc_id, step_index, difficulty) DO UPDATE SET
+                    next_slot=excluded.next_slot;
+                """,
+                (user_id, doc_id, step_index, difficulty, (slot + 1) % size),
+            )
+            conn.commit()
+
+        return BankQuestion(
+            doc_id=doc_id,
+            step_index=step_index,
+            difficulty=difficulty,
+            slot=slot,
+            question=row["question"],
+        )
+
+    def question_stats(self, doc_id: str, step_index: int, difficulty: str) -> List[QuestionStats]:
+        """
+        Per-question score statistics across all learners, from quiz_attempts.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT q.slot, q.question,
+                       COUNT(a.id) AS attempts,
+                       AVG(a.score) AS avg_score,
+                       AVG(CASE WHEN a.score >= 0.7 THEN 1.0 ELSE 0.0 END) AS pass_rate
+                FROM quiz_questions q
+                LEFT JOIN quiz_attempts a
+                    ON a.doc_id = q.doc_id
+                    AND a.step_index = q.step_index
+                    AND a.question = q.question
+                WHERE q.doc_id = ? AND q.step_index = ? AND q.difficulty = ?
+                GROUP BY q.slot, q.question
+                ORDER BY q.slot
+                """,
+                (doc_id, step_index, difficulty),
+            ).fetchall()
+
+        return [
+            QuestionStats(
+                slot=row["slot"],
+                question=row["question"],
+                attempts=row["attempts"],
+                avg_score=row["avg_score"],
+                pass_rate=row["pass_rate"] if row["attempts"] else None,
+            )
+            for row in rows
+        ]
+
+    def delete_doc(self, doc_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM quiz_questions WHERE doc_id = ?", (doc_id,))
+            conn.execute("DELETE FROM quiz_question_cursors WHERE doc_id = ?", (doc_id,))
+            conn.commit()
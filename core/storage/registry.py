@@ -6,6 +6,8 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Iterable
 
+from core.telemetry.sqlite_timing import TimedConnection
+
 
 @dataclass(frozen=True)
 class DocumentRecord:
@@ -29,7 +31,7 @@ class SQLiteDocumentRegistry:
         self._init_db()
 
     def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=TimedConnection)
         conn.row_factory = sqlite3.Row
         return conn
 
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+from core.telemetry.sqlite_timing import TimedConnection
+
+
+class SQLiteSyllabusSectionCache:
+    """
+    Per-section partial syllabi, keyed by a hash of (model, prompt, section text).
+    Re-running extraction on a re-processed document only pays for sections
+    whose text actually changed.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, factory=TimedConnection)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS syllabus_sections (
+                    section_hash TEXT PRIMARY KEY,
+                    syllabus_json TEXT NOT NULL,
+                    created_at_utc TEXT NOT NULL
+                );
+                """
+            )
+            conn.commit()
+
+    def get(self, section_hash: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT syllabus_json FROM syllabus_sections WHERE section_hash = ?",
+                (section_hash,),
+            ).fetchone()
+
+        return json.loads(row["syllabus_json"]) if row else None
+
+    def put(self, section_hash: str, syllabus: Dict) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO syllabus_sections (section_hash, syllabus_json, created_at_utc)
+                VALUES (?, ?, ?)
+                ON CONFLICT(section_hash) DO UPDATE SET
+                    syllabus_json=excluded.syllabus_json,
+                    created_at_utc=excluded.created_at_utc;
+                """,
+                (
+                    section_hash,
+                    json.dumps(syllabus, ensure_ascii=False),
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
+            conn.commit()
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core.telemetry.metrics import HistogramSnapshot, MetricsRegistry, get_metrics
+
+logger = logging.getLogger(__name__)
+
+METRIC_NAME = "tutor_stage_seconds"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_str(labels: Dict[str, str]) -> str:
+    return ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+
+
+def render_prometheus(snapshots: List[HistogramSnapshot], **const_labels: str) -> str:
+    """
+    Prometheus text exposition format: one histogram family, one series
+    per (stage, labels).
+    """
+    lines = [
+        f"# HELP {METRIC_NAME} Time spent per pipeline stage.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    for snap in snapshots:
+        labels = {"stage": snap.stage, **snap.labels, **const_labels}
+        cumulative = 0
+        for bound, n in zip(snap.bounds, snap.counts):
+            cumulative += n
+            lines.append(f'{METRIC_NAME}_bucket{{{_label_str({**labels, "le": repr(bound)})}}} {cumulative}')
+        lines.append(f'{METRIC_NAME}_bucket{{{_label_str({**labels, "le": "+Inf"})}}} {snap.count}')
+        lines.append(f"{METRIC_NAME}_sum{{{_label_str(labels)}}} {snap.sum_s!r}")
+        lines.append(f"{METRIC_NAME}_count{{{_label_str(labels)}}} {snap.count}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: Path, snapshots: List[HistogramSnapshot], **const_labels: str) -> None:
+    # Write then rename, so a scraper never reads a half-written file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(render_prometheus(snapshots, **const_labels), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+@dataclass(frozen=True)
+class StageSummary:
+    stage: str
+    labels: Dict[str, str]
+    count: int
+    total_s: float
+    mean_s: float
+    p50_s: float
+    p95_s: float
+    p99_s: float
+
+
+class SQLiteMetricsStore:
+    """
+    Latest histogram per (host, process, stage, labels). Each process
+    overwrites its own rows; `summary` merges them across processes.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Deliberately untimed: exporting must not feed the histograms it writes
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS stage_latency (
+                    host TEXT NOT NULL,
+                    pid INTEGER NOT NULL,
+                    stage TEXT NOT NULL,
+                    labels TEXT NOT NULL,
+                    bounds TEXT NOT NULL,
+                    counts TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    sum_s REAL NOT NULL,
+                    updated_at_utc TEXT NOT NULL,
+                    PRIMARY KEY (host, pid, stage, labels)
+                );
+                """
+            )
+            conn.commit()
+
+    def save(self, host: str, pid: int, snapshots: List[HistogramSnapshot]) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO stage_latency
+                (host, pid, stage, labels, bounds, counts, count, sum_s, updated_at_utc)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(host, pid, stage, labels) DO UPDATE SET
+                    bounds=excluded.bounds,
+                    counts=excluded.counts,
+                    count=excluded.count,
+                    sum_s=excluded.sum_s,
+                    updated_at_utc=excluded.updated_at_utc;
+                """,
+                [
+                    (
+                        host,
+                        pid,
+                        s.stage,
+                        json.dumps(s.labels, sort_keys=True),
+                        json.dumps(s.bounds),
+                        json.dumps(s.counts),
+                        s.count,
+                        s.sum_s,
+                        now,
+                    )
+                    for s in snapshots
+                ],
+            )
+            conn.commit()
+
+    def summary(self, since_utc: str | None = None) -> List[StageSummary]:
+        """
+        Per (stage, labels) totals and bucket-resolution percentiles over
+        every process, slowest total first.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM stage_latency WHERE updated_at_utc >= ?",
+                (since_utc or "",),
+            ).fetchall()
+
+        merged: Dict[Tuple[str, str], HistogramSnapshot] = {}
+        for row in rows:
+            key = (row["stage"], row["labels"])
+            counts = json.loads(row["counts"])
+            current = merged.get(key)
+            if current is not None and len(current.counts) == len(counts):
+                counts = [a + b for a, b in zip(current.counts, counts)]
+            merged[key] = HistogramSnapshot(
+                stage=row["stage"],
+                labels=json.loads(row["labels"]),
+                bounds=tuple(json.loads(row["bounds"])),
+                counts=counts,
+                count=(current.count if current else 0) + row["count"],
+                sum_s=(current.sum_s if current else 0.0) + row["sum_s"],
+            )
+
+        out = [
+            StageSummary(
+                stage=h.stage,
+                labels=h.labels,
+                count=h.count,
+                total_s=h.sum_s,
+                mean_s=h.sum_s / h.count if h.count else 0.0,
+                p50_s=h.quantile(0.5),
+                p95_s=h.quantile(0.95),
+                p99_s=h.quantile(0.99),
+            )
+            for h in merged.values()
+        ]
+        return sorted(out, key=lambda s: s.total_s, reverse=True)
+
+
+class MetricsExporter:
+    """
+    Periodically writes the registry to a Prometheus text file and to
+    SQLite from a daemon thread, plus once more at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        prom_path: Path,
+        store: SQLiteMetricsStore,
+        interval_s: float = 30.0,
+    ) -> None:
+        self.registry = registry
+        self.prom_path = prom_path
+        self.store = store
+        self.interval_s = interval_s
+        self.host = socket.gethostname()
+        self.pid = os.getpid()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self) -> None:
+        snapshots = self.registry.snapshot()
+        if not snapshots:
+            return
+        write_prometheus(self.prom_path, snapshots, pid=str(self.pid))
+        self.store.save(self.host, self.pid, snapshots)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.export()
+            except Exception:
+                # A locked database or full disk must not end the loop for good
+                logger.exception("Metrics export failed; retrying in %gs", self.interval_s)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.export()
+
+
+_exporter: Optional[MetricsExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def start_metrics_export(db_path: Path, metrics_dir: Path, interval_s: float) -> Optional[MetricsExporter]:
+    """
+    Starts the process-wide exporter once; interval_s <= 0 disables export.
+    Each process writes its own tutor_<pid>.prom, ready for a textfile collector.
+    """
+    global _exporter
+    if interval_s <= 0:
+        return None
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = MetricsExporter(
+                get_metrics(),
+                prom_path=metrics_dir / f"tutor_{os.getpid()}.prom",
+                store=SQLiteMetricsStore(db_path),
+                interval_s=interval_s,
+            )
+            _exporter.start()
+        return _exporter
@@ -0,0 +1,354 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from core.config.settings import get_settings
+from core.llm.context import LLMCallTags, current_llm_tags
+
+logger = logging.getLogger(__name__)
+
+# USD per million (prompt, completion) tokens; LLM_PRICES overrides per model
+DEFAULT_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+# Rollup dimensions and the SQL expression each one groups by
+ROLLUP_COLUMNS: Dict[str, str] = {
+    "day": "substr(created_at_utc, 1, 10)",
+    "doc_id": "doc_id",
+    "user_id": "user_id",
+    "call_site": "call_site",
+    "model": "model",
+    "priority": "priority",
+}
+
+
+@dataclass(frozen=True)
+class LLMUsage:
+    created_at_utc: str
+    model: str
+    call_site: str
+    priority: str
+    user_id: str
+    doc_id: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency_s: float
+    cached: bool        # served without calling the model (cache, bank, local grading)
+    ok: bool
+    cost_usd: float
+    cancelled: bool = False   # the caller stopped early (abandoned stream, cancelled task)
+
+
+@dataclass(frozen=True)
+class UsageRollup:
+    key: Dict[str, str]
+    calls: int
+    cached: int
+    errors: int
+    cancelled: int
+    prompt_tokens: int
+    completion_tokens: int
+    cost_usd: float
+    avg_latency_s: float    # over model calls only
+    max_latency_s: float
+
+
+def estimate_cost_usd(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prices = {**DEFAULT_PRICES, **get_settings().llm_prices}
+    prompt_price, completion_price = prices.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class SQLiteLLMUsageStore:
+    """
+    One row per LLM call (or call avoided by a cache), with rollups
+    by any of ROLLUP_COLUMNS.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_usage (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created_at_utc TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    call_site TEXT NOT NULL,
+                    priority TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    prompt_tokens INTEGER NOT NULL,
+                    completion_tokens INTEGER NOT NULL,
+                    latency_s REAL NOT NULL,
+                    cached INTEGER NOT NULL,
+                    ok INTEGER NOT NULL,
+                    cost_usd REAL NOT NULL,
+                    cancelled INTEGER NOT NULL DEFAULT 0
+                );
+                """
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(llm_usage)")}
+            if "cancelled" not in columns:
+                conn.execute("ALTER TABLE llm_usage ADD COLUMN cancelled INTEGER NOT NULL DEFAULT 0")
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_llm_usage_created
+                ON llm_usage(created_at_utc);
+                """
+            )
+            conn.commit()
+
+    def insert_many(self, rows: Sequence[LLMUsage]) -> None:
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO llm_usage
+                (created_at_utc, model, call_site, priority, user_id, doc_id,
+                 prompt_tokens, completion_tokens, latency_s, cached, ok, cost_usd, cancelled)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        r.created_at_utc,
+                        r.model,
+                        r.call_site,
+                        r.priority,
+                        r.user_id,
+                        r.doc_id,
+                        r.prompt_tokens,
+                        r.completion_tokens,
+                        r.latency_s,
+                        int(r.cached),
+                        int(r.ok),
+                        r.cost_usd,
+                        int(r.cancelled),
+                    )
+                    for r in rows
+                ],
+            )
+            conn.commit()
+
+    def rollup(
+        self,
+        group_by: Sequence[str] = ("day", "doc_id", "user_id"),
+        since_utc: str | None = None,
+    ) -> List[UsageRollup]:
+        """
+        Totals per group, most expensive first. `since_utc` is an ISO
+        timestamp or date ("2026-10-01").
+        """
+        unknown = [g for g in group_by if g not in ROLLUP_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown rollup column(s): {', '.join(unknown)}")
+
+        dims = "".join(f"{ROLLUP_COLUMNS[g]} AS {g}, " for g in group_by)
+        group = f"GROUP BY {', '.join(group_by)}" if group_by else ""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT {dims}
+                    COUNT(*) AS calls,
+                    SUM(cached) AS cached,
+                    SUM(1 - ok) AS errors,
+                    SUM(cancelled) AS cancelled,
+                    SUM(prompt_tokens) AS prompt_tokens,
+                    SUM(completion_tokens) AS completion_tokens,
+                    SUM(cost_usd) AS cost_usd,
+                    AVG(CASE WHEN cached = 0 THEN latency_s END) AS avg_latency_s,
+                    MAX(latency_s) AS max_latency_s
+                FROM llm_usage
+                WHERE created_at_utc >= ?
+                {group}
+                ORDER BY cost_usd DESC, calls DESC
+                """,
+                (since_utc or "",),
+            ).fetchall()
+
+        return [
+            UsageRollup(
+                key={g: row[g] for g in group_by},
+                calls=row["calls"],
+                cached=row["cached"] or 0,
+                errors=row["errors"] or 0,
+                cancelled=row["cancelled"] or 0,
+                prompt_tokens=row["prompt_tokens"] or 0,
+                completion_tokens=row["completion_tokens"] or 0,
+                cost_usd=row["cost_usd"] or 0.0,
+                avg_latency_s=row["avg_latency_s"] or 0.0,
+                max_latency_s=row["max_latency_s"] or 0.0,
+            )
+            for row in rows
+        ]
+
+
+class LLMUsageRecorder:
+    """
+    Buffers usage rows in memory and writes them in batches, so recording
+    never adds a SQLite round trip to an LLM call. A daemon thread flushes
+    every `flush_interval_s`, or early once `max_buffer` rows are waiting;
+    the buffer is also flushed at exit. Rows from a failed write are kept for
+    the next flush, up to `max_retained` (the oldest are dropped beyond that).
+    """
+
+    def __init__(
+        self,
+        store: SQLiteLLMUsageStore,
+        flush_interval_s: float = 2.0,
+        max_buffer: int = 256,
+        max_retained: int = 8192,
+    ) -> None:
+        self.store = store
+        self.flush_interval_s = flush_interval_s
+        self.max_buffer = max_buffer
+        self.max_retained = max_retained
+        self._buffer: List[LLMUsage] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="llm-usage-flush", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(
+        self,
+        model: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        latency_s: float = 0.0,
+        cached: bool = False,
+        ok: bool = True,
+        call_site: str | None = None,
+        tags: LLMCallTags | None = None,
+        cancelled: bool = False,
+    ) -> None:
+        """
+        Attribution (call site, priority, user, document) comes from `tags`,
+        by default the current LLMCallTags.
+        """
+        tags = tags or current_llm_tags()
+        usage = LLMUsage(
+            created_at_utc=datetime.now(timezone.utc).isoformat(),
+            model=model,
+            call_site=call_site or tags.call_site or "other",
+            priority=tags.priority,
+            user_id=tags.user_id,
+            doc_id=tags.doc_id,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            latency_s=latency_s,
+            cached=cached,
+            ok=ok,
+            cost_usd=0.0 if cached else estimate_cost_usd(model, prompt_tokens, completion_tokens),
+            cancelled=cancelled,
+        )
+        with self._lock:
+            self._buffer.append(usage)
+            full = len(self._buffer) >= self.max_buffer
+        if full:
+            self._wake.set()
+
+    def flush(self) -> None:
+        """
+        Writes the buffered rows; on failure they go back to the front of the
+        buffer and the error propagates.
+        """
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return
+        try:
+            self.store.insert_many(rows)
+        except Exception:
+            with self._lock:
+                self._buffer[:0] = rows
+                dropped = len(self._buffer) - self.max_retained
+                if dropped > 0:
+                    del self._buffer[:dropped]
+            if dropped > 0:
+                logger.warning("Dropped %d unwritten LLM usage rows", dropped)
+            raise
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval_s)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("LLM usage flush failed; keeping rows for the next attempt")
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        self.flush()
+
+
+_recorders: Dict[Path, LLMUsageRecorder] = {}
+_recorders_lock = threading.Lock()
+
+
+def get_llm_usage_recorder(db_path: Path | None = None) -> LLMUsageRecorder:
+    """
+    Process-wide recorder; defaults to the registry database.
+    """
+    if db_path is None:
+        from core.utils.paths import REGISTRY_DB_PATH
+
+        db_path = Path(REGISTRY_DB_PATH)
+    with _recorders_lock:
+        recorder = _recorders.get(db_path)
+        if recorder is None:
+            recorder = LLMUsageRecorder(SQLiteLLMUsageStore(db_path))
+            _recorders[db_path] = recorder
+        return recorder
+
+
+def record_llm_cache_hit(model: str, call_site: str | None = None) -> None:
+    """
+    Records a call the model never saw because a cache or bank served it.
+    """
+    get_llm_usage_recorder().record(model=model, cached=True, call_site=call_site)
+
+
+def record_llm_call(
+    model: str,
+    tags: LLMCallTags,
+    prompt_tokens: int,
+    completion_tokens: int,
+    started: float,
+    ok: bool = True,
+    cancelled: bool = False,
+) -> None:
+    """
+    `tags` are the ones the call was admitted under; `started` is a
+    time.perf_counter() reading taken before the call.
+    """
+    get_llm_usage_recorder().record(
+        model=model,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        latency_s=time.perf_counter() - started,
+        ok=ok,
+        tags=tags,
+        cancelled=cancelled,
+    )
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Tuple, TypeVar
+
+# Upper bounds in seconds; the last (implicit) bucket is +Inf
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+F = TypeVar("F", bound=Callable)
+
+
+@dataclass(frozen=True)
+class HistogramSnapshot:
+    stage: str
+    labels: Dict[str, str]
+    bounds: Tuple[float, ...]
+    counts: List[int]        # per bucket, not cumulative; len(bounds) + 1
+    count: int
+    sum_s: float
+
+    def quantile(self, q: float) -> float:
+        """
+        Upper bound of the bucket holding the q-th observation
+        (+Inf bucket reports the largest finite bound).
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.bounds[-1]
+
+
+class _Histogram:
+    __slots__ = ("counts", "count", "sum_s")
+
+    def __init__(self, n_buckets: int) -> None:
+        self.counts = [0] * n_buckets
+        self.count = 0
+        self.sum_s = 0.0
+
+
+class MetricsRegistry:
+    """
+    Latency histograms keyed by (stage, labels). Observing is a bisect and
+    three additions under a lock, cheap enough to wrap every SQLite statement.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self._histograms: Dict[Tuple[str, Labels], _Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float, **labels: str) -> None:
+        key = (stage, tuple(sorted(labels.items())))
+        idx = bisect_left(self.buckets, seconds)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram(len(self.buckets) + 1)
+            hist.counts[idx] += 1
+            hist.count += 1
+            hist.sum_s += seconds
+
+    def snapshot(self) -> List[HistogramSnapshot]:
+        with self._lock:
+            items = [
+                (stage, labels, list(h.counts), h.count, h.sum_s)
+                for (stage, labels), h in self._histograms.items()
+            ]
+        return [
+            HistogramSnapshot(
+                stage=stage,
+                labels=dict(labels),
+                bounds=self.buckets,
+                counts=counts,
+                count=count,
+                sum_s=sum_s,
+            )
+            for stage, labels, counts, count, sum_s in sorted(items)
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """
+    The process-wide registry every span reports to.
+    """
+    return _registry
+
+
+@contextmanager
+def span(stage: str, **labels: str) -> Iterator[None]:
+    """
+    Times the block into the `stage` histogram, failures included.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _registry.observe(stage, time.perf_counter() - started, **labels)
+
+
+def timed(stage: str, **labels: str) -> Callable[[F], F]:
+    """
+    Decorator form of `span` for plain (non-generator) functions.
+    """
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage, **labels):
+                return fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorate
@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import atexit
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from types import FrameType
+from typing import Callable, Iterator, List, Optional, Set, TypeVar
+
+from core.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable)
+
+MODES = ("cpu", "memory", "all")
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[2])
+
+
+def profiling_mode() -> str:
+    """
+    "" when profiling is off, else one of MODES (PROFILING env var).
+    """
+    mode = get_settings().profiling
+    return mode if mode in MODES else ""
+
+
+def _frame_key(frame: FrameType) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_PROJECT_ROOT):
+        filename = filename[len(_PROJECT_ROOT) + 1:]
+    elif "site-packages" in filename:
+        filename = filename.split("site-packages", 1)[1].lstrip(os.sep)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+@dataclass
+class CPUProfile:
+    interval_s: float
+    samples: int = 0
+    self_counts: Counter = field(default_factory=Counter)
+    cumulative_counts: Counter = field(default_factory=Counter)
+    stacks: Counter = field(default_factory=Counter)   # folded stacks, root first
+
+
+class SamplingProfiler:
+    """
+    Samples one thread's Python stack every `interval_s` from a background
+    thread via sys._current_frames(). Only frames at or below `root` are
+    kept; when `root` is no longer on the stack the profiler stops itself
+    and calls `on_finish` (used to end a Streamlit script run).
+    """
+
+    def __init__(
+        self,
+        thread_id: int,
+        root: FrameType,
+        interval_s: float,
+        on_finish: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.thread_id = thread_id
+        self.root = root
+        self.profile = CPUProfile(interval_s=interval_s)
+        self.on_finish = on_finish
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> CPUProfile:
+        self._stop.set()
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+        return self.profile
+
+    def _sample(self) -> bool:
+        frame = sys._current_frames().get(self.thread_id)
+        stack: List[str] = []
+        while frame is not None and frame is not self.root:
+            stack.append(_frame_key(frame))
+            frame = frame.f_back
+        if frame is None:
+            return False
+        stack.append(_frame_key(frame))
+
+        p = self.profile
+        p.samples += 1
+        p.self_counts[stack[0]] += 1
+        p.cumulative_counts.update(set(stack))
+        p.stacks[";".join(reversed(stack))] += 1
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.profile.interval_s):
+            if not self._sample():
+                self._stop.set()
+                if self.on_finish is not None:
+                    self.on_finish()
+                return
+
+
+# tracemalloc is process-global: keep it on while any session needs it
+_tracemalloc_users = 0
+_tracemalloc_lock = threading.Lock()
+
+
+def _tracemalloc_acquire() -> None:
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracemalloc_users += 1
+
+
+def _tracemalloc_release() -> None:
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+
+
+# Watched script runs still open at exit are written from an atexit hook
+_watched: Set["ProfileSession"] = set()
+_watched_lock = threading.Lock()
+
+
+class ProfileSession:
+    """
+    One profiled request: CPU samples and/or a tracemalloc diff between
+    start and finish, written as a ranked text report (plus folded stacks
+    for flame graphs) under data/profiles/.
+    """
+
+    def __init__(self, name: str, mode: str, root: FrameType, watch_root: bool = False) -> None:
+        settings = get_settings()
+        self.name = name
+        self.mode = mode
+        self.top = settings.profiling_top
+        self.started_at = datetime.now(timezone.utc)
+        self._started = time.perf_counter()
+        self._finished = False
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+        # A watched script run needs the sampler to notice its end, even memory-only
+        self.profiler: Optional[SamplingProfiler] = None
+        if mode in ("cpu", "all") or watch_root:
+            self.profiler = SamplingProfiler(
+                threading.get_ident(),
+                root,
+                interval_s=settings.profiling_interval_s,
+                on_finish=self.finish if watch_root else None,
+            )
+
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+        if mode in ("memory", "all"):
+            _tracemalloc_acquire()
+            tracemalloc.reset_peak()
+            self.baseline = tracemalloc.take_snapshot()
+
+        if watch_root:
+            with _watched_lock:
+                _watched.add(self)
+        if self.profiler is not None:
+            self.profiler.start()
+
+    def finish(self) -> Optional[Path]:
+        with self._lock:
+            if self._finished:
+                return None
+            self._finished = True
+        try:
+            return self._report()
+        finally:
+            self._done.set()
+            with _watched_lock:
+                _watched.discard(self)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def _report(self) -> Optional[Path]:
+        wall_s = time.perf_counter() - self._started
+        cpu = self.profiler.stop() if self.profiler is not None else None
+        if self.mode == "memory":
+            cpu = None
+
+        memory_lines: List[str] = []
+        if self.baseline is not None:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            _tracemalloc_release()
+            memory_lines = self._memory_report(snapshot, peak)
+
+        try:
+            return self._write(wall_s, cpu, memory_lines)
+        except OSError:
+            logger.exception("Could not write profile for %s", self.name)
+            return None
+
+    def _memory_report(self, snapshot: tracemalloc.Snapshot, peak: int) -> List[str]:
+        # Leave out the profiler's own bookkeeping
+        own = [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)]
+        stats = snapshot.filter_traces(own).compare_to(self.baseline.filter_traces(own), "lineno")
+        lines = [
+            f"Peak traced memory: {peak / 1024 / 1024:.1f} MiB",
+            "",
+            f"{'size diff':>12} {'count diff':>11}  location",
+        ]
+        for stat in stats[: self.top]:
+            frame = stat.traceback[0]
+            lines.append(
+                f"{stat.size_diff / 1024:>10.1f}KB {stat.count_diff:>11}  {frame.filename}:{frame.lineno}"
+            )
+        return lines
+
+    @staticmethod
+    def _ranked(counts: Counter, samples: int, top: int) -> List[str]:
+        return [
+            f"{n:>8} {100.0 * n / samples:>6.1f}%  {key}"
+            for key, n in counts.most_common(top)
+        ]
+
+    def _write(self, wall_s: float, cpu: Optional[CPUProfile], memory_lines: List[str]) -> Path:
+        from core.utils.paths import PROFILES_DIR
+
+        stamp = self.started_at.strftime("%Y%m%dT%H%M%S_%f")
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in self.name)
+        base = Path(PROFILES_DIR) / f"{stamp}_{safe_name}_{os.getpid()}"
+        base.parent.mkdir(parents=True, exist_ok=True)
+
+        lines = [
+            f"Profile: {self.name}",
+            f"Started: {self.started_at.isoformat()}",
+            f"Wall time: {wall_s:.3f}s | mode: {self.mode} | pid: {os.getpid()}",
+        ]
+        if cpu is not None:
+            samples = max(cpu.samples, 1)
+            lines += [
+                "",
+                f"== CPU: {cpu.samples} samples every {cpu.interval_s * 1000:.1f} ms ==",
+                "",
+                "-- self (where the thread was running) --",
+                *self._ranked(cpu.self_counts, samples, self.top),
+                "",
+                "-- cumulative (on the stack) --",
+                *self._ranked(cpu.cumulative_counts, samples, self.top),
+            ]
+            if cpu.stacks:
+                Path(f"{base}.folded").write_text(
+                    "".join(f"{stack} {n}\n" for stack, n in cpu.stacks.most_common()),
+                    encoding="utf-8",
+                )
+        if memory_lines:
+            lines += ["", "== Memory: allocations since start, by line ==", "", *memory_lines]
+
+        path = Path(f"{base}.txt")
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        logger.info("Wrote profile %s (%.3fs)", path, wall_s)
+        return path
+
+
+@contextmanager
+def profiled(name: str) -> Iterator[None]:
+    """
+    Profiles the block when PROFILING is cpu/memory/all; free otherwise.
+    """
+    mode = profiling_mode()
+    if not mode:
+        yield
+        return
+
+    session = ProfileSession(name, mode, root=sys._getframe(2))
+    try:
+        yield
+    finally:
+        session.finish()
+
+
+def profile(name: str) -> Callable[[F], F]:
+    """
+    Decorator form of `profiled`.
+    """
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with profiled(name):
+                return fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorate
+
+
+def profile_script_run(name: str) -> Optional[ProfileSession]:
+    """
+    Call at the top of a Streamlit page: profiles the rest of this script
+    run. The run is over once the page's frame leaves the stack (including
+    st.stop() and reruns); the report is written then.
+    """
+    mode = profiling_mode()
+    if not mode:
+        return None
+    return ProfileSession(name, mode, root=sys._getframe(1), watch_root=True)
+
+
+@atexit.register
+def _finish_watched() -> None:
+    with _watched_lock:
+        pending = list(_watched)
+    for session in pending:
+        # The sampler may already be writing this report; let it complete
+        session.finish()
+        session.wait(timeout=30.0)
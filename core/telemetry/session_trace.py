@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from core.config.settings import get_settings
+from core.memory.tutor_memory import TutorState
+from core.types.interfaces import ChatMessage
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def tracing_enabled() -> bool:
+    """
+    Session traces are recorded only when SESSION_TRACE is set.
+    """
+    return get_settings().session_trace
+
+
+def new_session_id(prefix: str) -> str:
+    return f"{prefix}-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+def learner_state(state: Optional[TutorState]) -> dict:
+    """
+    What a replay needs to put the learner back where the step started.
+    """
+    if state is None:
+        return {}
+    return {
+        "step_index": state.step_index,
+        "difficulty": state.difficulty,
+        "last_action": state.last_action,
+        "mastery_score": state.mastery_score,
+    }
+
+
+def llm_request_key(messages: Sequence[ChatMessage]) -> str:
+    """
+    Identifies a request by its exact messages, so a replay finds the
+    recorded response for the same prompt.
+    """
+    payload = json.dumps([[m.role, m.content] for m in messages], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SessionTraceWriter:
+    """
+    Appends records to data/traces/<session>.jsonl, one JSON object per line.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def append(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(line)
+
+
+_writers: Dict[str, SessionTraceWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_trace_writer(session_id: str) -> SessionTraceWriter:
+    from core.utils.paths import TRACES_DIR
+
+    with _writers_lock:
+        writer = _writers.get(session_id)
+        if writer is None:
+            writer = SessionTraceWriter(Path(TRACES_DIR) / f"{_UNSAFE.sub('_', session_id)}.jsonl")
+            _writers[session_id] = writer
+        return writer
+
+
+@dataclass
+class TraceStep:
+    """
+    One user-visible step (show the next tutor step, grade an answer, answer
+    a question). LLM responses produced while it is current are recorded
+    with it; `finish` writes the step itself. Does nothing when tracing is off.
+    """
+
+    session_id: str
+    page: str                  # tutor | ask | api
+    op: str                    # next_step | submit_answer | ask (TutorService methods)
+    user_id: str = ""
+    doc_id: str = ""
+    args: dict = field(default_factory=dict)
+    state: dict = field(default_factory=dict)     # learner state before the step
+    llm_calls: int = 0
+    writer: Optional[SessionTraceWriter] = None
+    started_at_utc: str = ""
+    _started: float = field(default=0.0, init=False, repr=False)
+    _finished: bool = field(default=False, init=False, repr=False)
+
+    def record_llm(
+        self,
+        messages: Sequence[ChatMessage],
+        text: str,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        latency_s: float,
+    ) -> None:
+        if self.writer is None:
+            return
+        self.llm_calls += 1
+        self.writer.append(
+            {
+                "type": "llm",
+                "session": self.session_id,
+                "op": self.op,
+                "key": llm_request_key(messages),
+                "model": model,
+                "text": text,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "latency_s": latency_s,
+            }
+        )
+
+    def finish(self, **outcome) -> None:
+        if self.writer is None or self._finished:
+            return
+        self._finished = True
+        if _current.get() is self:
+            _current.set(None)
+        self.writer.append(
+            {
+                "type": "step",
+                "session": self.session_id,
+                "ts": self.started_at_utc,
+                "page": self.page,
+                "op": self.op,
+                "user_id": self.user_id,
+                "doc_id": self.doc_id,
+                "args": self.args,
+                "state": self.state,
+                "outcome": outcome,
+                "llm_calls": self.llm_calls,
+                "elapsed_s": time.perf_counter() - self._started,
+            }
+        )
+
+
+_current: ContextVar[Optional[TraceStep]] = ContextVar("trace_step", default=None)
+
+
+def start_trace_step(
+    session_id: str,
+    page: str,
+    op: str,
+    user_id: str = "",
+    doc_id: str = "",
+    state: Optional[dict] = None,
+    **args,
+) -> TraceStep:
+    """
+    Starts a step and makes it current for the rest of this context (e.g.
+    a Streamlit script run) until `finish`.
+    """
+    step = TraceStep(
+        session_id=session_id,
+        page=page,
+        op=op,
+        user_id=user_id,
+        doc_id=doc_id,
+        args=args,
+        state=state or {},
+    )
+    if not tracing_enabled():
+        return step
+    step.writer = get_trace_writer(session_id)
+    step.started_at_utc = datetime.now(timezone.utc).isoformat()
+    step._started = time.perf_counter()
+    _current.set(step)
+    return step
+
+
+@contextmanager
+def traced_step(session_id: str, page: str, op: str, **kwargs) -> Iterator[TraceStep]:
+    """
+    Block form of `start_trace_step`; the caller passes the outcome to
+    `finish` inside the block. A failed step is written with its error.
+    """
+    step = start_trace_step(session_id, page, op, **kwargs)
+    try:
+        yield step
+    except Exception as exc:
+        step.finish(error=type(exc).__name__)
+        raise
+    finally:
+        step.finish()
+
+
+def record_llm_response(
+    messages: Sequence[ChatMessage],
+    text: str,
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    latency_s: float,
+) -> None:
+    """
+    Called by the LLM scheduler for every completed call; kept only inside a traced step.
+    """
+    step = _current.get()
+    if step is not None:
+        step.record_llm(messages, text, model, prompt_tokens, completion_tokens, latency_s)
+
+
+def trace_active() -> bool:
+    step = _current.get()
+    return step is not None and step.writer is not None
+
+
+# ---------------------------------------------------------------------
+# Reading traces back
+# ---------------------------------------------------------------------
+def trace_files(spec: str) -> List[Path]:
+    """
+    Comma-separated .jsonl files and/or directories of them.
+    """
+    files: List[Path] = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        path = Path(item)
+        files.extend(sorted(path.glob("*.jsonl")) if path.is_dir() else [path])
+    return files
+
+
+def read_trace(path: Path) -> List[dict]:
+    records: List[dict] = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A line cut short by a crash; the rest of the trace is still usable
+                continue
+    return records
+
+
+def load_recorded_responses(paths: Sequence[Path]) -> Dict[str, List[dict]]:
+    """
+    LLM records by request key, in recording order.
+    """
+    responses: Dict[str, List[dict]] = {}
+    for path in paths:
+        for record in read_trace(path):
+            if record.get("type") == "llm":
+                responses.setdefault(record["key"], []).append(record)
+    return responses
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+from functools import lru_cache
+from typing import Tuple
+
+from core.telemetry.metrics import span
+
+_OP = re.compile(r"^\s*(\w+)")
+_TABLE = re.compile(
+    r"\b(?:FROM|INTO|UPDATE|TABLE(?:\s+IF\s+NOT\s+EXISTS)?|ON)\s+(\w+)",
+    re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=512)
+def _describe(sql: str) -> Tuple[str, str]:
+    # Statements are literals in the stores, so this cache stays small
+    op = _OP.match(sql)
+    table = _TABLE.search(sql)
+    return (op.group(1).lower() if op else "", table.group(1) if table else "")
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    sqlite3 connection that times every statement into the "sqlite"
+    histogram, labelled by verb and table. Use as
+    `sqlite3.connect(path, factory=TimedConnection)`.
+    """
+
+    def execute(self, sql: str, parameters=(), /) -> sqlite3.Cursor:
+        op, table = _describe(sql)
+        with span("sqlite", op=op, table=table):
+            return super().execute(sql, parameters)
+
+    def executemany(self, sql: str, parameters, /) -> sqlite3.Cursor:
+        op, table = _describe(sql)
+        with span("sqlite", op=op, table=table):
+            return super().executemany(sql, parameters)
+
+    def commit(self) -> None:
+        with span("sqlite", op="commit", table=""):
+            super().commit()
@@ -3,6 +3,9 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Iterable, List, Dict, Any
 
+from core.telemetry.metrics import timed
+from core.telemetry.profiling import profile
+
 
 @dataclass(frozen=True)
 class Chunk:
@@ -29,6 +32,8 @@ class SimpleTextChunker:
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
 
+    @timed("text.chunk")
+    @profile("text.chunk")
     def chunk_pages(self, doc_id: str, pages: Iterable[tuple[int, str]]) -> List[Chunk]:
         """
         pages: iterable of (page_number, text)
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence, Tuple
+
+from core.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio for English text, used when no tokenizer is available
+_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def _encoding_for(model: str) -> Any:
+    """
+    Local tiktoken encoding for `model`, or None if tiktoken is missing or its
+    BPE file is not cached on this machine (air-gapped boxes).
+    """
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        logger.info("No local tokenizer for %s; using a character heuristic", model)
+        return None
+
+
+class TokenCounter:
+    """
+    Counts tokens with the model's tokenizer when it is available locally,
+    otherwise with a ~4 chars/token heuristic.
+    """
+
+    def __init__(self, model: str) -> None:
+        self.model = model
+
+    @property
+    def _encoding(self) -> Any:
+        # Resolved on first count: importing tiktoken and loading BPE ranks is slow
+        return _encoding_for(self.model)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return self.estimate(text)
+
+    @staticmethod
+    def estimate(text: str) -> int:
+        """
+        Character-heuristic count; no tokenizer pass.
+        """
+        return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            if len(tokens) <= max_tokens:
+                return text
+            return self._encoding.decode(tokens[:max_tokens])
+        return text[: max_tokens * _CHARS_PER_TOKEN]
+
+
+@dataclass(frozen=True)
+class BudgetReport:
+    # input_tokens is exact for the chunks considered and estimated for those
+    # dropped after the budget filled up
+    budget_tokens: int
+    input_tokens: int
+    used_tokens: int
+    chunks_in: int
+    chunks_kept: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.input_tokens - self.used_tokens
+
+
+class ContextBudgeter:
+    """
+    Ranks and trims prompt context to a per-model token budget.
+
+    Chunks are taken best-first (by score when given, else in input order);
+    the first chunk that does not fit is truncated if a useful amount of
+    budget is left, and everything after it is dropped.
+    """
+
+    MIN_PARTIAL_TOKENS = 64
+
+    def __init__(self, model: str, budget_tokens: int) -> None:
+        self.model = model
+        self.budget_tokens = budget_tokens
+        self.counter = TokenCounter(model)
+
+        self._lock = threading.Lock()
+        self.total_input_tokens = 0
+        self.total_used_tokens = 0
+
+    @classmethod
+    def for_model(cls, model: str) -> "ContextBudgeter":
+        settings = get_settings()
+        budget = settings.context_token_budgets.get(model, settings.context_token_budget)
+        return cls(model=model, budget_tokens=budget)
+
+    @property
+    def total_tokens_saved(self) -> int:
+        return self.total_input_tokens - self.total_used_tokens
+
+    def _record(self, report: BudgetReport) -> None:
+        with self._lock:
+            self.total_input_tokens += report.input_tokens
+            self.total_used_tokens += report.used_tokens
+        if report.tokens_saved:
+            logger.debug(
+                "Context budget %s: kept %d/%d chunks, %d/%d tokens (saved %d)",
+                self.model, report.chunks_kept, report.chunks_in,
+                report.used_tokens, report.input_tokens, report.tokens_saved,
+            )
+
+    def fit_chunks(
+        self,
+        chunks: List[dict],
+        scores: Optional[Sequence[float]] = None,
+    ) -> Tuple[List[dict], BudgetReport]:
+        order = list(range(len(chunks)))
+        if scores is not None:
+            order.sort(key=lambda i: scores[i], reverse=True)
+
+        remaining = self.budget_tokens
+        input_tokens = 0
+        kept: List[dict] = []
+
+        # Tokenize only until the budget is full; callers may pass a whole document
+        for n, i in enumerate(order):
+            count = self.counter.count(chunks[i]["text"])
+            input_tokens += count
+            if count <= remaining:
+                kept.append(chunks[i])
+                remaining -= count
+                continue
+            if remaining >= self.MIN_PARTIAL_TOKENS:
+                kept.append({**chunks[i], "text": self.counter.truncate(chunks[i]["text"], remaining)})
+                remaining = 0
+            input_tokens += sum(self.counter.estimate(chunks[j]["text"]) for j in order[n + 1:])
+            break
+
+        report = BudgetReport(
+            budget_tokens=self.budget_tokens,
+            input_tokens=input_tokens,
+            used_tokens=self.budget_tokens - remaining,
+            chunks_in=len(chunks),
+            chunks_kept=len(kept),
+        )
+        self._record(report)
+        return kept, report
+
+    def fit_text(self, text: str) -> Tuple[str, BudgetReport]:
+        tokens = self.counter.count(text)
+        fitted = text if tokens <= self.budget_tokens else self.counter.truncate(text, self.budget_tokens)
+
+        report = BudgetReport(
+            budget_tokens=self.budget_tokens,
+            input_tokens=tokens,
+            used_tokens=min(tokens, self.budget_tokens),
+            chunks_in=1,
+            chunks_kept=1 if fitted else 0,
+        )
+        self._record(report)
+        return fitted, report
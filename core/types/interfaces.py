@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, List, Protocol, runtime_checkable
+
+
+@dataclass(frozen=True)
+class ChatMessage:
+    role: str        # system | user | assistant
+    content: str
+
+
+@dataclass(frozen=True)
+class LLMResult:
+    text: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+@runtime_checkable
+class LLMProvider(Protocol):
+    """
+    What every generator in core/llm depends on.
+    Implementations: LLMGateway (OpenAI), OfflineLLMProvider (deterministic, local).
+    """
+
+    model: str
+
+    def complete(self, messages: List[ChatMessage], temperature: float = 0.0) -> LLMResult:
+        ...
+
+    async def acomplete(self, messages: List[ChatMessage], temperature: float = 0.0) -> LLMResult:
+        ...
+
+    def stream(self, messages: List[ChatMessage], temperature: float = 0.0) -> Iterator[str]:
+        ...
+
+    def astream(self, messages: List[ChatMessage], temperature: float = 0.0) -> AsyncIterator[str]:
+        ...
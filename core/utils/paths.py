@@ -1,15 +1,42 @@
+from functools import lru_cache
 from pathlib import Path
+from typing import Any
+
+from core.config.settings import get_settings
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DATA_DIR = PROJECT_ROOT / "data"
-UPLOADS_DIR = DATA_DIR / "uploads"
-VECTORSTORE_DIR = DATA_DIR / "vectorstore"
-MEMORY_DIR = DATA_DIR / "memory"
-PROCESSED_DIR = DATA_DIR / "processed"
 
-REGISTRY_DB_PATH = DATA_DIR / "memory" / "registry.sqlite3"
+# Directories under DATA_DIR, exposed as module attributes
+_DATA_SUBDIRS = {
+    "UPLOADS_DIR": ("uploads",),
+    "VECTORSTORE_DIR": ("vectorstore",),
+    "MEMORY_DIR": ("memory",),
+    "PROCESSED_DIR": ("processed",),
+    "METRICS_DIR": ("metrics",),
+    "PROFILES_DIR": ("profiles",),
+    "TRACES_DIR": ("traces",),
+    "REGISTRY_DB_PATH": ("memory", "registry.sqlite3"),
+}
+
+
+@lru_cache(maxsize=None)
+def data_dir() -> Path:
+    """
+    TUTOR_DATA_DIR (environment or .env) points a process, e.g. a benchmark,
+    at a throwaway data directory. Resolved on first use, not at import.
+    """
+    return Path(get_settings().data_dir or PROJECT_ROOT / "data")
+
+
+def __getattr__(name: str) -> Any:
+    # `from core.utils.paths import DATA_DIR` keeps working, lazily
+    if name == "DATA_DIR":
+        return data_dir()
+    if name in _DATA_SUBDIRS:
+        return data_dir().joinpath(*_DATA_SUBDIRS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def ensure_data_dirs() -> None:
-    for p in (UPLOADS_DIR, VECTORSTORE_DIR, MEMORY_DIR, PROCESSED_DIR):
-        p.mkdir(parents=True, exist_ok=True)
+    for name in ("UPLOADS_DIR", "VECTORSTORE_DIR", "MEMORY_DIR", "PROCESSED_DIR", "METRICS_DIR"):
+        __getattr__(name).mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import pytest
+
+from core.llm.answer_generator import GroundedAnswer
+from core.storage.answer_cache import SQLiteAnswerCache, _hamming, normalize_question, question_terms, simhash
+
+CHUNKS = ["c1", "c2", "c3", "c4"]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SQLiteAnswerCache(tmp_path / "cache.sqlite3")
+
+
+def _put(cache: SQLiteAnswerCache, question: str, chunk_ids=CHUNKS, text: str = "cached") -> None:
+    cache.put("doc1", "m", question, chunk_ids, GroundedAnswer(answer=text, citations=[{"chunk_id": "c1"}]))
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("What is overfitting?", "define overfitting"),
+        ("Explain gradient descent", "gradient descent: please explain"),
+        ("What are the learning rates?", "learning rate"),
+    ],
+)
+def test_normalization_drops_framing_order_and_plurals(a, b):
+    assert normalize_question(a) == normalize_question(b)
+
+
+def test_normalization_of_framing_only_questions_is_empty():
+    assert question_terms("What is it about, please?") == frozenset({"it"})
+    assert question_terms("what is the meaning?") == frozenset()
+
+
+def test_simhash_distance():
+    terms = question_terms("difference between bias and variance")
+
+    assert simhash(terms) == simhash(question_terms("variance and bias: the difference between"))
+    assert _hamming(simhash(terms), simhash(terms)) == 0
+    assert _hamming(simhash(terms), simhash(question_terms("difference between bias and noise"))) > 0
+    # Stored as a signed 64-bit SQLite integer
+    assert -(1 << 63) <= simhash(terms) < (1 << 63)
+
+
+def test_near_duplicate_question_hits(cache):
+    _put(cache, "What is overfitting?")
+
+    hit = cache.lookup("doc1", "m", "Define overfitting please", CHUNKS)
+
+    assert hit is not None
+    assert hit.answer.answer == "cached"
+    assert hit.question_similarity == 1.0
+
+
+def test_differing_only_in_stop_words_hits(cache):
+    _put(cache, "difference between bias and variance in regularization")
+
+    hit = cache.lookup("doc1", "m", "so the difference between bias and variance in regularization", CHUNKS)
+
+    assert hit is not None
+
+
+def test_one_changed_term_misses(cache):
+    _put(cache, "difference between bias and variance")
+
+    assert cache.lookup("doc1", "m", "difference between bias and noise", CHUNKS) is None
+    assert cache.lookup("doc1", "m", "difference between bias and variance and noise", CHUNKS) is None
+
+
+def test_different_chunks_miss(cache):
+    _put(cache, "What is overfitting?", chunk_ids=["c1", "c2"])
+
+    assert cache.lookup("doc1", "m", "What is overfitting?", ["c3", "c4"]) is None
+    assert cache.lookup("doc1", "m", "What is overfitting?", ["c1", "c2", "c3"]) is not None
+
+
+def test_lookup_is_scoped_to_document_and_model(cache):
+    _put(cache, "What is overfitting?")
+
+    assert cache.lookup("doc2", "m", "What is overfitting?", CHUNKS) is None
+    assert cache.lookup("doc1", "other-model", "What is overfitting?", CHUNKS) is None
+
+
+def test_best_match_wins_and_hits_are_counted(cache):
+    _put(cache, "What is overfitting?", chunk_ids=["c1", "c2", "c9"], text="older")
+    _put(cache, "What is overfitting?", text="closer")
+
+    hit = cache.lookup("doc1", "m", "overfitting", CHUNKS)
+
+    assert hit.answer.answer == "closer"
+    with cache._connect() as conn:
+        hits = dict(conn.execute("SELECT answer, hits FROM answer_cache").fetchall())
+    assert hits == {"older": 0, "closer": 1}
+
+
+def test_framing_only_questions_are_never_cached(cache):
+    _put(cache, "What is the meaning?")
+
+    assert cache.lookup("doc1", "m", "What is the meaning?", CHUNKS) is None
+
+
+def test_delete_doc(cache):
+    _put(cache, "What is overfitting?")
+    cache.delete_doc("doc1")
+
+    assert cache.lookup("doc1", "m", "What is overfitting?", CHUNKS) is None
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import server
+from core.config.settings import get_settings
+from core.llm import provider
+from core.retrieval import index_cache
+from core.storage.chunk_store import JSONLChunkStore
+from core.storage.lesson_plan_store import LessonPlanRow, SQLiteLessonPlanStore
+from core.storage.processing_registry import ProcessingRecord, SQLiteProcessingRegistry
+from core.text.chunker import Chunk
+from core.utils import paths
+
+TEXTS = [
+    "Overfitting happens when a model memorizes training data and fails to generalize.",
+    "Regularization adds a penalty to model complexity to reduce overfitting.",
+    "Gradient descent updates parameters in the direction of the negative gradient.",
+    "Cross validation estimates generalization error by splitting data into folds.",
+    "Learning rate controls the step size of each parameter update.",
+    "Early stopping halts training when validation loss stops improving.",
+]
+ANSWER = "Overfitting happens when a model memorizes training data and fails to generalize."
+
+
+def _seed(doc_id: str) -> None:
+    paths.ensure_data_dirs()
+    db_path = Path(paths.REGISTRY_DB_PATH)
+    JSONLChunkStore(Path(paths.PROCESSED_DIR)).save(
+        doc_id,
+        [
+            Chunk(
+                chunk_id=f"{doc_id}::c{i}",
+                text=text,
+                metadata={"doc_id": doc_id, "page_number": i // 2 + 1, "chunk_index": i},
+            )
+            for i, text in enumerate(TEXTS)
+        ],
+    )
+    SQLiteLessonPlanStore(db_path).save(
+        doc_id=doc_id,
+        steps=[
+            LessonPlanRow(doc_id, 0, "Overfitting", "Generalization", "explain"),
+            LessonPlanRow(doc_id, 1, "Regularization", "Penalties", "quiz"),
+        ],
+    )
+    SQLiteProcessingRegistry(db_path).upsert(
+        ProcessingRecord(
+            doc_id=doc_id, status="processed", num_pages=3, num_chunks=len(TEXTS),
+            processed_at_utc="2026-01-01T00:00:00+00:00", error=None,
+        )
+    )
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """
+    The API over a fresh data directory and the offline LLM backend.
+    """
+    monkeypatch.setenv("TUTOR_DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("LLM_PROVIDER", "offline")
+    monkeypatch.setattr(provider, "_schedulers", {})
+    monkeypatch.setattr(index_cache, "_cache", None)
+
+    def clear() -> None:
+        get_settings.cache_clear()
+        paths.data_dir.cache_clear()
+        server.get_tutor_service.cache_clear()
+
+    clear()
+    _seed("doc1")
+    # Without `with`, the lifespan's background warm-up does not start
+    yield TestClient(server.app)
+    clear()
+
+
+def _quiz(client: TestClient, user_id: str) -> dict:
+    """
+    Starts the learner, then lifts their mastery into the quiz band.
+    """
+    client.get(f"/learners/{user_id}/docs/doc1/next")
+    memory = server.get_tutor_service().services.memory
+    memory.upsert(replace(memory.get(user_id, "doc1"), mastery_score=0.5))
+
+    step = client.get(f"/learners/{user_id}/docs/doc1/next").json()
+    assert step["action"] == "quiz"
+    return step
+
+
+def _submit(client: TestClient, user_id: str, step: dict, answer: str = ANSWER, question: str = ""):
+    return client.post(
+        f"/learners/{user_id}/docs/doc1/answers",
+        json={"step_index": step["step_index"], "question": question or step["content"], "answer": answer},
+    )
+
+
+def test_ask_answers_from_the_document(client):
+    response = client.post("/docs/doc1/ask", json={"question": "What is overfitting"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["answer"]
+    assert body["sources"][0]["chunk_id"] == "doc1::c0"
+    assert body["cached_question"] is None
+
+    again = client.post("/docs/doc1/ask", json={"question": "define overfitting"}).json()
+    assert again["cached_question"] == "What is overfitting"
+    assert again["answer"] == body["answer"]
+
+
+def test_ask_validates_the_request(client):
+    assert client.post("/docs/doc1/ask", json={"question": ""}).status_code == 422
+    assert client.post("/docs/doc1/ask", json={"question": "x", "top_k": 50}).status_code == 422
+
+
+def test_next_then_submit(client):
+    first = client.get("/learners/u1/docs/doc1/next")
+    assert first.status_code == 200
+    # New learners start below the quiz band
+    assert (first.json()["action"], first.json()["step_index"]) == ("review", 0)
+    assert first.json()["content"]
+
+    quiz = _quiz(client, "u1")
+    response = _submit(client, "u1", quiz)
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["step_index"] == quiz["step_index"]
+    assert 0.0 <= result["score"] <= 1.0
+    assert result["recall"] is False
+
+
+def test_unknown_document_is_404(client):
+    assert client.post("/docs/nope/ask", json={"question": "What is overfitting?"}).status_code == 404
+    assert client.get("/learners/u1/docs/nope/next").status_code == 404
+
+
+def test_submitting_before_starting_is_404(client):
+    response = _submit(client, "u1", {"step_index": 0, "content": "q"})
+
+    assert response.status_code == 404
+
+
+def test_unserved_question_is_400(client):
+    quiz = _quiz(client, "u1")
+
+    assert _submit(client, "u1", quiz, question="A question nobody asked?").status_code == 400
+    assert _submit(client, "u1", {**quiz, "step_index": 1}).status_code == 400
+    assert _submit(client, "u1", quiz, answer="   ").status_code == 400
+    # The served question is still open
+    assert _submit(client, "u1", quiz).status_code == 200
+    # ...and only graded once
+    assert _submit(client, "u1", quiz).status_code == 400
+
+
+def test_stale_state_is_409_and_records_nothing(client, monkeypatch):
+    services = server.get_tutor_service().services
+    quiz = _quiz(client, "u1")
+    upsert = services.memory.upsert
+
+    def concurrent_write_first(state):
+        # Another worker saves the learner between this request's read and write
+        monkeypatch.setattr(services.memory, "upsert", upsert)
+        upsert(services.memory.get("u1", "doc1"))
+        return upsert(state)
+
+    monkeypatch.setattr(services.memory, "upsert", concurrent_write_first)
+
+    assert _submit(client, "u1", quiz).status_code == 409
+    assert services.attempt_store.list_for_step("u1", "doc1", quiz["step_index"]) == []
+
+    # A retry goes through
+    assert _submit(client, "u1", quiz).status_code == 200
+    assert len(services.attempt_store.list_for_step("u1", "doc1", quiz["step_index"])) == 1
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import List
+
+import httpx
+import openai
+import pytest
+
+from core.llm.gateway import GatewayConfig, LLMGateway
+from core.types.interfaces import ChatMessage
+
+MESSAGES = [ChatMessage(role="user", content="What is overfitting?")]
+
+
+def _completion(text: str) -> dict:
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o-mini",
+        "choices": [
+            {"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}
+        ],
+        "usage": {"prompt_tokens": 5, "completion_tokens": 2, "total_tokens": 7},
+    }
+
+
+class ScriptedAPI:
+    """
+    A chat completions endpoint that answers with the given status codes in
+    order (200 once they run out), optionally holding each request open.
+    """
+
+    def __init__(self, statuses: List[int] = (), delay_s: float = 0.0) -> None:
+        self.statuses = list(statuses)
+        self.delay_s = delay_s
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay_s)
+            status = self.statuses.pop(0) if self.statuses else 200
+            if status != 200:
+                return httpx.Response(status, headers={"retry-after": "0"}, json={"error": {"message": "busy"}})
+            prompt = json.loads(request.content)["messages"][-1]["content"]
+            return httpx.Response(200, json=_completion(f"re: {prompt}"))
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def make_gateway():
+    gateways: List[LLMGateway] = []
+
+    def make(api: ScriptedAPI, **config) -> LLMGateway:
+        config = {"max_retries": 3, "backoff_base_s": 0.001, "backoff_max_s": 0.01, **config}
+        gateway = LLMGateway(
+            GatewayConfig(model="gpt-4o-mini", api_key="sk-test", base_url="http://llm.test/v1", **config),
+            http_transport=httpx.MockTransport(api),
+        )
+        gateways.append(gateway)
+        return gateway
+
+    yield make
+    for gateway in gateways:
+        gateway.close()
+
+
+def test_retries_after_rate_limit_and_server_errors(make_gateway):
+    api = ScriptedAPI(statuses=[429, 503])
+
+    result = make_gateway(api).complete(MESSAGES)
+
+    assert result.text == "re: What is overfitting?"
+    assert (result.prompt_tokens, result.completion_tokens) == (5, 2)
+    assert api.requests == 3
+
+
+def test_gives_up_after_max_retries(make_gateway):
+    api = ScriptedAPI(statuses=[429] * 10)
+
+    with pytest.raises(openai.RateLimitError):
+        make_gateway(api, max_retries=2).complete(MESSAGES)
+
+    assert api.requests == 3
+
+
+def test_client_errors_are_not_retried(make_gateway):
+    api = ScriptedAPI(statuses=[400])
+
+    with pytest.raises(openai.BadRequestError):
+        make_gateway(api).complete(MESSAGES)
+
+    assert api.requests == 1
+
+
+def test_concurrent_calls_are_capped_by_the_semaphore(make_gateway):
+    api = ScriptedAPI(delay_s=0.05)
+    gateway = make_gateway(api, max_concurrency=2)
+
+    async def many() -> list:
+        return await asyncio.gather(
+            *(gateway.acomplete([ChatMessage(role="user", content=f"q{i}")]) for i in range(6))
+        )
+
+    results = asyncio.run(many())
+
+    assert [r.text for r in results] == [f"re: q{i}" for i in range(6)]
+    assert api.requests == 6
+    assert api.peak_in_flight == 2
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from core.retrieval.index_cache import DocIndexCache, estimate_chunks_bytes, estimate_index_bytes
+
+
+def _chunks(doc_id: str, n: int = 20) -> list:
+    return [
+        {
+            "chunk_id": f"{doc_id}-{i:03d}",
+            "text": f"gradient descent updates parameters {i:03d} " * 8,
+            "metadata": {"page": i},
+        }
+        for i in range(n)
+    ]
+
+
+def _loader(doc_id: str, n: int = 20, calls: list | None = None):
+    def load() -> list:
+        if calls is not None:
+            calls.append(doc_id)
+        return _chunks(doc_id, n)
+
+    return load
+
+
+SIZE = estimate_chunks_bytes(_chunks("a"))
+
+
+def test_evicts_least_recently_used_first():
+    cache = DocIndexCache(max_bytes=int(SIZE * 2.5))
+    cache.chunks("a", "v1", _loader("a"))
+    cache.chunks("b", "v1", _loader("b"))
+    cache.chunks("a", "v1", _loader("a"))      # a is now the most recent
+    cache.chunks("c", "v1", _loader("c"))
+
+    stats = cache.stats()
+    assert cache.cached_doc_ids() == ["a", "c"]
+    assert stats.evictions == 1
+    assert stats.bytes == 2 * SIZE <= stats.max_bytes
+    assert (stats.hits, stats.misses) == (1, 3)
+
+
+def test_evicts_as_many_entries_as_needed():
+    cache = DocIndexCache(max_bytes=int(SIZE * 3.5))
+    for doc_id in ("a", "b", "c"):
+        cache.chunks(doc_id, "v1", _loader(doc_id))
+
+    cache.chunks("big", "v1", _loader("big", n=50))
+
+    assert cache.cached_doc_ids() == ["c", "big"]
+    assert cache.stats().evictions == 2
+    assert cache.stats().bytes <= cache.max_bytes
+
+
+def test_entry_larger_than_the_budget_is_returned_but_not_kept():
+    cache = DocIndexCache(max_bytes=int(SIZE * 1.5))
+    cache.chunks("a", "v1", _loader("a"))
+    calls: list = []
+
+    chunks = cache.chunks("huge", "v1", _loader("huge", n=100, calls=calls))
+    cache.chunks("huge", "v1", _loader("huge", n=100, calls=calls))
+
+    assert len(chunks) == 100
+    assert calls == ["huge", "huge"]
+    # Nothing was evicted to make room for it
+    assert cache.cached_doc_ids() == ["a"]
+    assert cache.stats().evictions == 0
+
+
+def test_retriever_is_built_once_and_counted_against_the_budget():
+    cache = DocIndexCache(max_bytes=SIZE * 10)
+    calls: list = []
+
+    first = cache.retriever("a", "v1", _loader("a", calls=calls))
+    second = cache.retriever("a", "v1", _loader("a", calls=calls))
+
+    assert first is second
+    assert calls == ["a"]
+    assert cache.stats().bytes == SIZE + estimate_index_bytes(first)
+
+
+def test_index_that_does_not_fit_drops_the_entry():
+    cache = DocIndexCache(max_bytes=int(SIZE * 1.2))
+    calls: list = []
+
+    retriever = cache.retriever("a", "v1", _loader("a", calls=calls))
+
+    assert len(retriever.chunks) == 20
+    assert cache.cached_doc_ids() == []
+    assert cache.stats().bytes == 0
+
+
+def test_index_growth_evicts_older_entries():
+    index_size = estimate_index_bytes(DocIndexCache(SIZE * 10).retriever("x", "v1", _loader("x")))
+    # Room for one document with its index, not for two
+    cache = DocIndexCache(max_bytes=SIZE + index_size + SIZE // 2)
+    cache.chunks("a", "v1", _loader("a"))
+    cache.chunks("b", "v1", _loader("b"))
+
+    cache.retriever("b", "v1", _loader("b"))
+
+    assert cache.cached_doc_ids() == ["b"]
+    assert cache.stats().bytes <= cache.max_bytes
+
+
+def test_new_processing_version_misses_and_replaces():
+    cache = DocIndexCache(max_bytes=SIZE * 10)
+    cache.chunks("a", "v1", _loader("a"))
+
+    reloaded = cache.chunks("a", "v2", _loader("a", n=5))
+
+    assert len(reloaded) == 5
+    assert cache.stats().entries == 1
+    assert cache.stats().bytes == estimate_chunks_bytes(reloaded)
+
+
+def test_empty_documents_are_not_cached():
+    cache = DocIndexCache(max_bytes=SIZE * 10)
+
+    assert cache.retriever("empty", "v1", lambda: []) is None
+    assert cache.cached_doc_ids() == []
+
+
+def test_invalidate_frees_the_bytes():
+    cache = DocIndexCache(max_bytes=SIZE * 10)
+    cache.retriever("a", "v1", _loader("a"))
+    cache.invalidate("a")
+
+    assert cache.stats().entries == 0
+    assert cache.stats().bytes == 0
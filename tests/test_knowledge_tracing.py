@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import random
+
+import numpy as np
+import pytest
+
+from core.agents.knowledge_tracing import DEFAULT_PARAMS, BKTParams, KnowledgeTracer, bkt_update, trace
+from core.memory.knowledge_state import SQLiteKnowledgeStore
+
+
+def _scalar_trace(scores, params: BKTParams) -> float:
+    p = params.p_init
+    for score in scores:
+        p = bkt_update(p, score, params)
+    return p
+
+
+def _history(seed: int = 3):
+    """
+    Quiz history ordered by (doc_id, step_index, user_id, time), as recompute expects.
+    """
+    rng = random.Random(seed)
+    history = []
+    for step_index in range(3):
+        for user in range(6):
+            for _ in range(rng.randint(1, 8)):
+                history.append((f"u{user}", "doc1", step_index, rng.choice((0.0, 0.3, 0.7, 1.0))))
+    return history
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    return KnowledgeTracer(SQLiteKnowledgeStore(tmp_path / "kt.sqlite3"), min_obs=5)
+
+
+def test_vectorized_trace_matches_scalar_updates():
+    rng = random.Random(11)
+    sequences = [[rng.random() for _ in range(rng.randint(1, 12))] for _ in range(20)]
+    params = [
+        BKTParams(rng.uniform(0.1, 0.6), rng.uniform(0.05, 0.35), rng.uniform(0.1, 0.3), rng.uniform(0.05, 0.2))
+        for _ in sequences
+    ]
+
+    width = max(len(s) for s in sequences)
+    obs = np.zeros((len(sequences), width))
+    mask = np.zeros(obs.shape, dtype=bool)
+    for i, scores in enumerate(sequences):
+        obs[i, :len(scores)] = scores
+        mask[i, :len(scores)] = True
+
+    columns = [np.array([getattr(p, name) for p in params]) for name in ("p_init", "p_learn", "p_guess", "p_slip")]
+    p_known, _ = trace(obs, mask, *columns)
+
+    expected = [_scalar_trace(scores, p) for scores, p in zip(sequences, params)]
+    np.testing.assert_allclose(p_known, expected, rtol=1e-12)
+
+
+def test_grid_columns_score_each_candidate_like_a_single_run():
+    obs = np.array([[1.0, 0.0, 1.0], [0.7, 0.0, 0.0]])
+    mask = np.array([[True, True, True], [True, True, False]])
+    grid = np.array([[0.3, 0.15, 0.2, 0.1], [0.6, 0.05, 0.3, 0.2]])
+
+    p_all, ll_all = trace(obs, mask, grid[:, 0:1], grid[:, 1:2], grid[:, 2:3], grid[:, 3:4])
+    for row, g in enumerate(grid):
+        p_one, ll_one = trace(obs, mask, *g)
+        np.testing.assert_allclose(p_all[row], p_one)
+        np.testing.assert_allclose(ll_all[row], ll_one)
+
+
+def test_incremental_updates_equal_full_recompute(tracer):
+    history = _history()
+    tracer.recompute(history)
+
+    by_sequence = {}
+    for user_id, doc_id, step_index, score in history:
+        by_sequence.setdefault((user_id, doc_id, step_index), []).append(score)
+
+    for (user_id, doc_id, step_index), scores in by_sequence.items():
+        state = tracer.store.get_state(user_id, doc_id, step_index)
+        params = tracer.params_for(doc_id, step_index)
+        assert state.n_obs == len(scores)
+        assert state.p_known == pytest.approx(_scalar_trace(scores, params), rel=1e-12)
+
+
+def test_live_update_continues_the_recomputed_state(tracer):
+    history = _history()
+    tracer.recompute(history)
+    params = tracer.params_for("doc1", 1)
+    scores = [score for user_id, _, step_index, score in history if user_id == "u2" and step_index == 1]
+
+    state = tracer.update("u2", "doc1", 1, 1.0)
+
+    assert state.n_obs == len(scores) + 1
+    assert state.p_known == pytest.approx(_scalar_trace(scores + [1.0], params), rel=1e-12)
+    assert tracer.store.get_state("u2", "doc1", 1) == state
+
+
+def test_next_state_does_not_save(tracer):
+    state = tracer.next_state("u1", "doc1", 0, 1.0)
+
+    assert state.p_known == pytest.approx(bkt_update(DEFAULT_PARAMS.p_init, 1.0, DEFAULT_PARAMS))
+    assert tracer.store.get_state("u1", "doc1", 0) is None
+
+
+def test_prior_is_the_stored_state_or_the_fitted_initial_value(tracer):
+    tracer.recompute(_history())
+    stored = tracer.store.get_state("u1", "doc1", 0)
+
+    assert tracer.prior("u1", "doc1", 0) == stored.p_known
+    assert tracer.prior("new", "doc1", 0) == tracer.params_for("doc1", 0).p_init
+    assert tracer.prior("new", "doc2", 0) == DEFAULT_PARAMS.p_init
+
+
+def test_delete_doc_drops_params_and_states(tracer):
+    tracer.recompute(_history() + [("u1", "doc2", 0, 1.0)])
+
+    tracer.store.delete_doc("doc1")
+
+    assert tracer.store.get_params("doc1", 0) is None
+    assert tracer.mastery("u1", "doc1") == {}
+    assert tracer.mastery("u1", "doc2") != {}
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import importlib
+
+import pytest
+
+from core.config.settings import get_settings
+from core.utils import paths
+
+
+@pytest.fixture
+def fresh_settings():
+    get_settings.cache_clear()
+    paths.data_dir.cache_clear()
+    yield
+    get_settings.cache_clear()
+    paths.data_dir.cache_clear()
+
+
+def test_import_does_not_build_settings(fresh_settings):
+    importlib.reload(paths)
+
+    assert get_settings.cache_info().currsize == 0
+
+
+def test_data_dir_follows_the_environment_at_first_use(fresh_settings, monkeypatch, tmp_path):
+    importlib.reload(paths)
+    monkeypatch.setenv("TUTOR_DATA_DIR", str(tmp_path))
+
+    assert paths.DATA_DIR == tmp_path
+    assert paths.REGISTRY_DB_PATH == tmp_path / "memory" / "registry.sqlite3"
+
+    paths.ensure_data_dirs()
+    assert (tmp_path / "uploads").is_dir() and (tmp_path / "metrics").is_dir()
+
+
+def test_unknown_names_raise(fresh_settings):
+    with pytest.raises(AttributeError):
+        paths.NOT_A_DIR
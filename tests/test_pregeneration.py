@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import List, Sequence
+
+from core.planning.pregeneration import LessonPregenerator, PregenerationJob, start_pregeneration
+from core.storage.lesson_content_store import SQLiteLessonContentStore
+from core.storage.lesson_plan_store import LessonPlanRow, SQLiteLessonPlanStore, plan_version
+from core.storage.question_bank import SQLiteQuestionBank
+
+CHUNKS = [
+    {"chunk_id": "c1", "text": "Gradient descent updates parameters along the negative gradient.", "metadata": {}},
+    {"chunk_id": "c2", "text": "Regularization adds a penalty on model complexity.", "metadata": {}},
+    {"chunk_id": "c3", "text": "Cross validation estimates generalization error with folds.", "metadata": {}},
+]
+
+
+class SlowGenerator:
+    """
+    Stands in for TutorContentGenerator: counts calls and takes a while.
+    """
+
+    def __init__(self, delay_s: float = 0.02) -> None:
+        self.delay_s = delay_s
+        self.calls: List[str] = []
+
+    async def aexplain(self, context: str, difficulty: str) -> str:
+        self.calls.append("explain")
+        await asyncio.sleep(self.delay_s)
+        return f"explanation ({difficulty})"
+
+    async def aquiz(self, context: str, difficulty: str, avoid: Sequence[str] = ()) -> str:
+        self.calls.append("quiz")
+        await asyncio.sleep(self.delay_s)
+        return f"question {len(avoid)} ({difficulty})"
+
+
+def _steps(doc_id: str, topics: Sequence[str]) -> List[LessonPlanRow]:
+    return [
+        LessonPlanRow(doc_id=doc_id, step_index=i, topic=topic, subtopic="", action="explain")
+        for i, topic in enumerate(topics)
+    ]
+
+
+def _pregenerator(tmp_path, generator: SlowGenerator, plan_store=None) -> LessonPregenerator:
+    return LessonPregenerator(
+        generator,
+        SQLiteLessonContentStore(tmp_path / "content.sqlite3"),
+        SQLiteQuestionBank(tmp_path / "bank.sqlite3"),
+        max_concurrency=1,
+        requests_per_second=0,
+        plan_store=plan_store,
+    )
+
+
+def _wait_for(condition, timeout: float = 10.0) -> None:
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_full_run_generates_every_unit(tmp_path):
+    generator = SlowGenerator(delay_s=0)
+    pregenerator = _pregenerator(tmp_path, generator)
+    steps = _steps("doc-full", ["gradient descent", "regularization"])
+
+    job = asyncio.run(pregenerator.run("doc-full", CHUNKS, steps))
+
+    # 2 units x 3 difficulties x (1 explanation + 3 questions)
+    assert job.status == "done"
+    assert (job.total, job.done, job.failed) == (12, 12, 0)
+    assert len(generator.calls) == 24
+    assert pregenerator.question_bank.size("doc-full", 1, "hard") == 3
+
+
+def test_new_plan_stops_the_previous_jobs_llm_calls(tmp_path):
+    old_generator, new_generator = SlowGenerator(), SlowGenerator()
+    old_steps = _steps("doc-resave", ["gradient descent", "regularization", "cross validation"])
+    new_steps = _steps("doc-resave", ["regularization"])
+
+    # Separate stores: the page deletes the old plan's content, which is not under test here
+    (tmp_path / "old").mkdir()
+    (tmp_path / "new").mkdir()
+
+    old_job = start_pregeneration(_pregenerator(tmp_path / "old", old_generator), "doc-resave", CHUNKS, old_steps)
+    _wait_for(lambda: len(old_generator.calls) >= 2)
+    new_job = start_pregeneration(_pregenerator(tmp_path / "new", new_generator), "doc-resave", CHUNKS, new_steps)
+    calls_at_supersede = len(old_generator.calls)
+    _wait_for(lambda: not new_job.active)
+    time.sleep(0.1)
+
+    assert old_job.status == "superseded"
+    assert new_job.status == "done"
+    # At most the call already in flight completes; nothing new is started
+    assert len(old_generator.calls) <= calls_at_supersede + 1
+    assert len(old_generator.calls) < 3 * 3 * 4
+    assert len(new_generator.calls) == 3 * 4
+
+
+def test_plan_resaved_elsewhere_stops_the_job(tmp_path):
+    plan_store = SQLiteLessonPlanStore(tmp_path / "plans.sqlite3")
+    steps = _steps("doc-elsewhere", ["gradient descent", "regularization", "cross validation"])
+    plan_store.save("doc-elsewhere", steps)
+    generator = SlowGenerator(delay_s=0)
+    pregenerator = _pregenerator(tmp_path, generator, plan_store=plan_store)
+
+    # Another process re-saves the plan right after the first write
+    original_add_many = pregenerator.question_bank.add_many
+
+    def add_many_then_resave(*args, **kwargs):
+        original_add_many(*args, **kwargs)
+        plan_store.save("doc-elsewhere", _steps("doc-elsewhere", ["regularization"]))
+
+    pregenerator.question_bank.add_many = add_many_then_resave
+
+    job = PregenerationJob(doc_id="doc-elsewhere", plan_version=plan_version(steps))
+    asyncio.run(pregenerator.run("doc-elsewhere", CHUNKS, steps, job=job))
+
+    assert job.status == "superseded"
+    assert len(generator.calls) < 3 * 3 * 4
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import replace
+
+import pytest
+
+from core.config.settings import get_settings
+from core.llm import provider
+from core.llm.offline_provider import OfflineLLMProvider, stream_pieces
+from core.llm.recorded_provider import RecordedLLMProvider
+from core.telemetry.session_trace import llm_request_key
+from core.types.interfaces import ChatMessage
+
+MESSAGES = [
+    ChatMessage(role="system", content="You are a tutor."),
+    ChatMessage(
+        role="user",
+        content="Context:\nOverfitting happens when a model memorizes training data.\n\nQuestion:\nWhat is overfitting?",
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["", "one", "  leading", "trailing  ", "\n\nBullets:\n- a\n- b\n", "a  b\tc", "   "],
+)
+def test_stream_pieces_join_back_exactly(text):
+    pieces = stream_pieces(text)
+
+    assert "".join(pieces) == text
+    assert all(pieces)
+
+
+def _streamed(llm) -> str:
+    return "".join(llm.stream(MESSAGES))
+
+
+def _astreamed(llm) -> str:
+    async def collect() -> str:
+        return "".join([piece async for piece in llm.astream(MESSAGES)])
+
+    return asyncio.run(collect())
+
+
+def test_offline_stream_matches_complete():
+    llm = OfflineLLMProvider()
+
+    assert _streamed(llm) == llm.complete(MESSAGES).text
+    assert _astreamed(llm) == llm.complete(MESSAGES).text
+
+
+def test_recorded_stream_keeps_whitespace():
+    text = "\n  Overfitting is memorizing.\n\n- It hurts   generalization.\n"
+    llm = RecordedLLMProvider(
+        {llm_request_key(MESSAGES): [{"text": text}]}, fallback=OfflineLLMProvider(), model="m"
+    )
+
+    assert _streamed(llm) == text
+    assert _astreamed(llm) == text
+    assert llm.complete(MESSAGES).text == text
+    assert (llm.hits, llm.misses) == (3, 0)
+
+
+def test_schedulers_sharing_a_model_are_all_listed(monkeypatch):
+    monkeypatch.setattr(provider, "_schedulers", {})
+    settings = get_settings()
+
+    for name in ("offline", "replay"):
+        monkeypatch.setattr(provider, "get_settings", lambda name=name: replace(settings, llm_provider=name))
+        provider.get_llm_provider("gpt-4o-mini", api_key="")
+    # Same provider, model and key: the existing scheduler is reused
+    provider.get_llm_provider("gpt-4o-mini", api_key="")
+
+    schedulers = provider.list_llm_schedulers()
+    assert [s.model for s in schedulers] == ["gpt-4o-mini", "gpt-4o-mini"]
+    assert [type(s.provider) for s in schedulers] == [OfflineLLMProvider, RecordedLLMProvider]
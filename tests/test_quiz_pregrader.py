@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import pytest
+
+from core.llm import quiz_pregrader
+from core.llm.quiz_evaluator import EvaluationResult
+from core.llm.quiz_pregrader import GatedQuizEvaluator, PreGradeStats, QuizPreGrader
+from core.memory.quiz_attempts import QuizAttempt
+
+CONTEXT = (
+    "Regularization adds a penalty on model complexity to the training loss. "
+    "The penalty discourages large weights, which reduces variance and helps "
+    "the model generalize to unseen data instead of memorizing the training set."
+)
+QUESTION = "Why does regularization help a model generalize?"
+
+
+def _attempt(answer: str, score: float = 0.6, question: str = QUESTION) -> QuizAttempt:
+    return QuizAttempt("u1", "doc1", 0, question, answer, score, "Mention variance.", "2026-10-01T00:00:00+00:00")
+
+
+@pytest.fixture
+def pregrader():
+    return QuizPreGrader()
+
+
+@pytest.mark.parametrize("answer", ["", "   ", "?!", "it is what it is"])
+def test_blank(pregrader, answer):
+    result = pregrader.grade(CONTEXT, QUESTION, answer)
+
+    assert (result.resolved, result.reason, result.evaluation.score) == (True, "blank", 0.0)
+
+
+def test_blank_is_not_a_repeat_of_an_earlier_blank(pregrader):
+    result = pregrader.grade(CONTEXT, QUESTION, "it is", previous_attempts=[_attempt("", score=0.0)])
+
+    assert result.reason == "blank"
+
+
+def test_repeat_attempt_reuses_the_previous_score(pregrader):
+    answer = "The penalty keeps weights small so variance goes down."
+    result = pregrader.grade(CONTEXT, QUESTION, answer.upper(), previous_attempts=[_attempt(answer, score=0.6)])
+
+    assert (result.resolved, result.reason, result.evaluation.score) == (True, "repeat_attempt", 0.6)
+    assert "Mention variance." in result.evaluation.feedback
+
+
+def test_same_answer_to_another_question_is_not_a_repeat(pregrader):
+    answer = "The penalty keeps weights small so variance goes down."
+    result = pregrader.grade(CONTEXT, QUESTION, answer, previous_attempts=[_attempt(answer, question="Other?")])
+
+    assert result.reason != "repeat_attempt"
+
+
+def test_restates_question(pregrader):
+    result = pregrader.grade(CONTEXT, QUESTION, "Regularization does help a model generalize.")
+
+    assert (result.resolved, result.reason, result.evaluation.score) == (True, "restates_question", 0.0)
+
+
+def test_copied_context_score_is_configurable():
+    copied = CONTEXT.split(". ")[1]
+    result = QuizPreGrader(copied_context_score=0.25).grade(CONTEXT, QUESTION, copied)
+
+    assert (result.resolved, result.reason, result.evaluation.score) == (True, "copied_context", 0.25)
+    assert QuizPreGrader().grade(CONTEXT, QUESTION, copied).evaluation.score == 0.4
+
+
+def test_short_answers_escalate(pregrader):
+    result = pregrader.grade(CONTEXT, QUESTION, "less variance")
+
+    assert (result.resolved, result.reason, result.evaluation) == (False, "short", None)
+
+
+def test_paraphrase_with_little_overlap_escalates(pregrader):
+    # Correct, but in words the lesson never uses
+    answer = "Constraining coefficients stops overfitting noise, so predictions transfer to fresh examples."
+    result = pregrader.grade(CONTEXT, QUESTION, answer)
+
+    assert (result.resolved, result.reason, result.evaluation) == (False, "low_overlap", None)
+    assert result.context_overlap < 0.1
+
+
+def test_answer_in_lesson_terms_escalates_as_ambiguous(pregrader):
+    answer = "It penalizes complexity so the weights stay small and variance on unseen data drops."
+    result = pregrader.grade(CONTEXT, QUESTION, answer)
+
+    assert (result.resolved, result.reason) == (False, "ambiguous")
+    assert result.key_term_coverage > 0
+
+
+class FakeEvaluator:
+    class llm:
+        model = "fake"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def evaluate(self, context: str, question: str, user_answer: str) -> EvaluationResult:
+        self.calls += 1
+        return EvaluationResult(score=0.8, feedback="Good.")
+
+
+def test_gated_evaluator_only_calls_the_llm_for_escalations(monkeypatch):
+    monkeypatch.setattr(quiz_pregrader, "record_llm_cache_hit", lambda *a, **k: None)
+    evaluator, stats = FakeEvaluator(), PreGradeStats()
+    gated = GatedQuizEvaluator(evaluator, stats=stats)
+
+    assert gated.evaluate(CONTEXT, QUESTION, "").score == 0.0
+    assert gated.evaluate(CONTEXT, QUESTION, "less variance").score == 0.8
+
+    assert evaluator.calls == 1
+    assert (stats.total, stats.escalated) == (2, 1)
+    assert stats.by_reason == {"blank": 1, "short": 1}
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from core.llm import scheduler as scheduler_module
+from core.llm.context import LLMCallTags, llm_tags
+from core.llm.offline_provider import OfflineLLMProvider
+from core.llm.scheduler import LLMScheduler, TokenBucket, _Ticket
+
+
+class FakeClock:
+    """
+    Stands in for the `time` module inside the scheduler, so buckets only
+    refill when a test says so.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+
+def _wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError("timed out waiting for the scheduler")
+        time.sleep(0.005)
+
+
+def _queued(scheduler: LLMScheduler) -> int:
+    with scheduler._cond:
+        return sum(len(q) for tenants in scheduler._queues.values() for q in tenants.values())
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(scheduler_module, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def drained(clock):
+    """
+    One request per simulated second and an empty bucket: nothing is granted
+    until the test advances the clock.
+    """
+    scheduler = LLMScheduler(OfflineLLMProvider(), requests_per_minute=60, bulk_reserve=0.0)
+    scheduler.rpm._tokens = 0.0
+    scheduler.rpm._updated = clock.now
+    return scheduler
+
+
+def _grant_order(scheduler: LLMScheduler, clock: FakeClock, requests) -> list:
+    """
+    Queues (priority, tenant, label) requests in order, then frees one
+    request of capacity at a time and returns the labels as granted.
+    """
+    order: list = []
+
+    def call(priority: str, tenant: str, label: str) -> None:
+        with llm_tags(priority=priority, tenant=tenant):
+            scheduler._acquire(1)
+        order.append(label)
+
+    threads = []
+    for n, (priority, tenant, label) in enumerate(requests, start=1):
+        thread = threading.Thread(target=call, args=(priority, tenant, label), daemon=True)
+        thread.start()
+        threads.append(thread)
+        _wait_for(lambda: _queued(scheduler) == n)
+
+    for n in range(1, len(requests) + 1):
+        clock.now += 1.0
+        with scheduler._cond:
+            scheduler._cond.notify_all()
+        _wait_for(lambda: len(order) == n)
+    for thread in threads:
+        thread.join(timeout=5)
+    return order
+
+
+def test_token_bucket_refills_continuously_up_to_capacity():
+    bucket = TokenBucket(60)
+    bucket._updated = 0.0
+    bucket.take(60)
+
+    assert bucket.wait_time(1, now=0.0) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now=0.5) == pytest.approx(0.5)
+    assert bucket.wait_time(1, now=1.0) == 0.0
+    bucket.wait_time(1, now=1000.0)
+    assert bucket._tokens == 60
+
+
+def test_token_bucket_reserve_and_oversized_requests():
+    bucket = TokenBucket(100)
+    bucket._updated = 0.0
+    # Larger than the bucket: admitted once it is full rather than never
+    assert bucket.wait_time(500, now=0.0) == 0.0
+
+    bucket.take(40)
+    assert bucket.wait_time(50, now=0.0) == 0.0
+    assert bucket.wait_time(50, now=0.0, reserve=20) == pytest.approx(10 * 60 / 100)
+
+
+def test_token_bucket_adjust_corrects_estimates():
+    bucket = TokenBucket(100)
+    bucket._updated = 0.0
+    bucket.take(80)
+    bucket.adjust(-30)        # the call used more than estimated
+    assert bucket._tokens == -10
+    bucket.adjust(500)
+    assert bucket._tokens == 100
+
+    unlimited = TokenBucket(0)
+    unlimited.take(10**9)
+    assert unlimited.wait_time(10**9, now=0.0) == 0.0
+
+
+def test_interactive_goes_before_bulk(drained, clock):
+    order = _grant_order(
+        drained,
+        clock,
+        [
+            ("bulk", "doc1", "bulk-1"),
+            ("bulk", "doc1", "bulk-2"),
+            ("interactive", "u1", "interactive-1"),
+            ("interactive", "u2", "interactive-2"),
+        ],
+    )
+    # Queued interactive calls overtake bulk ones that arrived earlier
+    assert order == ["interactive-1", "interactive-2", "bulk-1", "bulk-2"]
+
+
+def test_tenants_share_round_robin_within_a_priority(drained, clock):
+    order = _grant_order(
+        drained,
+        clock,
+        [
+            ("bulk", "big", "big-1"),
+            ("bulk", "big", "big-2"),
+            ("bulk", "big", "big-3"),
+            ("bulk", "small", "small-1"),
+            ("bulk", "other", "other-1"),
+        ],
+    )
+    assert order == ["big-1", "small-1", "other-1", "big-2", "big-3"]
+
+
+def test_bulk_leaves_the_reserve_to_interactive(clock):
+    scheduler = LLMScheduler(OfflineLLMProvider(), requests_per_minute=10, bulk_reserve=0.5)
+    scheduler.rpm._updated = clock.now
+    scheduler.rpm._tokens = 5.0
+
+    def wait(priority: str) -> float:
+        ticket = _Ticket(
+            seq=0, priority=priority, tenant="t", est_tokens=1, enqueued_at=clock.now, tags=LLMCallTags()
+        )
+        return scheduler._wait_time(ticket, clock.now)
+
+    assert wait("interactive") == 0
+    assert wait("bulk") == pytest.approx(1 * 60 / 10)
+
+
+def test_cancelled_waiter_leaves_the_queue(drained, clock):
+    async def main() -> None:
+        task = asyncio.create_task(drained._aacquire(1))
+        await asyncio.to_thread(_wait_for, lambda: _queued(drained) == 1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.to_thread(_wait_for, lambda: _queued(drained) == 0)
+
+    asyncio.run(main())
+    assert drained.metrics().in_flight == 0
+    assert drained.metrics().granted["interactive"] == 0
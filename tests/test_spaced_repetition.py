@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from core.agents.spaced_repetition import INITIAL_EASE, MIN_EASE, ReviewScheduler, sm2_next
+from core.memory.review_schedule import SQLiteReviewStore
+
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def _review(card, score: float, now: datetime = NOW):
+    return sm2_next("u1", "doc1", 0, card, score, now)
+
+
+def test_first_successful_reviews_use_the_fixed_intervals():
+    first = _review(None, 1.0)
+    second = _review(first, 1.0)
+
+    assert (first.repetitions, first.interval_days) == (1, 1.0)
+    assert (second.repetitions, second.interval_days) == (2, 6.0)
+    assert first.due_at_utc == (NOW + timedelta(days=1)).isoformat()
+    assert first.last_reviewed_at_utc == NOW.isoformat()
+
+
+def test_later_intervals_grow_by_the_ease():
+    card = _review(_review(None, 1.0), 1.0)
+    third = _review(card, 1.0)
+
+    assert third.repetitions == 3
+    assert third.interval_days == pytest.approx(6.0 * card.ease)
+
+
+@pytest.mark.parametrize(
+    "score, quality, ease_delta",
+    [
+        (1.0, 5, 0.1),
+        (0.8, 4, 0.0),
+        (0.6, 3, -0.14),
+        (0.4, 2, -0.32),
+        (0.0, 0, -0.8),
+    ],
+)
+def test_ease_follows_the_sm2_formula(score, quality, ease_delta):
+    card = _review(None, score)
+
+    assert card.ease == pytest.approx(INITIAL_EASE + ease_delta)
+    assert ease_delta == pytest.approx(0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+
+def test_ease_never_drops_below_the_minimum():
+    card = None
+    for _ in range(10):
+        card = _review(card, 0.0)
+
+    assert card.ease == MIN_EASE
+
+
+def test_failure_resets_repetitions_and_interval():
+    card = None
+    for _ in range(4):
+        card = _review(card, 1.0)
+    assert card.repetitions == 4 and card.interval_days > 6.0
+
+    lapsed = _review(card, 0.4)
+
+    assert (lapsed.repetitions, lapsed.interval_days) == (0, 1.0)
+    assert lapsed.ease < card.ease
+    # Relearning starts over at 1 then 6 days
+    relearned = _review(_review(lapsed, 1.0), 1.0)
+    assert (relearned.repetitions, relearned.interval_days) == (2, 6.0)
+
+
+def test_scores_are_clamped_to_the_quality_range():
+    assert _review(None, 1.7).ease == _review(None, 1.0).ease
+    assert _review(None, -0.5).ease == _review(None, 0.0).ease
+
+
+def test_scheduler_persists_cards_and_serves_the_most_overdue(tmp_path):
+    scheduler = ReviewScheduler(SQLiteReviewStore(tmp_path / "reviews.sqlite3"))
+    scheduler.record("u1", "doc1", 0, 1.0, now=NOW)
+    scheduler.record("u1", "doc1", 1, 1.0, now=NOW - timedelta(days=3))
+    scheduler.record("u1", "doc1", 2, 1.0, now=NOW + timedelta(days=5))
+
+    later = NOW + timedelta(days=2)
+
+    assert scheduler.count_due("u1", now=later) == 2
+    assert scheduler.next_due("u1", "doc1", now=later).step_index == 1
+    assert scheduler.next_due("u1", "doc1", now=later, exclude_step=1).step_index == 0
+    assert scheduler.next_due("u1", "doc1", now=NOW - timedelta(days=5)) is None
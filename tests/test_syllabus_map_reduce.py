@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import List
+
+import pytest
+
+from core.llm import syllabus_map_reduce
+from core.llm.syllabus_extractor import SyllabusExtractor
+from core.llm.syllabus_map_reduce import MapReduceSyllabusExtractor, merge_syllabi
+from core.storage.syllabus_cache import SQLiteSyllabusSectionCache
+from core.types.interfaces import ChatMessage, LLMResult
+
+
+class ScriptedLLM:
+    """
+    Answers each section with the response registered for the first marker
+    word found in it, and counts calls.
+    """
+
+    model = "gpt-4o-mini"
+
+    def __init__(self, responses: dict) -> None:
+        self.responses = responses
+        self.calls: List[str] = []
+
+    async def acomplete(self, messages: List[ChatMessage], temperature: float = 0.0) -> LLMResult:
+        text = messages[-1].content
+        for marker, response in self.responses.items():
+            if marker in text:
+                self.calls.append(marker)
+                await asyncio.sleep(0)
+                return LLMResult(text=response, model=self.model)
+        raise AssertionError("unexpected section")
+
+
+def _syllabus(*topics) -> str:
+    return json.dumps({"topics": [{"title": t, "subtopics": subs} for t, subs in topics]})
+
+
+@pytest.fixture(autouse=True)
+def no_usage_rows(monkeypatch):
+    monkeypatch.setattr(syllabus_map_reduce, "record_llm_cache_hit", lambda *a, **k: None)
+
+
+def _map_reduce(tmp_path, llm: ScriptedLLM) -> MapReduceSyllabusExtractor:
+    extractor = SyllabusExtractor(model=llm.model, api_key="", llm=llm)
+    # One chunk per section
+    return MapReduceSyllabusExtractor(extractor, SQLiteSyllabusSectionCache(tmp_path / "s.sqlite3"), section_tokens=5)
+
+
+def _chunks(*markers: str) -> List[dict]:
+    return [{"text": f"{m} section text"} for m in markers]
+
+
+@pytest.mark.parametrize(
+    "response",
+    ["not json", "[1, 2]", '"topics"', "{}", '{"topics": "Gradient descent"}', "null"],
+)
+def test_parse_treats_non_syllabus_json_as_empty(response):
+    assert SyllabusExtractor._parse(response) == {"topics": []}
+
+
+def test_parse_drops_malformed_topics():
+    parsed = SyllabusExtractor._parse(
+        json.dumps({"topics": ["loose string", {"title": "Loss", "subtopics": "MSE"}, {"title": "Bias", "subtopics": ["Variance"]}]})
+    )
+
+    assert parsed == {"topics": [{"title": "Loss", "subtopics": []}, {"title": "Bias", "subtopics": ["Variance"]}]}
+
+
+def test_merge_deduplicates_titles_in_document_order():
+    merged = merge_syllabi(
+        [
+            {"topics": [{"title": "Introduction to Gradient Descent", "subtopics": ["Learning rate"]}]},
+            {"topics": [{"title": "Regularization", "subtopics": ["L2"]}]},
+            {"topics": [{"title": "gradient descent", "subtopics": ["learning rate", "Momentum"]}]},
+        ]
+    )
+
+    assert merged == {
+        "topics": [
+            {"title": "Introduction to Gradient Descent", "subtopics": ["Learning rate", "Momentum"]},
+            {"title": "Regularization", "subtopics": ["L2"]},
+        ]
+    }
+
+
+def test_map_reduce_survives_non_object_responses(tmp_path):
+    llm = ScriptedLLM(
+        {
+            "alpha": _syllabus(("Gradient descent", ["Learning rate"])),
+            "beta": "[]",
+            "gamma": '"just a string"',
+            "delta": _syllabus(("Regularization", ["L2"])),
+        }
+    )
+    progress = []
+
+    syllabus = _map_reduce(tmp_path, llm).extract(
+        _chunks("alpha", "beta", "gamma", "delta"), on_progress=lambda done, total: progress.append((done, total))
+    )
+
+    assert [t["title"] for t in syllabus["topics"]] == ["Gradient descent", "Regularization"]
+    assert progress[-1] == (4, 4)
+
+
+def test_section_cache_skips_unchanged_sections_and_retries_failures(tmp_path):
+    llm = ScriptedLLM({"alpha": _syllabus(("Gradient descent", [])), "beta": "[]"})
+    map_reduce = _map_reduce(tmp_path, llm)
+
+    map_reduce.extract(_chunks("alpha", "beta"))
+    map_reduce.extract(_chunks("alpha", "beta"))
+
+    # The good section is cached; the empty partial is not, so it is retried
+    assert sorted(llm.calls) == ["alpha", "beta", "beta"]
+
+
+def test_changed_section_misses_the_cache(tmp_path):
+    llm = ScriptedLLM({"alpha": _syllabus(("Gradient descent", [])), "omega": _syllabus(("Loss", []))})
+    map_reduce = _map_reduce(tmp_path, llm)
+
+    map_reduce.extract(_chunks("alpha"))
+    syllabus = map_reduce.extract(_chunks("alpha", "omega"))
+
+    assert llm.calls == ["alpha", "omega"]
+    assert [t["title"] for t in syllabus["topics"]] == ["Gradient descent", "Loss"]
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from typing import List
+
+import pytest
+
+from core.text import token_budget
+from core.text.token_budget import ContextBudgeter, TokenCounter
+
+
+class WordEncoding:
+    """
+    A tokenizer with one token per word that records what it encodes.
+    """
+
+    def __init__(self) -> None:
+        self.encoded: List[str] = []
+
+    def encode(self, text: str, disallowed_special=()) -> List[str]:
+        self.encoded.append(text)
+        return text.split()
+
+    def decode(self, tokens: List[str]) -> str:
+        return " ".join(tokens)
+
+
+@pytest.fixture
+def no_tokenizer(monkeypatch):
+    monkeypatch.setattr(token_budget, "_encoding_for", lambda model: None)
+
+
+@pytest.fixture
+def words(monkeypatch) -> WordEncoding:
+    encoding = WordEncoding()
+    monkeypatch.setattr(token_budget, "_encoding_for", lambda model: encoding)
+    return encoding
+
+
+def _chunks(*token_counts: int) -> List[dict]:
+    return [{"chunk_id": f"c{i}", "text": " ".join(["word"] * n)} for i, n in enumerate(token_counts)]
+
+
+def test_fallback_counts_four_chars_per_token(no_tokenizer):
+    counter = TokenCounter("gpt-4o-mini")
+
+    assert counter.count("") == 0
+    assert counter.count("abcd") == 1
+    assert counter.count("abcde") == 2
+    assert counter.truncate("abcdefghij", 2) == "abcdefgh"
+    assert counter.truncate("abcdefghij", 0) == ""
+
+
+def test_fallback_budget_keeps_leading_chunks_and_truncates_the_next(no_tokenizer):
+    budgeter = ContextBudgeter("gpt-4o-mini", budget_tokens=100)
+    chunks = [{"chunk_id": f"c{i}", "text": "x" * 160} for i in range(4)]   # 40 tokens each
+
+    kept, report = budgeter.fit_chunks(chunks)
+
+    assert [c["chunk_id"] for c in kept] == ["c0", "c1"]
+    assert report.used_tokens == 80
+    assert report.input_tokens == 160
+    assert report.tokens_saved == 80
+
+
+def test_partial_chunk_is_truncated_to_the_remaining_budget(words):
+    budgeter = ContextBudgeter("m", budget_tokens=100)
+    budgeter.MIN_PARTIAL_TOKENS = 10
+
+    kept, report = budgeter.fit_chunks(_chunks(60, 70, 5))
+
+    assert [c["chunk_id"] for c in kept] == ["c0", "c1"]
+    assert kept[1]["text"] == " ".join(["word"] * 40)
+    assert (report.used_tokens, report.chunks_kept, report.chunks_in) == (100, 2, 3)
+
+
+def test_too_little_budget_left_drops_the_chunk(words):
+    budgeter = ContextBudgeter("m", budget_tokens=100)
+
+    kept, report = budgeter.fit_chunks(_chunks(60, 70))
+
+    assert [c["chunk_id"] for c in kept] == ["c0"]
+    assert report.used_tokens == 60
+
+
+def test_scores_pick_chunks_best_first(words):
+    budgeter = ContextBudgeter("m", budget_tokens=50)
+
+    kept, _ = budgeter.fit_chunks(_chunks(30, 30, 20), scores=[0.1, 0.9, 0.5])
+
+    assert [c["chunk_id"] for c in kept] == ["c1", "c2"]
+
+
+def test_chunks_past_the_budget_are_not_tokenized(words):
+    budgeter = ContextBudgeter("m", budget_tokens=100)
+    chunks = _chunks(*[40] * 50)
+
+    kept, report = budgeter.fit_chunks(chunks)
+
+    # Two chunks fit, the third overflows, the rest are only estimated
+    assert len(kept) == 2
+    assert len(words.encoded) == 3
+    assert report.input_tokens == 3 * 40 + 47 * TokenCounter.estimate(chunks[0]["text"])
+
+
+def test_totals_accumulate_across_calls(no_tokenizer):
+    budgeter = ContextBudgeter("m", budget_tokens=30)
+
+    budgeter.fit_chunks([{"text": "x" * 80}])
+    budgeter.fit_text("x" * 200)
+
+    assert (budgeter.total_input_tokens, budgeter.total_used_tokens) == (70, 50)
+    assert budgeter.total_tokens_saved == 20
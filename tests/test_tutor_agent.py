@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import pytest
+
+from core.agents.tutor_agent import TutorAgent
+from core.memory.tutor_memory import TutorState
+
+
+def _state(mastery: float = 0.5, step_index: int = 2) -> TutorState:
+    return TutorState("u1", "doc1", step_index, "medium", "quiz", mastery, "2026-10-01T00:00:00+00:00", version=3)
+
+
+def test_staying_on_a_step_uses_its_traced_mastery():
+    after = TutorAgent().update_after_scored_quiz(_state(), score=0.5, p_known=0.62, next_p_known=0.2)
+
+    assert after.step_index == 2
+    assert after.mastery_score == pytest.approx(0.62)
+    assert after.difficulty == "medium"
+    assert after.version == 3
+
+
+def test_advancing_starts_from_the_next_steps_prior():
+    after = TutorAgent().update_after_scored_quiz(_state(), score=0.9, p_known=0.95, next_p_known=0.3)
+
+    assert after.step_index == 3
+    assert after.mastery_score == pytest.approx(0.3)
+    assert after.difficulty == "easy"
+
+
+def test_without_knowledge_tracing_mastery_is_a_moving_average():
+    after = TutorAgent().update_after_scored_quiz(_state(mastery=0.5), score=1.0)
+
+    assert after.mastery_score == pytest.approx(0.65)
+    assert after.step_index == 3
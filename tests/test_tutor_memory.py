@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import replace
+
+import pytest
+
+from core.memory.tutor_memory import CachedTutorMemory, SQLiteTutorMemory, StaleStateError, TutorState
+
+
+def _state(**overrides) -> TutorState:
+    values = dict(
+        user_id="u1",
+        doc_id="doc1",
+        step_index=0,
+        difficulty="medium",
+        last_action="explain",
+        mastery_score=0.5,
+        updated_at_utc="2026-10-01T00:00:00+00:00",
+    )
+    values.update(overrides)
+    return TutorState(**values)
+
+
+def test_version_column_is_added_to_existing_tables(tmp_path):
+    db_path = tmp_path / "tutor.sqlite3"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE tutor_memory (
+                user_id TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                step_index INTEGER NOT NULL,
+                difficulty TEXT NOT NULL,
+                last_action TEXT NOT NULL,
+                mastery_score REAL NOT NULL,
+                updated_at_utc TEXT NOT NULL,
+                PRIMARY KEY (user_id, doc_id)
+            );
+            """
+        )
+        conn.execute(
+            "INSERT INTO tutor_memory VALUES ('u1', 'doc1', 2, 'easy', 'quiz', 0.4, '2026-09-01T00:00:00+00:00')"
+        )
+
+    memory = SQLiteTutorMemory(db_path)
+    state = memory.get("u1", "doc1")
+
+    assert state.version == 1
+    assert state.step_index == 2
+    assert memory.upsert(replace(state, step_index=3)).version == 2
+    # Re-opening an already migrated database is a no-op
+    assert SQLiteTutorMemory(db_path).get("u1", "doc1").version == 2
+
+
+def test_upsert_bumps_the_version(tmp_path):
+    memory = SQLiteTutorMemory(tmp_path / "tutor.sqlite3")
+
+    first = memory.upsert(_state())
+    second = memory.upsert(replace(first, step_index=1))
+
+    assert (first.version, second.version) == (1, 2)
+    assert memory.get("u1", "doc1") == second
+
+
+def test_concurrent_upserts_lose_with_stale_state_error(tmp_path):
+    memory = SQLiteTutorMemory(tmp_path / "tutor.sqlite3")
+    base = memory.upsert(_state())
+
+    # Two sessions read version 1; the first write wins
+    memory.upsert(replace(base, step_index=1))
+    with pytest.raises(StaleStateError):
+        memory.upsert(replace(base, step_index=2))
+
+    assert memory.get("u1", "doc1").step_index == 1
+
+
+def test_concurrent_first_inserts_lose_with_stale_state_error(tmp_path):
+    memory = SQLiteTutorMemory(tmp_path / "tutor.sqlite3")
+
+    memory.upsert(_state(step_index=1))
+    with pytest.raises(StaleStateError):
+        memory.upsert(_state(step_index=2))
+
+
+def test_cache_serves_reads_and_writes_through(tmp_path):
+    cached = CachedTutorMemory(SQLiteTutorMemory(tmp_path / "tutor.sqlite3"))
+
+    saved = cached.upsert(_state())
+    assert cached.get("u1", "doc1") == saved
+    assert (cached.hits, cached.misses) == (1, 0)
+    assert cached.memory.get("u1", "doc1") == saved
+
+
+def test_cache_is_invalidated_by_a_stale_write(tmp_path):
+    db_path = tmp_path / "tutor.sqlite3"
+    cached = CachedTutorMemory(SQLiteTutorMemory(db_path))
+    other_process = SQLiteTutorMemory(db_path)
+
+    base = cached.upsert(_state())
+    newer = other_process.upsert(replace(base, step_index=4))
+    # Still the cached copy: nothing told this process about the other write
+    assert cached.get("u1", "doc1") == base
+
+    with pytest.raises(StaleStateError):
+        cached.upsert(replace(base, step_index=1))
+
+    assert cached.get("u1", "doc1") == newer
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cached = CachedTutorMemory(SQLiteTutorMemory(tmp_path / "tutor.sqlite3"), max_entries=2)
+    for user_id in ("u1", "u2"):
+        cached.upsert(_state(user_id=user_id))
+    cached.get("u1", "doc1")
+    cached.upsert(_state(user_id="u3"))
+
+    assert [key[0] for key in cached._states] == ["u1", "u3"]
+
+
+def test_cache_keeps_the_newer_version(tmp_path):
+    cached = CachedTutorMemory(SQLiteTutorMemory(tmp_path / "tutor.sqlite3"))
+    saved = cached.upsert(_state())
+    newer = cached.upsert(replace(saved, step_index=1))
+
+    cached._put(saved)
+
+    assert cached.get("u1", "doc1") == newer